@@ -0,0 +1,70 @@
+"""Benchmark Classifier.classify against a bare stat of the same files.
+
+Builds a flat folder where a share of the files have no extension (so they
+are sniffed) and times one pass of os.stat, a cold classify pass (headers
+read) and a warm one (sniff results cached by inode and mtime).
+
+    python benchmarks/bench_classify.py --files 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productivity_manager.modules.file_rules import Classifier, rule_from_dict  # noqa: E402
+
+HEADERS = [b"\x89PNG\r\n\x1a\n", b"%PDF-1.7\n", b"PK\x03\x04", b"plain text"]
+NAMES = ["photo{}.jpg", "report{}.pdf", "setup-{}.exe", "blob{}", "archive{}.tar.gz", "notes{}.txt"]
+
+
+def build_tree(root: str, files: int) -> None:
+    for i in range(files):
+        with open(os.path.join(root, NAMES[i % len(NAMES)].format(i)), "wb") as f:
+            f.write(HEADERS[i % len(HEADERS)] + bytes(i % 512))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--dir", help="classify this folder instead of a generated one")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        root = args.dir or td
+        if not args.dir:
+            build_tree(root, args.files)
+        paths = [e.path for e in os.scandir(root) if e.is_file()]
+        classifier = Classifier([
+            rule_from_dict({"category": "Installers", "globs": ["*setup*"], "min_size": 1}),
+            rule_from_dict({"category": "Old", "older_than_days": 365}),
+        ])
+
+        def stat_only():
+            for p in paths:
+                os.stat(p)
+
+        def classify():
+            for p in paths:
+                classifier.classify(p, os.stat(p))
+
+        t0 = time.perf_counter()
+        classify()
+        cold = time.perf_counter() - t0
+        print(f"files={len(paths)} headers read={classifier.reads}")
+        for label, func in (("stat only", stat_only), ("classify (warm)", classify)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - t0)
+            print(f"{label:16s} {best:8.3f}s  {best / len(paths) * 1e6:6.2f} us/file")
+        print(f"{'classify (cold)':16s} {cold:8.3f}s  {cold / len(paths) * 1e6:6.2f} us/file")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+"""Benchmark find_duplicates across I/O worker counts.
+
+Builds a synthetic tree (many same-size files, a share of them duplicates)
+and times a full scan for each worker count, checking every run returns
+the same groups. The tree stays in the page cache after the first run, so
+this measures hashing/syscall parallelism; point --dir at a cold tree on
+the real disk to include device latency.
+
+    python benchmarks/bench_find_duplicates.py --files 2000 --size-kb 512
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productivity_manager.modules.file_organizer import (  # noqa: E402
+    DEFAULT_TIERS,
+    ScanStats,
+    find_duplicates,
+    plan_tiers,
+)
+
+
+def unsampled_offset(size: int, width: int = 8) -> int:
+    """First offset where ``width`` bytes lie outside every sampling tier.
+
+    Falls back to the last bytes when the tiers cover the whole file.
+    """
+    offset = 0
+    for start, length in sorted(r for _, ranges in plan_tiers(DEFAULT_TIERS, size) for r in ranges):
+        if start - offset >= width:
+            break
+        offset = max(offset, start + length)
+    return min(offset, size - width)
+
+
+def build_tree(root: str, files: int, size_kb: int) -> None:
+    size = size_kb * 1024
+    mark = unsampled_offset(size)
+    for i in range(files):
+        sub = os.path.join(root, f"d{i % 16:02d}")
+        os.makedirs(sub, exist_ok=True)
+        # Every fourth file duplicates its predecessor; the rest differ only
+        # in 8 bytes that no sampling tier reads, so they survive every
+        # partial-hash tier and are only told apart by the full hash.
+        seed = i - 1 if i % 4 == 3 else i
+        body = bytearray(size)
+        body[mark:mark + 8] = seed.to_bytes(8, "little")
+        with open(os.path.join(sub, f"f{i:06d}.bin"), "wb") as f:
+            f.write(body)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--dir", help="scan this tree instead of a generated one")
+    parser.add_argument("--workers", type=int, nargs="*", help="default: 1, 2, 4, ... up to 2x cpu_count")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--algorithm", default="sha256", help="full-file digest, e.g. sha256 or blake2b")
+    args = parser.parse_args()
+
+    counts = args.workers
+    if not counts:
+        counts, n = [], 1
+        while n <= 2 * (os.cpu_count() or 1):
+            counts.append(n)
+            n *= 2
+
+    with tempfile.TemporaryDirectory() as td:
+        root = args.dir or td
+        if not args.dir:
+            build_tree(root, args.files, args.size_kb)
+        stats = ScanStats()
+        # Also warms the page cache.
+        expected = find_duplicates(root, workers=1, algorithm=args.algorithm, stats=stats)
+        print(f"cpu_count={os.cpu_count()} groups={len(expected)}")
+        print("\n".join(stats.summary()))
+        base = None
+        for workers in counts:
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                result = find_duplicates(root, workers=workers, algorithm=args.algorithm)
+                best = min(best, time.perf_counter() - t0)
+                assert result == expected, f"workers={workers} changed the result"
+            base = base or best
+            print(f"workers={workers:3d}  {best:8.3f}s  speedup {base / best:5.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
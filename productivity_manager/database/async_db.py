@@ -0,0 +1,70 @@
+"""asyncio facade over DBManager.
+
+Blocking calls run on a bounded thread pool; each pool thread gets its own
+pooled connection from DBManager. Cancelling the awaiting task cancels a
+call that has not started yet and interrupts the SQLite statement of one
+that is already running.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+from .db_manager import DBManager
+
+
+class AsyncDBManager:
+    def __init__(self, db: DBManager, max_workers: int = 4):
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-async")
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Await ``fn(*args, **kwargs)`` executed on the pool."""
+        loop = asyncio.get_running_loop()
+        lock = threading.Lock()
+        running = {"ident": None}
+
+        def call():
+            with lock:
+                running["ident"] = threading.get_ident()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with lock:
+                    running["ident"] = None
+
+        fut = loop.run_in_executor(self._executor, call)
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            with lock:
+                if running["ident"] is not None:
+                    self.db.interrupt(running["ident"])
+            raise
+
+    async def execute(self, sql: str, params: Iterable = ()):
+        return await self.run(self.db.execute, sql, tuple(params))
+
+    async def executemany(self, sql: str, seq_of_params: Iterable[Iterable]):
+        # Materialise here: generators must not be consumed on another thread.
+        rows = [tuple(p) for p in seq_of_params]
+        return await self.run(self.db.executemany, sql, rows)
+
+    async def query(self, sql: str, params: Iterable = ()) -> List[Any]:
+        return await self.run(self.db.query, sql, tuple(params))
+
+    async def run_in_transaction(self, fn: Callable[[Any], Any]) -> Any:
+        """Await ``fn(conn)`` run inside one transaction on a pool thread."""
+        def call():
+            with self.db.transaction() as conn:
+                return fn(conn)
+        return await self.run(call)
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self) -> "AsyncDBManager":
+        return self
+
+    async def __aexit__(self, *exc: Optional[BaseException]) -> None:
+        self.close()
@@ -1,84 +1,206 @@
 import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from types import SimpleNamespace
-from typing import Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .instrumentation import QueryStats
+from .migrations import MIGRATIONS, SCHEMA_VERSION_DDL
+
+
+# Connection tuning applied to every pooled connection. WAL lets the GUI thread
+# keep reading while a worker thread writes; NORMAL sync is durable in WAL mode
+# except for the last transactions on power loss.
+PRAGMAS = (
+    # Only takes effect on new files (before the first table); older files
+    # switch over with maintenance.vacuum_full.
+    ("auto_vacuum", "INCREMENTAL"),
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),  # negative = KiB, so ~16MB of page cache
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+)
 
 
 class DBManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # One long-lived connection per thread (GUI thread + worker threads),
+        # keyed by thread ident so close() can reach all of them.
+        self._conns: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per-thread transaction depth
+        # Query timing; None (the default) keeps the hot path free of it.
+        self.stats: Optional[QueryStats] = None
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        # check_same_thread=False only so close() may close connections owned by
+        # other threads; each connection is still used by a single thread.
+        # isolation_level=None: statements autocommit unless wrapped in
+        # transaction(), which issues BEGIN/COMMIT explicitly.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
         conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS:
+            conn.execute(f"PRAGMA {name} = {value}")
         return conn
 
-    def initialize(self) -> None:
+    def connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        ident = threading.get_ident()
+        conn = self._conns.get(ident)
+        if conn is not None:
+            return conn
         conn = self._connect()
-        cur = conn.cursor()
-        # Todos table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS todos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                priority TEXT CHECK(priority IN ('High','Medium','Low')) DEFAULT 'Medium',
-                category TEXT,
-                due_date TEXT,
-                completed INTEGER DEFAULT 0,
-                created_at TEXT DEFAULT (datetime('now')),
-                updated_at TEXT DEFAULT (datetime('now'))
-            )
-            """
-        )
-
-        # Time entries table
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS time_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                task_id INTEGER,
-                start_time TEXT,
-                end_time TEXT,
-                duration_seconds INTEGER,
-                notes TEXT,
-                created_at TEXT DEFAULT (datetime('now')),
-                FOREIGN KEY(task_id) REFERENCES todos(id) ON DELETE SET NULL
-            )
-            """
-        )
-
-        # Indexes
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos(completed)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_time_task ON time_entries(task_id)")
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._prune_dead_threads()
+            self._conns[ident] = conn
+        return conn
+
+    def _prune_dead_threads(self) -> None:
+        # Worker threads (file/scraper tabs) come and go; drop their connections
+        # so the pool does not grow with every background job.
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._conns if i not in alive]:
+            try:
+                self._conns.pop(ident).close()
+            except Exception:
+                pass
+
+    def initialize(self) -> None:
+        """Create the schema or upgrade it to the latest migration."""
+        self.migrate()
+
+    def schema_version(self) -> int:
+        conn = self.connection()
+        conn.execute(SCHEMA_VERSION_DDL)
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        return int(row[0] or 0)
+
+    def migrate(self) -> int:
+        """Apply pending migrations, each in its own transaction.
+
+        Returns the resulting schema version.
+        """
+        current = self.schema_version()
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            with self.transaction() as conn:
+                # Another process may have migrated while we waited for the lock.
+                if self.schema_version() >= migration.version:
+                    continue
+                migration.apply(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                    (migration.version, migration.name),
+                )
+            current = migration.version
+        return current
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group writes into a single commit.
+
+        The outermost block runs ``BEGIN IMMEDIATE``/``COMMIT``; nested blocks
+        use savepoints so an inner failure only rolls back its own writes.
+        Any exception rolls back and is re-raised.
+        """
+        conn = self.connection()
+        depth = getattr(self._local, "depth", 0)
+        savepoint = f"sp_{depth}"
+        conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+        finally:
+            self._local.depth = depth
+
+    def enable_instrumentation(self, slow_ms: float = 100.0, capture_plans: bool = True) -> QueryStats:
+        """Start timing every statement; returns the live QueryStats."""
+        if self.stats is None:
+            self.stats = QueryStats(slow_ms=slow_ms, capture_plans=capture_plans)
+        else:
+            self.stats.slow_ms = slow_ms
+            self.stats.capture_plans = capture_plans
+        return self.stats
+
+    def disable_instrumentation(self) -> None:
+        self.stats = None
+
+    def explain(self, sql: str, params: Iterable = ()) -> List[str]:
+        """Return the ``EXPLAIN QUERY PLAN`` detail lines for a statement."""
+        rows = self.connection().execute("EXPLAIN QUERY PLAN " + sql, tuple(params)).fetchall()
+        return [r[3] for r in rows]
+
+    def _run(self, cur: sqlite3.Cursor, sql: str, params: Any, many: bool = False, fetch: bool = False):
+        stats = self.stats
+        if stats is None:
+            (cur.executemany if many else cur.execute)(sql, params)
+            return cur.fetchall() if fetch else None
+        start = time.perf_counter()
+        (cur.executemany if many else cur.execute)(sql, params)
+        rows = cur.fetchall() if fetch else None
+        elapsed = time.perf_counter() - start
+        explain = None if many else (lambda: self.explain(sql, params))
+        stats.record(sql, elapsed, explain)
+        return rows
 
     def execute(self, sql: str, params: Iterable = ()):  # for writes
-        conn = self._connect()
+        conn = self.connection()
         cur = conn.cursor()
-        cur.execute(sql, tuple(params))
-        conn.commit()
-        lastrowid = cur.lastrowid
-        conn.close()
+        self._run(cur, sql, tuple(params))
         # Return a lightweight object exposing lastrowid for compatibility
-        return SimpleNamespace(lastrowid=lastrowid)
+        return SimpleNamespace(lastrowid=cur.lastrowid, rowcount=cur.rowcount)
 
-    def query(self, sql: str, params: Iterable = ()) -> Iterable[sqlite3.Row]:  # for reads
-        conn = self._connect()
-        cur = conn.cursor()
-        cur.execute(sql, tuple(params))
-        rows = cur.fetchall()
-        conn.close()
-        return rows
+    def executemany(self, sql: str, seq_of_params: Iterable[Iterable]):  # bulk writes
+        """Run ``sql`` for every parameter tuple inside one transaction."""
+        with self.transaction() as conn:
+            cur = conn.cursor()
+            self._run(cur, sql, (tuple(p) for p in seq_of_params), many=True)
+        return SimpleNamespace(lastrowid=cur.lastrowid, rowcount=cur.rowcount)
+
+    def query(self, sql: str, params: Iterable = (), row_factory: Optional[Callable] = sqlite3.Row) -> List[Any]:  # for reads
+        """Fetch all rows; ``row_factory`` builds each one (None: plain tuples)."""
+        cur = self.connection().cursor()
+        cur.row_factory = row_factory
+        return self._run(cur, sql, tuple(params), fetch=True)
+
+    def interrupt(self, thread_ident: int) -> None:
+        """Abort the statement currently running on another thread's connection.
+
+        The interrupted call raises ``sqlite3.OperationalError`` in its thread.
+        """
+        conn = self._conns.get(thread_ident)
+        if conn is not None:
+            conn.interrupt()
 
     def close(self):
-        # No persistent connection kept; nothing to close.
-        return None
+        """Close every pooled connection; later calls reopen lazily."""
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
 
     # Ensure connections are not left open (helps on Windows file locks)
     def __del__(self):  # pragma: no cover - destructor behavior
-        # Connections are per-operation now; nothing to do.
-        pass
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,144 @@
+"""Optional per-statement timing for DBManager.
+
+Enabled with ``DBManager.enable_instrumentation``; while disabled the only
+cost on the query path is a ``None`` check.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence
+
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended.
+BUCKETS_MS: Sequence[float] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and literals so equivalent statements share stats."""
+    s = _STRING_RE.sub("?", sql)
+    s = _NUMBER_RE.sub("?", s)
+    s = _IN_LIST_RE.sub("(?, ...)", s)
+    return _SPACE_RE.sub(" ", s).strip()
+
+
+def is_full_scan(plan: Sequence[str]) -> bool:
+    """True if an EXPLAIN QUERY PLAN detail line scans a table without an index."""
+    for line in plan:
+        if line.startswith("SCAN ") and " USING " not in line and "VIRTUAL TABLE" not in line:
+            return True
+    return False
+
+
+class SlowQuery(NamedTuple):
+    sql: str
+    ms: float
+    at: float  # time.time() when it finished
+    plan: Optional[List[str]]
+
+
+class _Entry:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+
+class QueryStats:
+    """Latency histograms keyed by normalized SQL plus a bounded slow log.
+
+    With ``capture_plans`` on, the first slow run of each statement also
+    records its ``EXPLAIN QUERY PLAN``; statements whose plan scans a table
+    without an index are listed by ``full_scans()``.
+    """
+
+    def __init__(self, slow_ms: float = 100.0, slow_log_size: int = 200, capture_plans: bool = True):
+        self.slow_ms = slow_ms
+        self.capture_plans = capture_plans
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._slow: Deque[SlowQuery] = deque(maxlen=slow_log_size)
+        self._plans: Dict[str, List[str]] = {}
+
+    def record(self, sql: str, seconds: float, explain: Optional[Callable[[], List[str]]] = None) -> None:
+        key = normalize_sql(sql)
+        ms = seconds * 1000.0
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.count += 1
+            entry.total_ms += ms
+            if ms > entry.max_ms:
+                entry.max_ms = ms
+            entry.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+            if ms < self.slow_ms:
+                return
+            need_plan = self.capture_plans and explain is not None and key not in self._plans
+        plan = None
+        if need_plan:
+            try:
+                plan = explain()  # type: ignore[misc]
+            except Exception:
+                plan = None
+        with self._lock:
+            if plan is not None:
+                self._plans[key] = plan
+            self._slow.append(SlowQuery(key, ms, time.time(), self._plans.get(key)))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-statement counters: count, total/avg/max ms and bucket counts."""
+        with self._lock:
+            out: Dict[str, Dict[str, Any]] = {}
+            for key, e in self._entries.items():
+                out[key] = {
+                    "count": e.count,
+                    "total_ms": e.total_ms,
+                    "avg_ms": e.total_ms / e.count if e.count else 0.0,
+                    "max_ms": e.max_ms,
+                    "buckets": list(e.buckets),
+                }
+            return out
+
+    def slow_queries(self) -> List[SlowQuery]:
+        with self._lock:
+            return list(self._slow)
+
+    def full_scans(self) -> Dict[str, List[str]]:
+        """Captured plans of statements that scan a whole table."""
+        with self._lock:
+            return {k: p for k, p in self._plans.items() if is_full_scan(p)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._slow.clear()
+            self._plans.clear()
+
+    def report(self, top: int = 15) -> str:
+        """Plain-text summary ordered by total time, for dialogs or a console."""
+        snap = sorted(self.snapshot().items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        lines = [f"{'count':>7} {'total ms':>10} {'avg ms':>8} {'max ms':>8}  statement"]
+        for sql, s in snap[:top]:
+            lines.append(
+                f"{s['count']:>7} {s['total_ms']:>10.1f} {s['avg_ms']:>8.2f} {s['max_ms']:>8.1f}  {sql[:120]}"
+            )
+        scans = self.full_scans()
+        if scans:
+            lines.append("")
+            lines.append("Full table scans:")
+            for sql, plan in scans.items():
+                lines.append(f"  {sql[:120]}")
+                lines.extend(f"    {p}" for p in plan)
+        return "\n".join(lines)
@@ -0,0 +1,74 @@
+"""Archival of cold rows and routine SQLite upkeep.
+
+Rows move from a hot table to its ``*_archive`` twin (see migration 7) in
+batches, one short transaction each, so the GUI's reads and the write queue
+are never blocked for long. ``optimize`` refreshes planner statistics and
+returns free pages to the filesystem.
+"""
+from typing import Any, Dict, List, Sequence
+
+from .db_manager import DBManager
+from .migrations import ARCHIVE_TIME_COLUMNS, ARCHIVE_TODO_COLUMNS
+
+
+ARCHIVES = {
+    "todos": ("todos_archive", ARCHIVE_TODO_COLUMNS),
+    "time_entries": ("time_entries_archive", ARCHIVE_TIME_COLUMNS),
+}
+# Rows per transaction; also keeps "id IN (...)" under SQLite's variable limit.
+ARCHIVE_BATCH = 500
+# Upper bound on rows ANALYZE samples per index (PRAGMA analysis_limit).
+ANALYSIS_LIMIT = 1000
+
+
+def archive_rows(db: DBManager, table: str, where: str, params: Sequence[Any] = (), batch_size: int = ARCHIVE_BATCH) -> List[int]:
+    """Move rows of ``table`` matching ``where`` into its archive table.
+
+    Returns the ids moved. Each batch is copied and deleted in its own
+    transaction, so an interruption leaves every row in exactly one table.
+    """
+    archive, columns = ARCHIVES[table]
+    batch_size = max(1, min(int(batch_size), ARCHIVE_BATCH))
+    moved: List[int] = []
+    while True:
+        with db.transaction() as conn:
+            ids = [r[0] for r in conn.execute(
+                f"SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT ?", (*params, batch_size)
+            )]
+            if not ids:
+                break
+            marks = ", ".join("?" * len(ids))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {archive} ({columns}) SELECT {columns} FROM {table} WHERE id IN ({marks})", ids
+            )
+            conn.execute(f"DELETE FROM {table} WHERE id IN ({marks})", ids)
+        moved += ids
+        if len(ids) < batch_size:
+            break
+    return moved
+
+
+def optimize(db: DBManager, vacuum_pages: int = 1000) -> Dict[str, int]:
+    """Refresh statistics and reclaim up to ``vacuum_pages`` free pages.
+
+    ``auto_vacuum`` only takes effect after a full VACUUM on databases
+    created before it was enabled; that one-off rewrite is left to
+    ``vacuum_full``. Returns the free page count before and after.
+    """
+    conn = db.connection()
+    conn.execute(f"PRAGMA analysis_limit = {int(ANALYSIS_LIMIT)}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2 and before:
+        # incremental_vacuum returns a row per step; drain it to run them all.
+        conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+    after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"free_pages_before": before, "free_pages_after": after}
+
+
+def vacuum_full(db: DBManager) -> None:
+    """Rewrite the file once, switching it to incremental auto-vacuum."""
+    conn = db.connection()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
@@ -0,0 +1,331 @@
+"""Versioned schema migrations.
+
+Each migration has a unique, increasing version and a function that receives
+the connection inside an open transaction. ``DBManager.migrate`` applies the
+ones newer than the version recorded in ``schema_version``; never edit a
+migration that has shipped, append a new one instead.
+"""
+import sqlite3
+from typing import Callable, List, NamedTuple
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT DEFAULT (datetime('now'))
+    )
+"""
+
+# Sort key used by TodoManager.list_todos; the ordering indexes below mirror it
+# column-for-column so SQLite can walk the index instead of sorting.
+PRIORITY_RANK_SQL = "CASE {col} WHEN 'High' THEN 0 WHEN 'Low' THEN 2 ELSE 1 END"
+
+# due_date is free-form local-time text. Date-only values mean "by the end of
+# that day"; anything SQLite cannot parse yields NULL and never alerts.
+DUE_EPOCH_SQL = (
+    "CASE WHEN length(trim({col})) = 10"
+    " THEN CAST(strftime('%s', trim({col}), '+1 day', '-1 seconds', 'utc') AS INTEGER)"
+    " ELSE CAST(strftime('%s', trim({col}), 'utc') AS INTEGER) END"
+)
+
+# Columns shared by each hot table and its archive.
+ARCHIVE_TODO_COLUMNS = (
+    "id, title, description, priority, category, due_date, completed,"
+    " created_at, updated_at, priority_rank, due_epoch"
+)
+ARCHIVE_TIME_COLUMNS = "id, task_id, start_time, end_time, duration_seconds, notes, created_at"
+
+
+def _base_schema(conn: sqlite3.Connection) -> None:
+    # Matches the pre-migration schema so existing databases adopt it as-is.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority TEXT CHECK(priority IN ('High','Medium','Low')) DEFAULT 'Medium',
+            category TEXT,
+            due_date TEXT,
+            completed INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now'))
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS time_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER,
+            start_time TEXT,
+            end_time TEXT,
+            duration_seconds INTEGER,
+            notes TEXT,
+            created_at TEXT DEFAULT (datetime('now')),
+            FOREIGN KEY(task_id) REFERENCES todos(id) ON DELETE SET NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos(completed)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_time_task ON time_entries(task_id)")
+
+
+def _priority_rank(conn: sqlite3.Connection) -> None:
+    # Numeric rank (0 = High) because text ordering puts 'Medium' above 'High'.
+    # Triggers keep it in sync for every write path, including bulk imports.
+    conn.execute("ALTER TABLE todos ADD COLUMN priority_rank INTEGER NOT NULL DEFAULT 1")
+    conn.execute(f"UPDATE todos SET priority_rank = {PRIORITY_RANK_SQL.format(col='priority')}")
+    rank = PRIORITY_RANK_SQL.format(col="NEW.priority")
+    conn.execute(
+        f"""
+        CREATE TRIGGER todos_priority_rank_ai AFTER INSERT ON todos BEGIN
+            UPDATE todos SET priority_rank = {rank} WHERE id = NEW.id;
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER todos_priority_rank_au AFTER UPDATE OF priority ON todos BEGIN
+            UPDATE todos SET priority_rank = {rank} WHERE id = NEW.id;
+        END
+        """
+    )
+
+
+def _ordering_indexes(conn: sqlite3.Connection) -> None:
+    order = "completed, priority_rank, due_date IS NULL, due_date, created_at DESC, id DESC"
+    conn.execute(f"CREATE INDEX idx_todos_order ON todos({order})")
+    conn.execute(f"CREATE INDEX idx_todos_category_order ON todos(category, {order})")
+    # Leading column of idx_todos_order; the single-column index is redundant.
+    conn.execute("DROP INDEX IF EXISTS idx_todos_completed")
+
+
+def _todos_fts(conn: sqlite3.Connection) -> None:
+    # External-content FTS5 index over title/description; triggers keep it in
+    # step with todos so search never has to rescan the table. Builds without
+    # FTS5 skip this and TodoManager.search falls back to LIKE.
+    try:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE todos_fts USING fts5(
+                title, description,
+                content='todos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return
+    conn.execute(
+        """
+        CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN
+            INSERT INTO todos_fts(rowid, title, description)
+            VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description ON todos BEGIN
+            INSERT INTO todos_fts(todos_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            INSERT INTO todos_fts(rowid, title, description)
+            VALUES (NEW.id, NEW.title, NEW.description);
+        END
+        """
+    )
+    conn.execute("INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')")
+
+
+def _due_epoch(conn: sqlite3.Connection) -> None:
+    # Normalised deadline (UTC epoch seconds) for the due-alert scheduler.
+    conn.execute("ALTER TABLE todos ADD COLUMN due_epoch INTEGER")
+    conn.execute(f"UPDATE todos SET due_epoch = {DUE_EPOCH_SQL.format(col='due_date')}")
+    epoch = DUE_EPOCH_SQL.format(col="NEW.due_date")
+    conn.execute(
+        f"""
+        CREATE TRIGGER todos_due_epoch_ai AFTER INSERT ON todos BEGIN
+            UPDATE todos SET due_epoch = {epoch} WHERE id = NEW.id;
+        END
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TRIGGER todos_due_epoch_au AFTER UPDATE OF due_date ON todos BEGIN
+            UPDATE todos SET due_epoch = {epoch} WHERE id = NEW.id;
+        END
+        """
+    )
+    # Only open todos with a deadline are ever scheduled.
+    conn.execute(
+        "CREATE INDEX idx_todos_due_epoch ON todos(due_epoch)"
+        " WHERE completed = 0 AND due_epoch IS NOT NULL"
+    )
+
+
+def _time_rollups(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS time_rollups (
+            period TEXT NOT NULL CHECK(period IN ('day','week','month')),
+            bucket TEXT NOT NULL,
+            task_id INTEGER NOT NULL DEFAULT 0,
+            seconds INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, task_id)
+        ) WITHOUT ROWID
+        """
+    )
+    # Bucket-range reads per task ("this task, last 12 weeks").
+    conn.execute("CREATE INDEX idx_time_rollups_task ON time_rollups(task_id, period, bucket)")
+    # Backfill, frozen here rather than calling rollups.rebuild: each session
+    # is split at local midnights, parts proportional to wall-clock overlap
+    # and the last one taking the remainder; unparseable times are skipped.
+    conn.execute(
+        """
+        CREATE TEMP TABLE rollup_parts AS
+        WITH RECURSIVE
+        entries(eid, task, s, e, secs) AS (
+            SELECT id, COALESCE(task_id, 0), julianday(start_time), julianday(end_time),
+                   CAST(COALESCE(duration_seconds, 0) AS INTEGER)
+            FROM time_entries
+            WHERE julianday(start_time) IS NOT NULL AND julianday(end_time) IS NOT NULL
+        ),
+        -- One row per local day a session touches: [cur, stop) plus the
+        -- seconds given to its earlier days ("before").
+        parts(eid, task, s, e, secs, cur, stop, before) AS (
+            SELECT eid, task, s, e, secs,
+                   CASE WHEN e <= s THEN e ELSE s END,
+                   CASE WHEN e <= s THEN e ELSE min(julianday(date(s, '+1 day')), e) END,
+                   0
+            FROM entries
+            UNION ALL
+            SELECT eid, task, s, e, secs, stop, min(julianday(date(stop, '+1 day')), e),
+                   before + CAST(round(secs * (stop - cur) / (e - s)) AS INTEGER)
+            FROM parts WHERE stop < e
+        )
+        SELECT eid, task,
+               CASE WHEN stop >= e THEN secs - before
+                    ELSE CAST(round(secs * (stop - cur) / (e - s)) AS INTEGER) END AS part,
+               date(cur) AS day,
+               strftime('%Y-%m', cur) AS month,
+               -- ISO week: the week's Thursday fixes the year.
+               date(cur, '-' || ((CAST(strftime('%w', cur) AS INTEGER) + 6) % 7) || ' days', '+3 days') AS thursday
+        FROM parts
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO time_rollups (period, bucket, task_id, seconds, sessions)
+        SELECT 'day', day, task, SUM(part), COUNT(DISTINCT eid) FROM rollup_parts GROUP BY day, task
+        UNION ALL
+        SELECT 'week', printf('%s-W%02d', strftime('%Y', thursday), (CAST(strftime('%j', thursday) AS INTEGER) - 1) / 7 + 1),
+               task, SUM(part), COUNT(DISTINCT eid)
+        FROM rollup_parts GROUP BY thursday, task
+        UNION ALL
+        SELECT 'month', month, task, SUM(part), COUNT(DISTINCT eid) FROM rollup_parts GROUP BY month, task
+        """
+    )
+    conn.execute("DROP TABLE rollup_parts")
+
+
+def _archive_tables(conn: sqlite3.Connection) -> None:
+    # Same columns as the hot tables (ids are kept) plus when the row moved.
+    conn.execute(
+        """
+        CREATE TABLE todos_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority TEXT,
+            category TEXT,
+            due_date TEXT,
+            completed INTEGER,
+            created_at TEXT,
+            updated_at TEXT,
+            priority_rank INTEGER,
+            due_epoch INTEGER,
+            archived_at TEXT DEFAULT (datetime('now'))
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE time_entries_archive (
+            id INTEGER PRIMARY KEY,
+            task_id INTEGER,
+            start_time TEXT,
+            end_time TEXT,
+            duration_seconds INTEGER,
+            notes TEXT,
+            created_at TEXT,
+            archived_at TEXT DEFAULT (datetime('now'))
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_time_entries_archive_task ON time_entries_archive(task_id)")
+    # Candidates for archival are found by age, not by scanning.
+    conn.execute("CREATE INDEX idx_todos_completed_updated ON todos(updated_at) WHERE completed = 1")
+    conn.execute("CREATE INDEX idx_time_entries_end ON time_entries(end_time)")
+    # Reports read hot and archived rows through these views.
+    conn.execute(
+        f"""
+        CREATE VIEW todos_all AS
+        SELECT {ARCHIVE_TODO_COLUMNS} FROM todos
+        UNION ALL SELECT {ARCHIVE_TODO_COLUMNS} FROM todos_archive
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE VIEW time_entries_all AS
+        SELECT {ARCHIVE_TIME_COLUMNS} FROM time_entries
+        UNION ALL SELECT {ARCHIVE_TIME_COLUMNS} FROM time_entries_archive
+        """
+    )
+
+
+def _import_checkpoints(conn: sqlite3.Connection) -> None:
+    # One row per in-progress import; written in the same transaction as each
+    # chunk so a resumed import never re-inserts committed rows.
+    conn.execute(
+        """
+        CREATE TABLE import_checkpoints (
+            source TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            records INTEGER NOT NULL DEFAULT 0,
+            inserted INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT (datetime('now'))
+        )
+        """
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "base schema", _base_schema),
+    Migration(2, "todos.priority_rank", _priority_rank),
+    Migration(3, "todo ordering indexes", _ordering_indexes),
+    Migration(4, "todos full-text index", _todos_fts),
+    Migration(5, "todos.due_epoch", _due_epoch),
+    Migration(6, "time_rollups", _time_rollups),
+    Migration(7, "archive tables", _archive_tables),
+    Migration(8, "import checkpoints", _import_checkpoints),
+]
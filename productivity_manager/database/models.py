@@ -1,24 +1,132 @@
-from dataclasses import dataclass
-from typing import Optional
-
-
-@dataclass
-class Todo:
-    id: Optional[int]
-    title: str
-    description: str = ""
-    priority: str = "Medium"  # High/Medium/Low
-    category: str = "General"
-    due_date: Optional[str] = None  # ISO string
-    completed: bool = False
-
-
-@dataclass
-class TimeEntry:
-    id: Optional[int]
-    task_id: Optional[int]
-    start_time: str  # ISO string
-    end_time: str  # ISO string
-    duration_seconds: int
-    notes: str = ""
+"""Slotted row objects built directly by a sqlite3 row factory.
 
+``__slots__`` keeps each row to a fixed-size object without a per-instance
+``__dict__``. Rows also answer ``row["field"]``, ``row.get`` and
+``dict(row)`` so code written against dict rows keeps working. Columns a
+query did not select are left unset and read as missing.
+"""
+import sqlite3
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+
+RowFactory = Callable[[sqlite3.Cursor, tuple], Any]
+
+
+class _Row:
+    __slots__: Tuple[str, ...] = ()
+
+    def __init__(self, **fields: Any):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self) -> List[str]:
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()  # type: ignore[attr-defined]
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def builder(cls, names: Sequence[str]) -> Callable[[tuple], Any]:
+        """Build ``cls`` instances from tuples whose leading values are ``names``.
+
+        Trailing values beyond ``names`` are ignored.
+        """
+        new = object.__new__
+        names = tuple(names)
+
+        def build(row: tuple) -> Any:
+            obj = new(cls)
+            for name, value in zip(names, row):
+                setattr(obj, name, value)
+            return obj
+
+        return build
+
+    @classmethod
+    def row_factory(cls) -> RowFactory:
+        """sqlite3 row factory producing ``cls`` instances."""
+        # (description, builder) of the last statement seen; swapped as one
+        # tuple so concurrent cursors never see a mismatched pair.
+        last: List[Tuple[Any, Callable[[tuple], Any]]] = [((), cls.builder(()))]
+
+        def factory(cursor: sqlite3.Cursor, row: tuple) -> Any:
+            desc = cursor.description
+            seen, build = last[0]
+            if desc is not seen:
+                build = cls.builder([d[0] for d in desc])
+                last[0] = (desc, build)
+            return build(row)
+
+        return factory
+
+
+class Todo(_Row):
+    __slots__ = (
+        "id", "title", "description", "priority", "category", "due_date",
+        "completed", "created_at", "updated_at", "priority_rank", "due_epoch",
+    )
+
+    def __init__(
+        self,
+        id: Optional[int] = None,
+        title: str = "",
+        description: str = "",
+        priority: str = "Medium",  # High/Medium/Low
+        category: str = "General",
+        due_date: Optional[str] = None,  # ISO string
+        completed: int = 0,
+        **extra: Any,
+    ):
+        super().__init__(
+            id=id, title=title, description=description, priority=priority,
+            category=category, due_date=due_date, completed=completed, **extra,
+        )
+
+
+class TimeEntry(_Row):
+    __slots__ = ("id", "task_id", "start_time", "end_time", "duration_seconds", "notes", "created_at")
+
+    def __init__(
+        self,
+        id: Optional[int] = None,
+        task_id: Optional[int] = None,
+        start_time: str = "",  # ISO string
+        end_time: str = "",  # ISO string
+        duration_seconds: int = 0,
+        notes: str = "",
+        **extra: Any,
+    ):
+        super().__init__(
+            id=id, task_id=task_id, start_time=start_time, end_time=end_time,
+            duration_seconds=duration_seconds, notes=notes, **extra,
+        )
+
+
+todo_row = Todo.row_factory()
+time_entry_row = TimeEntry.row_factory()
@@ -0,0 +1,113 @@
+"""Incremental day/week/month totals for time_entries.
+
+``time_rollups`` holds one row per (period, bucket, task_id). Each new time
+entry is split at local midnight and added to its buckets in the same
+transaction as the insert, so statistics read O(buckets) rows instead of
+scanning every entry.
+"""
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+PERIODS = ("day", "week", "month")
+NO_TASK = 0  # task_id stored for entries without a task (NULLs can't be keys)
+
+_UPSERT_SQL = """
+    INSERT INTO time_rollups (period, bucket, task_id, seconds, sessions)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(period, bucket, task_id) DO UPDATE SET
+        seconds = seconds + excluded.seconds,
+        sessions = sessions + excluded.sessions
+"""
+
+Key = Tuple[str, str, int]
+
+
+def bucket_keys(day: datetime) -> Tuple[str, str, str]:
+    """Day, ISO-week and month bucket labels for a local date."""
+    iso_year, iso_week, _ = day.isocalendar()
+    return day.strftime("%Y-%m-%d"), f"{iso_year}-W{iso_week:02d}", day.strftime("%Y-%m")
+
+
+def split_by_day(start: datetime, end: datetime, seconds: int) -> List[Tuple[datetime, int]]:
+    """Split a session at local midnights into (day, seconds) parts.
+
+    Parts are proportional to wall-clock overlap and always sum to
+    ``seconds`` (the stored duration can differ from end - start by the
+    sub-second truncation in Timer).
+    """
+    if end <= start:
+        return [(end, seconds)]
+    span = (end - start).total_seconds()
+    parts: List[Tuple[datetime, int]] = []
+    cursor = start
+    assigned = 0
+    while cursor < end:
+        midnight = datetime(cursor.year, cursor.month, cursor.day) + timedelta(days=1)
+        stop = min(midnight, end)
+        if stop >= end:
+            part = seconds - assigned
+        else:
+            part = int(round(seconds * (stop - cursor).total_seconds() / span))
+        parts.append((cursor, part))
+        assigned += part
+        cursor = stop
+    return parts
+
+
+def entry_deltas(task_id: Optional[int], start_iso: str, end_iso: str, seconds: int) -> Dict[Key, List[int]]:
+    """Rollup increments ``{(period, bucket, task): [seconds, sessions]}``."""
+    out: Dict[Key, List[int]] = {}
+    try:
+        start = datetime.fromisoformat(start_iso)
+        end = datetime.fromisoformat(end_iso)
+    except (TypeError, ValueError):
+        return out  # unparseable timestamps cannot be bucketed
+    task = task_id if task_id is not None else NO_TASK
+    for day, part in split_by_day(start, end, int(seconds or 0)):
+        for period, bucket in zip(PERIODS, bucket_keys(day)):
+            acc = out.setdefault((period, bucket, task), [0, 0])
+            acc[0] += part
+            acc[1] = 1  # a session counts once per bucket it touches
+    return out
+
+
+def apply_deltas(conn: sqlite3.Connection, deltas: Dict[Key, List[int]]) -> None:
+    """Add increments from entry_deltas/merge_deltas to the stored rollups."""
+    conn.executemany(_UPSERT_SQL, [(p, b, t, s, n) for (p, b, t), (s, n) in deltas.items()])
+
+
+def apply_entry(conn: sqlite3.Connection, task_id: Optional[int], start_iso: str, end_iso: str, seconds: int) -> None:
+    """Add one entry to the rollups; call inside the entry's transaction."""
+    apply_deltas(conn, entry_deltas(task_id, start_iso, end_iso, seconds))
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    """Recompute all rollups from time_entries; returns entries processed.
+
+    Archived sessions count too once the archive exists (migration 7).
+    """
+    has_archive = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'time_entries_all'"
+    ).fetchone()
+    source = "time_entries_all" if has_archive else "time_entries"
+    rows = conn.execute(f"SELECT task_id, start_time, end_time, duration_seconds FROM {source}").fetchall()
+    totals = merge_deltas(tuple(r) for r in rows)
+    conn.execute("DELETE FROM time_rollups")
+    conn.executemany(
+        "INSERT INTO time_rollups (period, bucket, task_id, seconds, sessions) VALUES (?, ?, ?, ?, ?)",
+        [(p, b, t, s, n) for (p, b, t), (s, n) in totals.items()],
+    )
+    return len(rows)
+
+
+def merge_deltas(entries: Iterable[Tuple[Optional[int], str, str, int]]) -> Dict[Key, List[int]]:
+    """Summed increments for many (task_id, start, end, seconds) entries (bulk imports)."""
+    totals: Dict[Key, List[int]] = {}
+    for task_id, start_iso, end_iso, seconds in entries:
+        for key, (s, n) in entry_deltas(task_id, start_iso, end_iso, seconds).items():
+            acc = totals.setdefault(key, [0, 0])
+            acc[0] += s
+            acc[1] += n
+    return totals
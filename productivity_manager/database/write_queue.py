@@ -0,0 +1,156 @@
+"""Single background writer thread for DBManager.
+
+Callers enqueue writes and get ``concurrent.futures.Future`` objects back; the
+writer drains the queue in batches and commits each batch as one
+transaction, so a burst of edits costs one fsync instead of many. Updates
+submitted with a key are coalesced while still queued: toggling the same
+todo five times before the writer wakes up runs one UPDATE.
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .db_manager import DBManager
+
+
+UpdateBuilder = Callable[[Dict[str, Any]], Tuple[str, Sequence[Any]]]
+
+
+class _Op:
+    __slots__ = ("run", "futures", "fields", "build")
+
+    def __init__(self, run=None, fields=None, build=None):
+        self.run = run  # callable(conn) -> result, for plain ops
+        self.futures: List[Future] = []
+        self.fields: Optional[Dict[str, Any]] = fields  # for coalesced updates
+        self.build: Optional[UpdateBuilder] = build
+
+
+class WriteQueue:
+    def __init__(self, db: DBManager, max_batch: int = 256):
+        self.db = db
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._ops: Deque[_Op] = deque()
+        self._mergeable: Dict[Hashable, _Op] = {}
+        self._inflight = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- submission -----
+    def submit(self, sql: str, params: Iterable = ()) -> Future:
+        """Queue one statement; the future resolves to ``lastrowid``/``rowcount``."""
+        params = tuple(params)
+
+        def run(conn):
+            cur = conn.execute(sql, params)
+            return SimpleNamespace(lastrowid=cur.lastrowid, rowcount=cur.rowcount)
+
+        return self.submit_call(run)
+
+    def submit_call(self, fn: Callable[[Any], Any]) -> Future:
+        """Queue ``fn(conn)`` to run on the writer thread inside the batch.
+
+        Use this for writes that must commit together (e.g. an insert plus
+        the aggregates it updates). Queued updates submitted before it are
+        no longer merged with later ones, preserving statement order.
+        """
+        op = _Op(run=fn)
+        with self._cond:
+            self._mergeable.clear()
+            return self._enqueue(op)
+
+    def submit_update(self, key: Hashable, fields: Mapping[str, Any], build: UpdateBuilder) -> Future:
+        """Queue an UPDATE of ``fields``, merged with a still-queued one for ``key``.
+
+        ``build(fields)`` returns the ``(sql, params)`` to run; it is called on
+        the writer thread with the merged field dict (later values win).
+        """
+        with self._cond:
+            op = self._mergeable.get(key)
+            if op is not None:
+                op.fields.update(fields)  # type: ignore[union-attr]
+                fut: Future = Future()
+                op.futures.append(fut)
+                return fut
+            op = _Op(fields=dict(fields), build=build)
+            self._mergeable[key] = op
+            return self._enqueue(op)
+
+    def _enqueue(self, op: _Op) -> Future:
+        # Caller holds self._cond.
+        if self._closed:
+            raise RuntimeError("WriteQueue is closed")
+        fut: Future = Future()
+        op.futures.append(fut)
+        self._ops.append(op)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="db-writer", daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+        return fut
+
+    # ----- synchronisation -----
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every write queued so far has been committed."""
+        if threading.current_thread() is self._thread:
+            return
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._ops and not self._inflight, timeout):
+                raise TimeoutError("WriteQueue.flush timed out")
+
+    def close(self) -> None:
+        """Commit what is queued and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    # ----- writer thread -----
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ops or self._closed)
+                if not self._ops:
+                    return  # closed and drained
+                batch = []
+                while self._ops and len(batch) < self.max_batch:
+                    batch.append(self._ops.popleft())
+                # Taken ops can no longer absorb later updates.
+                taken = {id(op) for op in batch}
+                self._mergeable = {k: op for k, op in self._mergeable.items() if id(op) not in taken}
+                self._inflight = len(batch)
+            results = self._commit(batch)
+            for op, (ok, value) in zip(batch, results):
+                for fut in op.futures:
+                    if ok:
+                        fut.set_result(value)
+                    else:
+                        fut.set_exception(value)
+            with self._cond:
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def _commit(self, batch: List[_Op]) -> List[Tuple[bool, Any]]:
+        results: List[Tuple[bool, Any]] = []
+        try:
+            with self.db.transaction() as conn:
+                for op in batch:
+                    try:
+                        # Savepoint per op: one bad write fails alone.
+                        with self.db.transaction():
+                            if op.build is not None:
+                                sql, params = op.build(op.fields)  # type: ignore[arg-type]
+                                cur = conn.execute(sql, tuple(params))
+                                value: Any = SimpleNamespace(lastrowid=cur.lastrowid, rowcount=cur.rowcount)
+                            else:
+                                value = op.run(conn)
+                        results.append((True, value))
+                    except Exception as e:
+                        results.append((False, e))
+        except Exception as e:  # commit itself failed: nothing in the batch stuck
+            return [(False, e)] * len(batch)
+        return results
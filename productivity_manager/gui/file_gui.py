@@ -1,14 +1,56 @@
 import os
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, filedialog
+from typing import Callable, Iterable, Optional, Sequence
+from tkinter import ttk, filedialog, messagebox
 from tkinter.scrolledtext import ScrolledText
 
-import threading
+from ..modules.file_organizer import (
+    DEFAULT_TIERS,
+    Cancelled,
+    ScanProgress,
+    ScanStats,
+    batch_rename,
+    iter_duplicates,
+    iter_organize,
+    plan_organize,
+    plan_rename,
+    rollback_rename,
+)
+from ..modules.dedupe import dedupe, rollback
+from ..modules.file_rules import Classifier
+from ..modules.folder_watcher import FolderWatcher
+from ..modules.hash_cache import HashCache
+from ..utils.async_tk import TkAsyncBridge
 
-from ..modules.file_organizer import organize_directory, find_duplicates, batch_rename
 
+# Output is appended in batches: at most this many lines every POLL_MS.
+POLL_MS = 100
+MAX_LINES_PER_POLL = 2000
+STAGE_LABELS = {
+    "scan": "검색",
+    "sample": "샘플 해시",
+    "hash": "전체 해시",
+    "organize": "정리",
+    "dedupe": "링크로 합치기",
+    "rollback": "되돌리기",
+    "rename": "이름변경",
+}
+SORT_LABELS = {"이름순": "name", "수정 시각순": "mtime", "크기순": "size"}
 
-def build_file_tab(parent):
+
+def build_file_tab(
+    parent,
+    bridge: TkAsyncBridge,
+    hash_cache_path: Optional[str] = None,
+    io_workers: Optional[int] = None,
+    duplicate_tiers: Optional[Sequence[str]] = None,
+    journal_dir: Optional[str] = None,
+    watch_settle_seconds: float = 2.0,
+    classifier: Optional[Classifier] = None,
+):
     frame = ttk.Frame(parent)
 
     top = ttk.Frame(frame)
@@ -17,30 +59,114 @@ def build_file_tab(parent):
     path_var = tk.StringVar(value=os.path.expanduser("~"))
     ttk.Entry(top, textvariable=path_var, width=80).pack(side=tk.LEFT, padx=4)
     ttk.Button(top, text="찾아보기", command=lambda: _choose_dir(path_var)).pack(side=tk.LEFT)
+    recursive_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(top, text="하위 폴더 포함", variable=recursive_var).pack(side=tk.LEFT, padx=4)
+    watch_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(top, text="자동 정리", variable=watch_var, command=lambda: _toggle_watch()).pack(
+        side=tk.LEFT, padx=4
+    )
 
     actions = ttk.Frame(frame)
     actions.pack(fill=tk.X, padx=8)
+    renames = ttk.Frame(frame)
+    renames.pack(fill=tk.X, padx=8, pady=(4, 0))
 
     output = ScrolledText(frame, height=20)
     output.pack(fill=tk.BOTH, expand=True, padx=8, pady=(8, 4))
 
-    prog = ttk.Progressbar(frame, mode="indeterminate")
-    prog.pack(fill=tk.X, padx=8, pady=(0, 8))
+    prog = ttk.Progressbar(frame, mode="determinate", maximum=100)
+    prog.pack(fill=tk.X, padx=8)
+    status = tk.StringVar(value="")
+    ttk.Label(frame, textvariable=status).pack(fill=tk.X, padx=8, pady=(0, 8))
+
+    # The running job's cancel event (None when idle: one job at a time) and
+    # the journals of the last dedupe and rename, for their rollbacks.
+    job = {"cancel": None, "journal": None, "rename_journal": None}
+
+    def journal_path(prefix: str) -> str:
+        # A fresh file per run; dedupe refuses to reuse one.
+        base = os.path.join(
+            journal_dir or os.path.dirname(hash_cache_path or "") or ".",
+            time.strftime(f"{prefix}-%Y%m%d-%H%M%S"),
+        )
+        path, n = f"{base}.jsonl", 1
+        while os.path.exists(path):
+            n += 1
+            path = f"{base}-{n}.jsonl"
+        return path
+
+    def run(produce, *args):
+        _busy_run(frame, output, prog, status, job, bridge, produce, *args)
+
+    def remember(key: str):
+        # Called from the worker once a journal holds something to undo;
+        # until then Undo keeps pointing at the previous run.
+        return lambda path: frame.after(0, job.__setitem__, key, path)
+
+    # Watch mode: new files in the folder are organized as they finish downloading.
+    watcher = {"w": None}
+
+    def _append(lines):
+        output.insert(tk.END, "\n".join(lines) + "\n")
+        output.see(tk.END)
+
+    def _stop_watch():
+        if watcher["w"] is not None:
+            watcher["w"].stop()
+            watcher["w"] = None
+            status.set("자동 정리 중지")
+
+    def _toggle_watch():
+        _stop_watch()
+        if not watch_var.get():
+            return
+        directory = path_var.get()
+        try:
+            w = FolderWatcher(
+                directory, lambda lines: frame.after(0, _append, lines), watch_settle_seconds, classifier=classifier
+            )
+        except OSError as e:
+            watch_var.set(False)
+            status.set(f"오류: {e}")
+            return
+        w.start()
+        watcher["w"] = w
+        status.set(f"자동 정리 중: {directory} ({w.backend})")
+
+    frame.bind("<Destroy>", lambda e: _stop_watch() if e.widget is frame else None)
 
+    ttk.Button(
+        actions,
+        text="미리보기",
+        command=lambda: run(_preview_organize, path_var.get(), recursive_var.get(), classifier),
+    ).pack(side=tk.LEFT, padx=4)
     ttk.Button(
         actions,
         text="정리",
-        command=lambda: _busy_run(frame, output, prog, organize_directory, path_var.get()),
+        command=lambda: run(_organize, path_var.get(), recursive_var.get(), classifier),
     ).pack(side=tk.LEFT, padx=4)
     ttk.Button(
         actions,
         text="중복 찾기",
-        command=lambda: _busy_run(frame, output, prog, _list_duplicates, path_var.get()),
+        command=lambda: run(_list_duplicates, path_var.get(), hash_cache_path, io_workers, duplicate_tiers),
+    ).pack(side=tk.LEFT, padx=4)
+
+    def run_dedupe():
+        if not messagebox.askyesno("중복 합치기", "중복 파일을 하드 링크/리플링크로 바꿀까요? (되돌리기 가능)"):
+            return
+        run(_dedupe_duplicates, path_var.get(), hash_cache_path, io_workers, duplicate_tiers,
+            journal_path("dedupe"), remember("journal"))
+
+    ttk.Button(actions, text="중복 합치기", command=run_dedupe).pack(side=tk.LEFT, padx=4)
+    ttk.Button(
+        actions,
+        text="합치기 되돌리기",
+        command=lambda: job["journal"] and run(_rollback, job["journal"]),
     ).pack(side=tk.LEFT, padx=4)
     ttk.Button(
         actions,
-        text="일괄 이름변경",
-        command=lambda: _busy_run(frame, output, prog, _batch_rename, path_var.get()),
+        text="취소",
+        command=lambda: job["cancel"] is not None and job["cancel"].set(),
     ).pack(side=tk.LEFT, padx=4)
     ttk.Button(
         actions,
@@ -48,6 +174,34 @@ def build_file_tab(parent):
         command=lambda: output.delete("1.0", tk.END),
     ).pack(side=tk.LEFT, padx=4)
 
+    # Batch rename: a str.format pattern for the new stem, numbered in sort order.
+    pattern_var = tk.StringVar(value="file_{index}")
+    sort_var = tk.StringVar(value=next(iter(SORT_LABELS)))
+    ttk.Label(renames, text="이름 형식").pack(side=tk.LEFT, padx=4)
+    ttk.Entry(renames, textvariable=pattern_var, width=30).pack(side=tk.LEFT, padx=4)
+    ttk.Combobox(renames, textvariable=sort_var, values=list(SORT_LABELS), state="readonly", width=10).pack(
+        side=tk.LEFT, padx=4
+    )
+    ttk.Label(renames, text="{index} {counter} {stem} {date} {mtime:%Y%m%d}").pack(side=tk.LEFT, padx=4)
+
+    def rename_args():
+        return path_var.get(), pattern_var.get(), SORT_LABELS[sort_var.get()]
+
+    def run_rename():
+        run(_batch_rename, *rename_args(), journal_path("rename"), remember("rename_journal"))
+
+    ttk.Button(
+        renames,
+        text="이름변경 미리보기",
+        command=lambda: run(_preview_rename, *rename_args()),
+    ).pack(side=tk.LEFT, padx=4)
+    ttk.Button(renames, text="일괄 이름변경", command=run_rename).pack(side=tk.LEFT, padx=4)
+    ttk.Button(
+        renames,
+        text="이름변경 되돌리기",
+        command=lambda: job["rename_journal"] and run(_rollback_rename, job["rename_journal"]),
+    ).pack(side=tk.LEFT, padx=4)
+
     return frame
 
 
@@ -57,52 +211,208 @@ def _choose_dir(path_var):
         path_var.set(p)
 
 
-def _busy_run(root: tk.Misc, output: ScrolledText, prog: ttk.Progressbar, func, *args):
-    """Run potentially long operation in a background thread and update UI when done."""
+def _describe(p: ScanProgress) -> str:
+    text = f"{STAGE_LABELS.get(p.stage, p.stage)}: {p.files_done:,}"
+    if p.files_total:
+        text += f"/{p.files_total:,}"
+    text += " 파일"
+    if p.bytes_total or p.bytes_done:
+        text += f", {p.bytes_done / 1e6:,.1f}"
+        if p.bytes_total:
+            text += f"/{p.bytes_total / 1e6:,.1f}"
+        text += " MB"
+    if p.eta is not None:
+        text += f", 남은 시간 {p.eta:,.0f}초"
+    return text
+
+
+def _busy_run(
+    root: tk.Misc,
+    output: ScrolledText,
+    prog: ttk.Progressbar,
+    status: tk.StringVar,
+    job: dict,
+    bridge: TkAsyncBridge,
+    produce: Callable[..., Iterable[str]],
+    *args,
+):
+    """Run ``produce(*args, progress=..., cancel=...)`` off the Tk thread.
+
+    The worker only fills a queue and records the latest progress; the Tk
+    side polls every POLL_MS and appends what arrived in one insert, so a
+    large result never floods the event loop.
+    """
+    if job["cancel"] is not None:
+        return
     output.delete("1.0", tk.END)
-    prog.start(10)
-    root.update_idletasks()
+    lines: "queue.Queue[str]" = queue.Queue()
+    latest = {"progress": None}
+    cancel = job["cancel"] = threading.Event()
 
-    def _worker():
-        try:
-            result = func(*args)
-            err = None
-        except Exception as e:  # pragma: no cover - UI path
-            result = None
-            err = e
+    def work():
+        for line in produce(*args, progress=lambda p: latest.__setitem__("progress", p), cancel=cancel):
+            lines.put(str(line))
 
-        def _done():
-            try:
-                if err is not None:
-                    output.insert(tk.END, f"오류: {err}\n")
-                else:
-                    if isinstance(result, list):
-                        for line in result:
-                            output.insert(tk.END, str(line) + "\n")
-                    elif result is not None:
-                        output.insert(tk.END, str(result) + "\n")
-            finally:
+    def show(p: Optional[ScanProgress]):
+        fraction = p.fraction if p is not None else None
+        if fraction is None:
+            if str(prog["mode"]) != "indeterminate":
+                prog.configure(mode="indeterminate")
+                prog.start(10)
+        else:
+            if str(prog["mode"]) != "determinate":
                 prog.stop()
+                prog.configure(mode="determinate")
+            prog["value"] = fraction * 100
+        if p is not None:
+            status.set(_describe(p))
+
+    def drain():
+        batch = []
+        while len(batch) < MAX_LINES_PER_POLL:
+            try:
+                batch.append(lines.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            output.insert(tk.END, "\n".join(batch) + "\n")
+            output.see(tk.END)
+        show(latest["progress"])
+        if not fut.done() or not lines.empty():
+            root.after(POLL_MS, drain)
+            return
+        job["cancel"] = None
+        prog.stop()
+        prog.configure(mode="determinate")
+        err = fut.exception()
+        if isinstance(err, Cancelled):
+            status.set("취소됨")
+        elif err is not None:  # pragma: no cover - UI path
+            output.insert(tk.END, f"오류: {err}\n")
+            status.set("")
+        else:
+            prog["value"] = 100
+
+    show(None)
+    fut = bridge.submit(bridge.run_blocking(work))
+    root.after(POLL_MS, drain)
+
+
+def _organize(directory: str, recursive: bool, classifier: Optional[Classifier], progress=None, cancel=None):
+    return iter_organize(directory, progress, cancel, recursive=recursive, classifier=classifier)
+
+
+def _preview_organize(directory: str, recursive: bool, classifier: Optional[Classifier], progress=None, cancel=None):
+    """Dry run: the planned moves, nothing touched."""
+    if not os.path.isdir(directory):
+        return [f"Directory not found: {directory}"]
+    lines = plan_organize(directory, recursive, classifier=classifier).preview()
+    return lines or ["정리할 파일이 없습니다."]
+
+
+def _list_duplicates(
+    directory: str,
+    hash_cache_path: Optional[str] = None,
+    io_workers: Optional[int] = None,
+    tiers: Optional[Sequence[str]] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+):
+    """Yield lines describing duplicates as they are found, then the scan stats."""
+    stats = ScanStats()
+    tiers = tiers or DEFAULT_TIERS
+    found = 0
+    cache = HashCache(hash_cache_path) if hash_cache_path else None
+    try:
+        for h, paths in iter_duplicates(directory, cache, io_workers, tiers=tiers, stats=stats,
+                                        progress=progress, cancel=cancel):
+            found += 1
+            algo, _, hexdigest = h.partition(":")
+            yield f"해시 {algo} {hexdigest[:10]}..."
+            for p in paths:
+                yield f"  - {p}"
+    finally:
+        if cache is not None:
+            cache.close()
+    if not found:
+        yield "중복 파일이 없습니다."
+    yield from stats.summary()
+
+
+def _dedupe_duplicates(
+    directory: str,
+    hash_cache_path: Optional[str],
+    io_workers: Optional[int],
+    tiers: Optional[Sequence[str]],
+    journal_path: str,
+    journaled: Callable[[str], None],
+    progress=None,
+    cancel=None,
+):
+    """Find duplicates, then link them; yields a summary.
+
+    ``journaled(journal_path)`` is called once the journal holds a link,
+    even if the run is cancelled partway.
+    """
+    cache = HashCache(hash_cache_path) if hash_cache_path else None
+    try:
+        groups = list(iter_duplicates(directory, cache, io_workers, tiers=tiers or DEFAULT_TIERS,
+                                      progress=progress, cancel=cancel, with_keys=True))
+    finally:
+        if cache is not None:
+            cache.close()
+    try:
+        result = dedupe(groups, journal_path, progress=progress, cancel=cancel)
+    finally:
+        if os.path.exists(journal_path) and os.path.getsize(journal_path):
+            journaled(journal_path)
+    yield f"링크로 바꾼 파일: {result.linked}, 확보한 공간: {result.bytes_reclaimed / 1e6:,.1f} MB"
+    for line in result.skipped:
+        yield f"  건너뜀: {line}"
+    yield f"저널: {result.journal}"
+
+
+def _rollback(journal_path: str, progress=None, cancel=None):
+    if not os.path.exists(journal_path):
+        return ["되돌릴 작업이 없습니다."]
+    return rollback(journal_path, progress, cancel)
+
 
-        root.after(0, _done)
+def _preview_rename(directory: str, pattern: str, sort: str, progress=None, cancel=None):
+    if not os.path.isdir(directory):
+        return [f"Directory not found: {directory}"]
+    try:
+        lines = plan_rename(directory, pattern, sort).preview()
+    except ValueError as e:
+        return [f"오류: {e}"]
+    return lines or ["바꿀 이름이 없습니다."]
 
-    t = threading.Thread(target=_worker, daemon=True)
-    t.start()
 
+def _batch_rename(
+    directory: str,
+    pattern: str,
+    sort: str,
+    journal_path: str,
+    journaled: Callable[[str], None],
+    progress=None,
+    cancel=None,
+):
+    """Rename all or nothing; a failed run leaves the folder as it was.
 
-def _list_duplicates(directory: str):
-    """Return lines describing duplicates rather than touching UI directly."""
-    lines = []
-    dups = find_duplicates(directory)
-    if not dups:
-        lines.append("중복 파일이 없습니다.")
-        return lines
-    for h, paths in dups:
-        lines.append(f"해시 {h[:10]}...")
-        for p in paths:
-            lines.append(f"  - {p}")
+    ``journaled(journal_path)`` is called only after a run that renamed something.
+    """
+    if not os.path.isdir(directory):
+        return [f"Directory not found: {directory}"]
+    try:
+        lines = batch_rename(directory, pattern, sort, journal_path=journal_path, progress=progress, cancel=cancel)
+    except (ValueError, OSError) as e:
+        return [f"오류: {e}"]
+    if lines:
+        journaled(journal_path)
     return lines
 
 
-def _batch_rename(directory: str):
-    return batch_rename(directory)
+def _rollback_rename(journal_path: str, progress=None, cancel=None):
+    if not os.path.exists(journal_path):
+        return ["되돌릴 작업이 없습니다."]
+    return rollback_rename(journal_path, progress, cancel)
@@ -1,11 +1,20 @@
 import os
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
+from tkinter.scrolledtext import ScrolledText
 
 from ..database.db_manager import DBManager
+from ..database.write_queue import WriteQueue
+from ..modules.due_alerts import DueAlertScheduler
+from ..modules.file_rules import Classifier, classifier_from_config
+from ..modules.housekeeping import run_maintenance, settings_from
 from ..modules.todo_manager import TodoManager
 from ..modules.time_tracker import Timer
+from ..utils.async_tk import TkAsyncBridge
 from ..utils.config import load_config, save_config
+from ..utils.constants import HASH_CACHE_NAME
 from .theme import apply_theme
 
 from .todo_gui import build_todo_tab
@@ -30,7 +39,7 @@ def run_app(base_dir: str, db: DBManager) -> None:
     apply_theme(root, ui_mode)
 
     # Menubar and theme toggle
-    _setup_menubar(root, cfg, base_dir)
+    _setup_menubar(root, cfg, base_dir, db)
 
     # Main content
     notebook = ttk.Notebook(root)
@@ -41,16 +50,91 @@ def run_app(base_dir: str, db: DBManager) -> None:
     status_bar = ttk.Label(root, textvariable=status_var, anchor="w")
     status_bar.pack(fill=tk.X, side=tk.BOTTOM)
 
-    # Managers
-    todo_manager = TodoManager(db)
-    timer = Timer(db)
+    # Managers; writes go through one background writer so a slow disk
+    # never blocks the Tk loop.
+    writer = WriteQueue(db)
+    todo_manager = TodoManager(db, writer)
+    timer = Timer(db, writer=writer)
+    # Shared asyncio loop for background work (scrapers, file scans).
+    bridge = TkAsyncBridge(root)
+
+    # Due-date alerts, raised on the Tk thread.
+    def _alert(todo):
+        root.after(0, lambda: messagebox.showwarning(
+            "마감 임박", f"'{todo.title}' 작업의 마감이 다가옵니다.\n마감: {todo.due_date or ''}"
+        ))
+
+    alerts = DueAlertScheduler(
+        todo_manager,
+        _alert,
+        lead_minutes=cfg.get("notifications", {}).get("todo_due_alert_minutes", 60),
+    )
+    alerts.start()
+
+    # Archival and ANALYZE/vacuum on the bridge's pool: shortly after start-up,
+    # then every interval_hours.
+    upkeep = settings_from(cfg)
+    # "thread": ident of the pool thread running a pass, so closing can
+    # interrupt it; upkeep_lock is held for the whole pass.
+    upkeep_job = {"id": None, "thread": None, "closing": False}
+    upkeep_lock = threading.Lock()
+
+    def _maintain():
+        with upkeep_lock:
+            if upkeep_job["closing"]:
+                return None
+            upkeep_job["thread"] = threading.get_ident()
+            try:
+                return run_maintenance(todo_manager, upkeep)
+            finally:
+                upkeep_job["thread"] = None
+
+    def _stop_upkeep(timeout: float = 30.0):
+        """Abort a running pass (VACUUM/ANALYZE included) before the DB closes under it."""
+        upkeep_job["closing"] = True
+        deadline = time.monotonic() + timeout
+        # Interrupt aborts one statement; repeat until the pass gives up.
+        while not upkeep_lock.acquire(timeout=0.1):
+            ident = upkeep_job["thread"]
+            if ident is not None:
+                db.interrupt(ident)
+            if time.monotonic() > deadline:
+                return
+        upkeep_lock.release()
+
+    def _upkeep_done(result):
+        if result is None:
+            return
+        status_var.set(
+            f"DB 정리 완료: 할 일 {result['todos_archived']}개, 시간 기록 {result['time_entries_archived']}개 보관"
+        )
+
+    def _run_upkeep():
+        bridge.submit(
+            bridge.run_blocking(_maintain),
+            on_done=_upkeep_done,
+            on_error=lambda e: status_var.set(f"DB 정리 실패: {e}"),
+        )
+        upkeep_job["id"] = root.after(int(float(upkeep["interval_hours"]) * 3600 * 1000), _run_upkeep)
+
+    upkeep_job["id"] = root.after(60 * 1000, _run_upkeep)
 
     # Tabs
+    file_cfg = cfg.get("file_organizer", {})
     tabs = {
         "할 일": build_todo_tab(notebook, todo_manager),
         "타이머": build_timer_tab(notebook, timer, todo_manager),
-        "파일": build_file_tab(notebook),
-        "스크레이퍼": build_scraper_tab(notebook, base_dir),
+        "파일": build_file_tab(
+            notebook,
+            bridge,
+            hash_cache_path=os.path.join(base_dir, "data", HASH_CACHE_NAME),
+            io_workers=file_cfg.get("io_workers") or None,
+            duplicate_tiers=file_cfg.get("duplicate_tiers"),
+            journal_dir=os.path.join(base_dir, "data"),
+            watch_settle_seconds=float(file_cfg.get("watch_settle_seconds", 2.0)),
+            classifier=_file_classifier(cfg),
+        ),
+        "스크레이퍼": build_scraper_tab(notebook, base_dir, bridge),
         "모니터": build_monitor_tab(notebook),
     }
 
@@ -75,6 +159,13 @@ def run_app(base_dir: str, db: DBManager) -> None:
             save_config(base_dir, cfg)
         except Exception:
             pass
+        if upkeep_job["id"] is not None:
+            root.after_cancel(upkeep_job["id"])
+        _stop_upkeep()
+        alerts.stop()
+        bridge.close()
+        writer.close()
+        db.close()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_close)
@@ -82,7 +173,16 @@ def run_app(base_dir: str, db: DBManager) -> None:
     root.mainloop()
 
 
-def _setup_menubar(root: tk.Misc, cfg: dict, base_dir: str) -> None:
+def _file_classifier(cfg: dict) -> Classifier:
+    """Organizer rules from the config; a bad rule falls back to the defaults."""
+    try:
+        return classifier_from_config(cfg.get("file_organizer", {}))
+    except (TypeError, ValueError) as e:
+        messagebox.showwarning("파일 규칙", f"파일 정리 규칙을 무시합니다: {e}")
+        return Classifier()
+
+
+def _setup_menubar(root: tk.Misc, cfg: dict, base_dir: str, db: DBManager) -> None:
     menubar = tk.Menu(root)
 
     file_menu = tk.Menu(menubar, tearoff=False)
@@ -109,6 +209,23 @@ def _setup_menubar(root: tk.Misc, cfg: dict, base_dir: str) -> None:
             "개인 생산성 관리자\nTkinter로 만든 간단하고 직관적인 UI.",
         ),
     )
+    help_menu.add_command(label="쿼리 통계", command=lambda: _show_query_stats(root, db))
     menubar.add_cascade(label="도움말", menu=help_menu)
 
     root.configure(menu=menubar)
+
+
+def _show_query_stats(root: tk.Misc, db: DBManager) -> None:
+    if db.stats is None:
+        messagebox.showinfo("쿼리 통계", "설정에서 database.query_stats 를 켜면 쿼리 통계가 수집됩니다.")
+        return
+    win = tk.Toplevel(root)
+    win.title("쿼리 통계")
+    text = ScrolledText(win, width=140, height=30, wrap="none")
+    text.pack(fill=tk.BOTH, expand=True)
+    text.insert(tk.END, db.stats.report())
+    slow = db.stats.slow_queries()
+    if slow:
+        text.insert(tk.END, "\n\nSlow queries:\n")
+        for q in slow[-50:]:
+            text.insert(tk.END, f"  {q.ms:8.1f} ms  {q.sql[:120]}\n")
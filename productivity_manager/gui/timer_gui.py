@@ -5,6 +5,9 @@ from ..modules.time_tracker import Timer
 from ..modules.todo_manager import TodoManager
 
 
+PICKER_LIMIT = 500
+
+
 def build_timer_tab(parent, timer: Timer, todo_manager: TodoManager):
     frame = ttk.Frame(parent)
 
@@ -12,12 +15,37 @@ def build_timer_tab(parent, timer: Timer, todo_manager: TodoManager):
     top.pack(fill=tk.X, padx=8, pady=8)
 
     ttk.Label(top, text="작업:").pack(side=tk.LEFT)
-    tasks = todo_manager.list_todos()
-    task_choices = [f"{t['id']}: {t['title']}" for t in tasks]
+
+    def _task_choices():
+        # Only the fields the picker shows, open tasks first page only.
+        tasks, _ = todo_manager.list_todos_page(
+            PICKER_LIMIT, include_completed=False, columns=("id", "title"), as_tuples=True
+        )
+        return [f"{tid}: {title}" for tid, title in tasks]
+
+    task_choices = _task_choices()
     selected = tk.StringVar(value=task_choices[0] if task_choices else "")
     cb = ttk.Combobox(top, values=task_choices, textvariable=selected, width=60, state="readonly")
     cb.pack(side=tk.LEFT, padx=6)
 
+    # Keep the picker in step with todo edits; a burst of events reloads once.
+    reload_pending = {"flag": False}
+
+    def _reload_choices():
+        reload_pending["flag"] = False
+        choices = _task_choices()
+        cb.configure(values=choices)
+        if selected.get() not in choices:
+            selected.set(choices[0] if choices else "")
+
+    def _on_todos_changed(_action, _ids):
+        if not reload_pending["flag"]:
+            reload_pending["flag"] = True
+            frame.after(0, _reload_choices)
+
+    unsubscribe = todo_manager.subscribe(_on_todos_changed)
+    frame.bind("<Destroy>", lambda e: unsubscribe() if e.widget is frame else None)
+
     elapsed_var = tk.StringVar(value="00:00:00")
     lbl_elapsed = ttk.Label(top, textvariable=elapsed_var)
     lbl_elapsed.pack(side=tk.RIGHT)
@@ -55,9 +83,17 @@ def build_timer_tab(parent, timer: Timer, todo_manager: TodoManager):
         update_elapsed()
 
     def on_stop():
-        entry_id = timer.stop()
+        fut = timer.stop_async()
         running["flag"] = False
-        messagebox.showinfo("시간 저장됨", f"시간 기록 #{entry_id} 저장 완료")
+
+        def _saved(f):
+            if f.exception() is not None:
+                messagebox.showerror("시간 저장 실패", str(f.exception()))
+            else:
+                messagebox.showinfo("시간 저장됨", f"시간 기록 #{f.result()} 저장 완료")
+
+        # Resolved on the writer thread; report back on the Tk thread.
+        fut.add_done_callback(lambda f: frame.after(0, _saved, f))
 
     def on_reset():
         timer.reset()
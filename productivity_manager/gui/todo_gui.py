@@ -1,8 +1,14 @@
+import bisect
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from typing import Optional, List, Dict
 
-from modules.todo_manager import TodoManager
+from modules.todo_manager import TodoManager, cursor_sort_key, sort_key
+
+
+SEARCH_DEBOUNCE_MS = 120
+SEARCH_LIMIT = 500
+PAGE_SIZE = 200
 
 
 def build_todo_tab(parent, todo_manager: TodoManager):
@@ -44,6 +50,8 @@ def build_todo_tab(parent, todo_manager: TodoManager):
 
     # Treeview for tasks
     columns = ("id", "title", "priority", "category", "due_date", "completed")
+    # Pages also fetch created_at: sort_key needs it to place patched rows.
+    page_columns = columns + ("created_at",)
     tree = ttk.Treeview(frame, columns=columns, show='headings', selectmode='browse')
 
     headings = {
@@ -61,14 +69,21 @@ def build_todo_tab(parent, todo_manager: TodoManager):
     tree.column("id", width=60, anchor=tk.E)
 
     vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=vsb.set)
     tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(8, 0), pady=(0, 8))
     vsb.pack(side=tk.LEFT, fill=tk.Y, pady=(0, 8))
 
     sort_state: Dict[str, bool] = {}
+    # Column the loaded rows are sorted by (None: list order), re-applied
+    # after patches and new pages since bisect only works in list order.
+    column_sort = {"col": None, "reverse": False}
 
     def _sort_by(col: str):
         reverse = sort_state.get(col, False)
+        _apply_column_sort(col, reverse)
+        sort_state[col] = not reverse
+
+    def _apply_column_sort(col: str, reverse: bool):
+        column_sort.update(col=col, reverse=reverse)
         data = []
         for iid in tree.get_children(""):
             vals = tree.item(iid, "values")
@@ -90,7 +105,6 @@ def build_todo_tab(parent, todo_manager: TodoManager):
         data.sort(key=keyfunc, reverse=reverse)
         for index, (iid, _vals) in enumerate(data):
             tree.move(iid, "", index)
-        sort_state[col] = not reverse
 
     for col in columns:
         tree.heading(col, text=headings[col], command=lambda c=col: _sort_by(c))
@@ -100,74 +114,157 @@ def build_todo_tab(parent, todo_manager: TodoManager):
     tree.tag_configure("odd", background="")
     tree.tag_configure("even", background="")
 
-    def _categories_from(rows: List[dict]) -> List[str]:
-        cats = sorted({(r.get("category") or "General") for r in rows})
-        return ["전체"] + cats
+    pri_map = {"높음": "High", "보통": "Medium", "낮음": "Low"}
+    paging = {"after": None, "filters": {}, "query": ""}
+    # Tree items use the todo id as iid; their list-order keys let single
+    # rows be re-inserted in place when a change event arrives.
+    row_keys: Dict[str, tuple] = {}
+
+    def _insert_row(row, index):
+        done = bool(row.completed)
+        tags = []
+        if done:
+            tags.append("completed")
+        tags.append("even" if index % 2 == 0 else "odd")
+        iid = str(row.id)
+        tree.insert(
+            '',
+            index,
+            iid=iid,
+            values=(
+                row.id,
+                row.title,
+                row.priority or '',
+                row.category or 'General',
+                row.due_date or '',
+                '완료' if done else ''
+            ),
+            tags=tuple(tags),
+        )
+        row_keys[iid] = sort_key(row)
+
+    def _insert_rows(rows):
+        start = len(tree.get_children(""))
+        for idx, row in enumerate(rows, start=start):
+            _insert_row(row, idx)
+
+    def _matches(todo) -> bool:
+        f = paging["filters"]
+        if not f.get("include_completed", True) and todo.completed:
+            return False
+        if f.get("category") and todo.category != f["category"]:
+            return False
+        if f.get("priority") and todo.priority != f["priority"]:
+            return False
+        return True
+
+    def _patch(action, ids):
+        """Apply one change event to the loaded rows only."""
+        if paging["query"] or len(ids) > PAGE_SIZE:
+            # Search ranking can't be patched locally; bulk edits reload.
+            refresh()
+            return
+        selected = tree.selection()
+        for tid in ids:
+            iid = str(tid)
+            if tree.exists(iid):
+                tree.delete(iid)
+                row_keys.pop(iid, None)
+            if action == "deleted":
+                continue
+            todo = todo_manager.get_todo(tid)
+            if todo is None or not _matches(todo):
+                continue
+            key = sort_key(todo)
+            # Rows past the last loaded one come with a later page (keyset
+            # pages resume strictly after it, so it is never fetched twice).
+            if paging["after"] is not None and key > cursor_sort_key(paging["after"]):
+                continue
+            children = tree.get_children("")
+            if column_sort["col"] is not None:
+                _insert_row(todo, len(children))  # placed by the re-sort below
+                continue
+            _insert_row(todo, bisect.bisect_left([row_keys[c] for c in children], key))
+        if column_sort["col"] is not None:
+            _apply_column_sort(column_sort["col"], column_sort["reverse"])
+        keep = [iid for iid in selected if tree.exists(iid)]
+        if keep:
+            tree.selection_set(keep)
+        if action != "deleted":
+            cb_cat.configure(values=["전체"] + todo_manager.categories())
+
+    def _on_change(action, ids):
+        # Writers may run off the Tk thread; patch on it.
+        frame.after(0, _patch, action, list(ids))
+
+    unsubscribe = todo_manager.subscribe(_on_change)
+    frame.bind("<Destroy>", lambda e: unsubscribe() if e.widget is frame else None)
+
+    def _load_more():
+        if paging["after"] is None:
+            return
+        rows, paging["after"] = todo_manager.list_todos_page(
+            PAGE_SIZE, paging["after"], columns=page_columns, **paging["filters"]
+        )
+        _insert_rows(rows)
+        if column_sort["col"] is not None:
+            _apply_column_sort(column_sort["col"], column_sort["reverse"])
+
+    def _on_scroll(first, last):
+        vsb.set(first, last)
+        # Near the bottom: append the next page.
+        if float(last) >= 0.95 and paging["after"] is not None:
+            frame.after_idle(_load_more)
+
+    tree.configure(yscrollcommand=_on_scroll)
 
     def refresh():
         # Preserve selection id
         current_sel = _selected_id(tree)
-        for i in tree.get_children(""):
-            tree.delete(i)
-        rows = todo_manager.list_todos()
-        # Update category choices
-        cb_cat.configure(values=_categories_from(rows))
+        tree.delete(*tree.get_children(""))
+        row_keys.clear()
+        column_sort["col"] = None  # reloaded in list order
+        # Update category choices (DISTINCT over the category index)
+        cb_cat.configure(values=["전체"] + todo_manager.categories())
 
-        q = (search_var.get() or "").strip().lower()
+        q = (search_var.get() or "").strip()
         pri_display = priority_var.get()
         cat = category_var.get()
-        show = show_completed.get()
-
-        def _match(row):
-            if q:
-                if q not in (row.get('title') or '').lower() and q not in (row.get('description') or '').lower():
-                    return False
-            if pri_display and pri_display != "전체":
-                pri_map = {"높음": "high", "보통": "medium", "낮음": "low"}
-                pri_canon = pri_map.get(pri_display, pri_display).lower()
-                if (row.get('priority') or "").lower() != pri_canon:
-                    return False
-            if cat and cat != "전체" and (row.get('category') or "General") != cat:
-                return False
-            if not show and row.get('completed'):
-                return False
-            return True
-
-        filtered = [r for r in rows if _match(r)]
-        for idx, row in enumerate(filtered):
-            done = bool(row.get('completed'))
-            tags = []
-            if done:
-                tags.append("completed")
-            tags.append("even" if idx % 2 == 0 else "odd")
-            tree.insert(
-                '',
-                tk.END,
-                values=(
-                    row['id'],
-                    row['title'],
-                    row.get('priority') or '',
-                    row.get('category') or 'General',
-                    row.get('due_date') or '',
-                    '완료' if done else ''
-                ),
-                tags=tuple(tags),
-            )
+        filters = {
+            "include_completed": show_completed.get(),
+            "category": cat if cat and cat != "전체" else None,
+            "priority": pri_map.get(pri_display) if pri_display and pri_display != "전체" else None,
+        }
+        # Filtering happens in SQL; text queries go through the FTS index.
+        # Plain lists are fetched a page at a time as the user scrolls.
+        paging["filters"] = filters
+        paging["query"] = q
+        if q:
+            paging["after"] = None
+            _insert_rows(todo_manager.search(q, filters, limit=SEARCH_LIMIT))
+        else:
+            rows, paging["after"] = todo_manager.list_todos_page(PAGE_SIZE, columns=page_columns, **filters)
+            _insert_rows(rows)
 
         # Restore selection if possible
-        if current_sel is not None:
-            for iid in tree.get_children(""):
-                vals = tree.item(iid, 'values')
-                try:
-                    if int(vals[0]) == current_sel:
-                        tree.selection_set(iid)
-                        tree.see(iid)
-                        break
-                except Exception:
-                    pass
+        if current_sel is not None and tree.exists(str(current_sel)):
+            tree.selection_set(str(current_sel))
+            tree.see(str(current_sel))
 
-    # Filter events
-    ent.bind("<KeyRelease>", lambda e: refresh())
+    # Filter events; typing is debounced so a burst of keys runs one search.
+    pending = {"job": None}
+
+    def _schedule_refresh(_event=None):
+        if pending["job"] is not None:
+            frame.after_cancel(pending["job"])
+
+        def _run():
+            pending["job"] = None
+            refresh()
+
+        pending["job"] = frame.after(SEARCH_DEBOUNCE_MS, _run)
+
+    ent.bind("<KeyRelease>", _schedule_refresh)
     cb_pri.bind("<<ComboboxSelected>>", lambda e: refresh())
     cb_cat.bind("<<ComboboxSelected>>", lambda e: refresh())
 
@@ -198,8 +295,20 @@ def _add_task(root, todo_manager: TodoManager, tree: ttk.Treeview):
     category = simpledialog.askstring("새 작업", "카테고리:", parent=root) or "General"
     due_date = simpledialog.askstring("새 작업", "마감일 (YYYY-MM-DD) 또는 공란:", parent=root) or None
     pri_norm = {"높음": "High", "보통": "Medium", "낮음": "Low"}.get(priority, priority)
-    todo_manager.add_todo(title, description, pri_norm, category, due_date)
-    root.refresh()  # type: ignore
+    # The insert commits on the writer thread; select the new row once it has.
+    fut = todo_manager.add_todo_async(title, description, pri_norm, category, due_date)
+    fut.add_done_callback(lambda f: root.after(0, _select_added, root, tree, f))
+
+
+def _select_added(root, tree: ttk.Treeview, fut):
+    err = fut.exception()
+    if err is not None:
+        messagebox.showerror("새 작업", f"작업을 추가하지 못했습니다: {err}", parent=root)
+        return
+    iid = str(fut.result())
+    if tree.exists(iid):  # the change event has already patched it in
+        tree.selection_set(iid)
+        tree.see(iid)
 
 
 def _edit_task(root, todo_manager: TodoManager, tree: ttk.Treeview):
@@ -210,16 +319,15 @@ def _edit_task(root, todo_manager: TodoManager, tree: ttk.Treeview):
     todo = todo_manager.get_todo(tid)
     if not todo:
         return
-    title = simpledialog.askstring("작업 수정", "제목:", initialvalue=todo['title'], parent=root)
+    title = simpledialog.askstring("작업 수정", "제목:", initialvalue=todo.title, parent=root)
     if not title:
         return
-    description = simpledialog.askstring("작업 수정", "설명:", initialvalue=todo.get('description',''), parent=root) or ""
-    priority = simpledialog.askstring("작업 수정", "우선순위 (높음/보통/낮음):", initialvalue=todo.get('priority','Medium'), parent=root) or "Medium"
-    category = simpledialog.askstring("작업 수정", "카테고리:", initialvalue=todo.get('category','General'), parent=root) or "General"
-    due_date = simpledialog.askstring("작업 수정", "마감일 (YYYY-MM-DD) 또는 공란:", initialvalue=todo.get('due_date') or '', parent=root) or None
+    description = simpledialog.askstring("작업 수정", "설명:", initialvalue=todo.description or '', parent=root) or ""
+    priority = simpledialog.askstring("작업 수정", "우선순위 (높음/보통/낮음):", initialvalue=todo.priority or 'Medium', parent=root) or "Medium"
+    category = simpledialog.askstring("작업 수정", "카테고리:", initialvalue=todo.category or 'General', parent=root) or "General"
+    due_date = simpledialog.askstring("작업 수정", "마감일 (YYYY-MM-DD) 또는 공란:", initialvalue=todo.due_date or '', parent=root) or None
     pri_norm = {"높음": "High", "보통": "Medium", "낮음": "Low"}.get(priority, priority)
     todo_manager.update_todo(tid, title=title, description=description, priority=pri_norm, category=category, due_date=due_date)
-    root.refresh()  # type: ignore
 
 
 def _delete_task(todo_manager: TodoManager, tree: ttk.Treeview):
@@ -227,7 +335,6 @@ def _delete_task(todo_manager: TodoManager, tree: ttk.Treeview):
     if not tid:
         return
     todo_manager.delete_todo(tid)
-    tree.master.refresh()  # type: ignore
 
 
 def _toggle_complete(todo_manager: TodoManager, tree: ttk.Treeview):
@@ -237,6 +344,5 @@ def _toggle_complete(todo_manager: TodoManager, tree: ttk.Treeview):
     todo = todo_manager.get_todo(tid)
     if not todo:
         return
-    todo_manager.set_completed(tid, not bool(todo['completed']))
-    tree.master.refresh()  # type: ignore
+    todo_manager.set_completed(tid, not bool(todo.completed))
 
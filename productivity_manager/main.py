@@ -11,12 +11,15 @@ def main():
     ensure_app_dirs(base_dir)
 
     # Load config (creates default if missing)
-    _ = load_config(base_dir)
+    cfg = load_config(base_dir)
 
     # Initialize database and tables
     db_path = os.path.join(base_dir, 'data', 'productivity.db')
     db = DBManager(db_path)
     db.initialize()
+    db_cfg = cfg.get("database", {})
+    if db_cfg.get("query_stats"):
+        db.enable_instrumentation(slow_ms=float(db_cfg.get("slow_query_ms", 100)))
 
     # Launch GUI
     run_app(base_dir, db)
@@ -0,0 +1,170 @@
+"""Productivity analytics over time_entries, computed with NumPy.
+
+All sessions, archived ones included, are loaded in one query into
+integer arrays (local start epoch, duration, task id) and spread over an
+hour-resolution timeline, so heatmaps and daily series need no Python
+loop per session. The arrays are cached: ``attach`` makes the next read
+append only the sessions a Timer has committed since, and ``invalidate``
+forces a full reload after edits.
+"""
+import itertools
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..database.db_manager import DBManager
+from .time_tracker import Timer
+
+
+# Naive local timestamps read as UTC give "local epoch" seconds, so hour and
+# weekday fall out of integer division without any timezone handling.
+_LOAD_SQL = """
+    SELECT id, task, start, duration FROM (
+        SELECT id, COALESCE(task_id, 0) AS task,
+               CAST(strftime('%s', start_time) AS INTEGER) AS start,
+               duration_seconds AS duration
+        FROM time_entries_all WHERE id > ? AND duration_seconds > 0
+    ) WHERE start IS NOT NULL
+"""
+
+_EPOCH_DAY = date(1970, 1, 1)
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday = 0)
+
+
+class TimeAnalytics:
+    def __init__(self, db: DBManager):
+        self.db = db
+        self._lock = threading.Lock()
+        self._cache: Optional[Dict[str, np.ndarray]] = None
+        self._max_id = 0
+        self._stale = False
+
+    def attach(self, timer: Timer) -> Callable[[], None]:
+        """Pick up every session ``timer`` commits; returns an unsubscribe."""
+        return timer.subscribe(self._on_entry)
+
+    def _on_entry(self, _entry_id: int) -> None:
+        with self._lock:
+            self._stale = True
+
+    def invalidate(self) -> None:
+        """Drop the cache; the next read reloads every entry."""
+        with self._lock:
+            self._cache = None
+            self._max_id = 0
+            self._stale = False
+
+    # ----- loading -----
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            if self._cache is None or self._stale:
+                self._stale = False
+                self._cache = self._load(self._cache)
+            return self._cache
+
+    def _load(self, cached: Optional[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        rows = self.db.query(_LOAD_SQL, (self._max_id,))
+        n = len(rows)
+        flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64, count=4 * n)
+        ids, task, start, dur = flat.reshape(n, 4).T if n else (flat,) * 4
+        if n:
+            self._max_id = max(self._max_id, int(ids.max()))
+        if cached is not None:
+            task = np.concatenate([cached["task"], task])
+            start = np.concatenate([cached["start"], start])
+            dur = np.concatenate([cached["duration"], dur])
+        return {"task": task, "start": start, "duration": dur, **self._timeline(start, start + dur)}
+
+    @staticmethod
+    def _timeline(start: np.ndarray, end: np.ndarray) -> Dict[str, np.ndarray]:
+        """Seconds worked in each local hour from the first session onwards."""
+        if not start.size:
+            return {"hour0": np.zeros(1, dtype=np.int64), "hours": np.zeros(0, dtype=np.int64)}
+        h0 = start // 3600
+        h1 = end // 3600
+        base = int(h0.min())
+        i0 = h0 - base
+        i1 = h1 - base
+        size = int(i1.max()) + 1
+
+        def spread(index: np.ndarray, weights: np.ndarray) -> np.ndarray:
+            return np.bincount(index, weights=weights, minlength=size)
+
+        same = i0 == i1
+        split = ~same
+        hours = spread(i0[same], (end - start)[same])
+        # Partial first and last hours, then whole hours in between via a
+        # difference array.
+        hours += spread(i0[split], (h0[split] + 1) * 3600 - start[split])
+        hours += spread(i1[split], end[split] - h1[split] * 3600)
+        ones = np.ones(int(split.sum()))
+        cover = spread(i0[split] + 1, ones) - spread(i1[split], ones)
+        hours += np.cumsum(cover) * 3600
+        return {"hour0": np.array([base], dtype=np.int64), "hours": np.rint(hours).astype(np.int64)}
+
+    # ----- aggregates -----
+    def task_totals(self) -> Dict[int, Tuple[int, int]]:
+        """``{task_id: (seconds, sessions)}``; 0 collects sessions without a task."""
+        a = self._arrays()
+        if not a["task"].size:
+            return {}
+        ids, inverse = np.unique(a["task"], return_inverse=True)
+        seconds = np.bincount(inverse, weights=a["duration"])
+        sessions = np.bincount(inverse)
+        return {int(t): (int(s), int(c)) for t, s, c in zip(ids, seconds, sessions)}
+
+    def heatmap(self) -> np.ndarray:
+        """7x24 seconds worked by weekday (Monday first) and local hour."""
+        a = self._arrays()
+        hours = a["hours"]
+        absolute = int(a["hour0"][0]) + np.arange(hours.size)
+        cell = ((absolute // 24 + _EPOCH_WEEKDAY) % 7) * 24 + absolute % 24
+        return np.bincount(cell, weights=hours, minlength=168).astype(np.int64).reshape(7, 24)
+
+    def daily_totals(self) -> Tuple[Optional[date], np.ndarray]:
+        """(first day, seconds per consecutive day); sessions split at midnight."""
+        a = self._arrays()
+        hours = a["hours"]
+        if not hours.size:
+            return None, hours
+        first_hour = int(a["hour0"][0])
+        lead = first_hour % 24
+        padded = np.concatenate([np.zeros(lead, dtype=np.int64), hours])
+        padded = np.concatenate([padded, np.zeros(-padded.size % 24, dtype=np.int64)])
+        return _EPOCH_DAY + timedelta(days=first_hour // 24), padded.reshape(-1, 24).sum(axis=1)
+
+    def rolling_average(self, window: int = 7) -> Tuple[Optional[date], np.ndarray]:
+        """Trailing mean of daily seconds; early days average what exists."""
+        first, daily = self.daily_totals()
+        if not daily.size:
+            return first, daily.astype(float)
+        csum = np.concatenate([[0], np.cumsum(daily)])
+        idx = np.arange(1, daily.size + 1)
+        lo = np.maximum(idx - window, 0)
+        return first, (csum[idx] - csum[lo]) / (idx - lo)
+
+    def streaks(self, min_seconds: int = 1800, today: Optional[date] = None) -> Dict[str, int]:
+        """Longest and current runs of days with at least ``min_seconds`` of focus.
+
+        The current streak counts back from ``today`` (or yesterday, if today
+        has no qualifying work yet).
+        """
+        first, daily = self.daily_totals()
+        if first is None:
+            return {"longest": 0, "current": 0}
+        today = today or date.today()
+        span = (today - first).days + 1
+        if span > daily.size:
+            daily = np.concatenate([daily, np.zeros(span - daily.size, dtype=np.int64)])
+        active = np.concatenate([[0], (daily >= min_seconds).astype(np.int8), [0]])
+        edges = np.diff(active)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        runs = ends - starts
+        longest = int(runs.max()) if runs.size else 0
+        # Runs are [start, end) day indexes; today is span - 1.
+        live = (starts < span) & (ends >= span - 1)
+        current = int((np.minimum(ends, span) - starts)[live].max()) if live.any() else 0
+        return {"longest": longest, "current": current}
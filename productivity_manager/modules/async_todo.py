@@ -0,0 +1,49 @@
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from ..database.async_db import AsyncDBManager
+from ..database.models import Todo
+from .todo_manager import PageKey, TodoManager
+
+
+class AsyncTodoManager:
+    """Awaitable mirror of TodoManager running on AsyncDBManager's pool."""
+
+    def __init__(self, todos: TodoManager, adb: AsyncDBManager):
+        self.todos = todos
+        self.adb = adb
+
+    async def add_todo(self, title: str, description: str = "", priority: str = "Medium", category: str = "General", due_date: Optional[str] = None) -> int:
+        return await self.adb.run(self.todos.add_todo, title, description, priority, category, due_date)
+
+    async def add_todos(self, items: Iterable[Mapping[str, Any]]) -> List[int]:
+        return await self.adb.run(self.todos.add_todos, list(items))
+
+    async def update_todo(self, todo_id: int, **fields) -> None:
+        await self.adb.run(self.todos.update_todo, todo_id, **fields)
+
+    async def update_todos(self, todo_ids: Iterable[int], **fields) -> int:
+        return await self.adb.run(self.todos.update_todos, list(todo_ids), **fields)
+
+    async def delete_todo(self, todo_id: int) -> None:
+        await self.adb.run(self.todos.delete_todo, todo_id)
+
+    async def delete_todos(self, todo_ids: Iterable[int]) -> int:
+        return await self.adb.run(self.todos.delete_todos, list(todo_ids))
+
+    async def set_completed(self, todo_id: int, completed: bool) -> None:
+        await self.adb.run(self.todos.set_completed, todo_id, completed)
+
+    async def get_todo(self, todo_id: int) -> Optional[Todo]:
+        return await self.adb.run(self.todos.get_todo, todo_id)
+
+    async def list_todos(self, include_completed: bool = True, category: Optional[str] = None, priority: Optional[str] = None) -> List[Todo]:
+        return await self.adb.run(self.todos.list_todos, include_completed, category, priority)
+
+    async def list_todos_page(self, limit: int = 100, after: Optional[PageKey] = None, include_completed: bool = True, category: Optional[str] = None, priority: Optional[str] = None, columns: Optional[Sequence[str]] = None, as_tuples: bool = False) -> Tuple[List[Any], Optional[PageKey]]:
+        return await self.adb.run(self.todos.list_todos_page, limit, after, include_completed, category, priority, columns, as_tuples)
+
+    async def search(self, query: str, filters: Optional[Mapping[str, Any]] = None, limit: int = 200) -> List[Todo]:
+        return await self.adb.run(self.todos.search, query, filters, limit)
+
+    async def categories(self) -> List[str]:
+        return await self.adb.run(self.todos.categories)
@@ -0,0 +1,346 @@
+"""Streaming CSV/JSONL export and import of todos and time entries.
+
+Export walks a cursor with ``fetchmany`` and writes each batch straight to
+disk. Import parses the file lazily, validates each record and inserts
+``chunk_size`` rows per transaction. The same transaction advances a row in
+``import_checkpoints``, so an interrupted import resumes after the last
+committed chunk. Memory use stays flat whatever the file size.
+
+Writing to tables behind a running TodoManager: call its ``invalidate()``
+afterwards.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..database import rollups
+from ..database.db_manager import DBManager
+
+
+FORMATS = ("csv", "jsonl")
+EXPORT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "todos": ("id", "title", "description", "priority", "category", "due_date", "completed", "created_at", "updated_at"),
+    "time_entries": ("id", "task_id", "start_time", "end_time", "duration_seconds", "notes", "created_at"),
+}
+# Values that read as "done" in the completed column.
+_TRUE = {"1", "true", "yes", "y", "done"}
+_FALSE = {"0", "false", "no", "n", ""}
+_PRIORITIES = ("High", "Medium", "Low")
+MAX_ERRORS = 100
+
+# progress(rows_done, fraction or None)
+Progress = Callable[[int, Optional[float]], None]
+
+
+class ImportResult(NamedTuple):
+    inserted: int  # includes rows committed by a resumed earlier run
+    skipped: int
+    resumed_from: int  # records already committed by an earlier run
+    errors: List[str]  # "line N: message", at most MAX_ERRORS
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt == "json":
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt or path}")
+    return fmt
+
+
+# ----- export -----
+def export_table(
+    db: DBManager,
+    table: str,
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: int = 1000,
+    progress: Optional[Progress] = None,
+) -> int:
+    """Write every row of ``table`` to ``path``; returns the row count.
+
+    The file is written under a temporary name and moved into place at the
+    end, so a failed export never leaves a truncated file behind.
+    """
+    if table not in EXPORT_COLUMNS:
+        raise ValueError(f"Unknown table: {table}")
+    fmt = detect_format(path, fmt)
+    columns = EXPORT_COLUMNS[table]
+    conn = db.connection()
+    total = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+    tmp = path + ".part"
+    done = 0
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                write_batch = writer.writerows
+            else:
+                def write_batch(rows):
+                    f.writelines(json.dumps(dict(zip(columns, r)), ensure_ascii=False) + "\n" for r in rows)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                write_batch(rows)
+                done += len(rows)
+                if progress is not None:
+                    progress(done, done / total if total else None)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        cur.close()
+    return done
+
+
+# ----- parsing and validation -----
+def _read_records(path: str, fmt: str) -> Iterator[Tuple[int, Dict[str, Any], float]]:
+    """Yield (line number, record, fraction of the file read)."""
+    size = os.path.getsize(path) or 1
+    with open(path, "rb") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, record, min(raw.tell() / size, 1.0)
+        else:
+            for lineno, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    record = {"__error__": f"invalid JSON ({e.msg})"}
+                if not isinstance(record, dict):
+                    record = {"__error__": "expected a JSON object"}
+                yield lineno, record, min(raw.tell() / size, 1.0)
+
+
+def _text(record: Dict[str, Any], key: str) -> Optional[str]:
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _int(record: Dict[str, Any], key: str) -> Optional[int]:
+    value = record.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer") from None
+
+
+def _todo_params(record: Dict[str, Any], keep_ids: bool) -> tuple:
+    title = _text(record, "title")
+    if not title:
+        raise ValueError("title is required")
+    priority = _text(record, "priority") or "Medium"
+    if priority not in _PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(_PRIORITIES)}")
+    completed = record.get("completed")
+    if isinstance(completed, str):
+        flag = completed.strip().lower()
+        if flag not in _TRUE and flag not in _FALSE:
+            raise ValueError("completed must be a boolean")
+        completed = flag in _TRUE
+    params = (
+        title,
+        record.get("description") or "",
+        priority,
+        _text(record, "category") or "General",
+        _text(record, "due_date"),
+        1 if completed else 0,
+        _text(record, "created_at"),
+        _text(record, "updated_at"),
+    )
+    return ((_int(record, "id"),) + params) if keep_ids else params
+
+
+def _time_entry_params(record: Dict[str, Any], keep_ids: bool) -> tuple:
+    start = _text(record, "start_time")
+    end = _text(record, "end_time")
+    if not start or not end:
+        raise ValueError("start_time and end_time are required")
+    try:
+        span = (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+    except ValueError:
+        raise ValueError("start_time/end_time must be ISO timestamps") from None
+    if span < 0:
+        raise ValueError("end_time is before start_time")
+    duration = _int(record, "duration_seconds")
+    if duration is None:
+        duration = int(span)
+    if duration < 0:
+        raise ValueError("duration_seconds must not be negative")
+    params = (_int(record, "task_id"), start, end, duration, record.get("notes") or "", _text(record, "created_at"))
+    return ((_int(record, "id"),) + params) if keep_ids else params
+
+
+_IMPORT_SPECS = {
+    # table: (validator, columns, placeholders); created/updated default to now.
+    "todos": (
+        _todo_params,
+        "title, description, priority, category, due_date, completed, created_at, updated_at",
+        "?, ?, ?, ?, ?, ?, COALESCE(?, datetime('now')), COALESCE(?, datetime('now'))",
+    ),
+    "time_entries": (
+        _time_entry_params,
+        "task_id, start_time, end_time, duration_seconds, notes, created_at",
+        "?, ?, ?, ?, ?, COALESCE(?, datetime('now'))",
+    ),
+}
+
+
+# ----- import -----
+def _fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def import_file(
+    db: DBManager,
+    table: str,
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_size: int = 1000,
+    progress: Optional[Progress] = None,
+    skip_invalid: bool = False,
+    keep_ids: bool = False,
+    resume: bool = True,
+) -> ImportResult:
+    """Insert the records of ``path`` into ``table`` in chunked transactions.
+
+    Invalid records raise ``ValueError`` naming the line, unless
+    ``skip_invalid`` is set; then they are counted and reported instead.
+    ``keep_ids`` keeps exported ids (for a round trip into an empty
+    database). With ``resume`` an import of the same, unchanged file picks
+    up after its last committed chunk. Imported time entries are added to
+    the rollups in the same transactions.
+    """
+    if table not in _IMPORT_SPECS:
+        raise ValueError(f"Unknown table: {table}")
+    fmt = detect_format(path, fmt)
+    validate, columns, marks = _IMPORT_SPECS[table]
+    if keep_ids:
+        columns, marks = "id, " + columns, "?, " + marks
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({marks})"
+    source = os.path.abspath(path)
+    fingerprint = _fingerprint(path)
+
+    start_at = inserted = 0
+    rows = db.query("SELECT fingerprint, records, inserted FROM import_checkpoints WHERE source = ?", (source,))
+    if rows and resume and rows[0]["fingerprint"] == fingerprint:
+        start_at, inserted = rows[0]["records"], rows[0]["inserted"]
+
+    skipped = 0
+    errors: List[str] = []
+    chunk: List[tuple] = []
+    consumed = 0
+    fraction: Optional[float] = None
+
+    def commit() -> None:
+        nonlocal inserted
+        with db.transaction() as conn:
+            conn.executemany(sql, chunk)
+            if table == "time_entries":
+                # Row layout: [id,] task_id, start, end, duration, ...
+                off = 1 if keep_ids else 0
+                rollups.apply_deltas(conn, rollups.merge_deltas(r[off:off + 4] for r in chunk))
+            conn.execute(
+                """
+                INSERT INTO import_checkpoints (source, table_name, fingerprint, records, inserted)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    table_name = excluded.table_name, fingerprint = excluded.fingerprint,
+                    records = excluded.records, inserted = excluded.inserted,
+                    updated_at = datetime('now')
+                """,
+                (source, table, fingerprint, consumed, inserted + len(chunk)),
+            )
+        inserted += len(chunk)
+        chunk.clear()
+        if progress is not None:
+            progress(inserted, fraction)
+
+    for lineno, record, fraction in _read_records(path, fmt):
+        consumed += 1
+        if consumed <= start_at:
+            continue
+        try:
+            if "__error__" in record:
+                raise ValueError(record["__error__"])
+            chunk.append(validate(record, keep_ids))
+        except ValueError as e:
+            message = f"line {lineno}: {e}"
+            if not skip_invalid:
+                raise ValueError(message) from None
+            skipped += 1
+            if len(errors) < MAX_ERRORS:
+                errors.append(message)
+            continue
+        if len(chunk) >= chunk_size:
+            commit()
+    if chunk:
+        commit()
+    # Finished: a later import of the same file starts over.
+    db.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+    return ImportResult(inserted, skipped, start_at, errors)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    default_db = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "productivity.db")
+    parser = argparse.ArgumentParser(description="Import or export todos and time entries (CSV/JSONL)")
+    parser.add_argument("--db", default=default_db, help="path to productivity.db")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("export", "import"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("table", choices=sorted(EXPORT_COLUMNS))
+        cmd.add_argument("path")
+    imp = sub.choices["import"]
+    imp.add_argument("--chunk-size", type=int, default=1000)
+    imp.add_argument("--skip-invalid", action="store_true")
+    imp.add_argument("--keep-ids", action="store_true")
+    imp.add_argument("--restart", action="store_true", help="ignore a saved checkpoint")
+    args = parser.parse_args(argv)
+
+    def report(done: int, fraction: Optional[float]) -> None:
+        pct = f" ({fraction:.0%})" if fraction is not None else ""
+        print(f"\r{done} rows{pct}", end="", flush=True)
+
+    db = DBManager(args.db)
+    db.initialize()
+    try:
+        if args.command == "export":
+            n = export_table(db, args.table, args.path, args.format, progress=report)
+            print(f"\nExported {n} rows")
+        else:
+            result = import_file(
+                db, args.table, args.path, args.format, args.chunk_size, report,
+                skip_invalid=args.skip_invalid, keep_ids=args.keep_ids, resume=not args.restart,
+            )
+            print(f"\nImported {result.inserted} rows, skipped {result.skipped}")
+            for message in result.errors:
+                print(message)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
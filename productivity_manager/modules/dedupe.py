@@ -0,0 +1,256 @@
+"""Reclaim space held by duplicate files by linking them together.
+
+``dedupe`` takes ``find_duplicates`` groups, keeps the first path of each
+group and replaces every other copy with a hard link to it, or with a
+reflink (``FICLONE``: shared extents, separate inode) where the filesystem
+can clone. Each copy is re-checked (still a regular file on the same
+device, same size, and with ``with_keys`` groups the inode and mtime seen
+by the scan, then the same digest) right before it is replaced, and the
+swap itself is an atomic ``os.replace`` of a link made beside it.
+
+Each run writes a new JSON-lines journal, one entry per replacement with
+the copy's original metadata, written before the swap. ``rollback`` turns
+linked paths back into independent copies with that metadata and marks
+each restored entry in the journal, so rolling back again skips them.
+"""
+import errno
+import json
+import os
+import shutil
+import threading
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .file_organizer import ProgressTracker, ScanProgress, file_digest
+from .hash_cache import FileKey, file_key
+
+try:
+    import fcntl
+except ImportError:  # Windows: hard links only
+    fcntl = None
+
+
+MODES = ("hardlink", "reflink", "auto")  # auto: reflink, else hard link
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+# Reflink failures that mean "this filesystem cannot clone", not a real error.
+_NO_CLONE = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS}
+
+
+class DedupeResult(NamedTuple):
+    linked: int
+    bytes_reclaimed: int  # data no longer stored twice
+    skipped: List[str]  # "path: reason"
+    journal: str
+
+
+def reflink(src: str, dest: str) -> None:
+    """Create ``dest`` as a clone of ``src``; OSError if the filesystem can't."""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(src, "rb") as s, open(dest, "xb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dest)
+            raise
+
+
+def _temp_name(path: str) -> str:
+    head, tail = os.path.split(path)
+    return os.path.join(head, f".{tail}.dedupe-{os.getpid()}")
+
+
+def _verify(
+    path: str, size: int, dev: int, digest: str, scanned: Optional[FileKey] = None
+) -> Tuple[Optional[os.stat_result], str]:
+    """(stat, "") if ``path`` still holds ``digest``, else (None, reason).
+
+    ``scanned`` is the file's (dev, ino, size, mtime_ns) when it was hashed;
+    a file replaced or touched since is rejected without rereading it.
+    """
+    try:
+        before = os.lstat(path)
+        if not os.path.isfile(path) or os.path.islink(path):
+            return None, "not a regular file"
+        if scanned is not None and file_key(before) != tuple(scanned):
+            return None, "modified since scan"
+        if before.st_size != size:
+            return None, "size changed"
+        if before.st_dev != dev:
+            return None, "on another device"
+        algorithm = digest.split(":", 1)[0]
+        current = file_digest(path, algorithm)
+        after = os.lstat(path)
+    except OSError as e:
+        return None, e.strerror or str(e)
+    if (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+        return None, "modified while checking"
+    if current != digest:
+        return None, "content changed"
+    return before, ""
+
+
+def _link(
+    keeper: str, keep: os.stat_result, digest: str, path: str, scanned: Optional[FileKey], mode: str, journal
+) -> Tuple[int, str]:
+    """Swap one copy for a link; (bytes reclaimed, "") or (0, reason skipped)."""
+    st, reason = _verify(path, keep.st_size, keep.st_dev, digest, scanned)
+    if st is None:
+        return 0, reason
+    if st.st_ino == keep.st_ino:
+        return 0, "already linked"
+    tmp = _temp_name(path)
+    if os.path.lexists(tmp):
+        os.unlink(tmp)  # left over from an interrupted run
+    how = "hardlink"
+    if mode != "hardlink":
+        try:
+            reflink(keeper, tmp)
+            shutil.copystat(path, tmp)
+            how = "reflink"
+        except OSError as e:
+            if mode == "reflink" or e.errno not in _NO_CLONE:
+                raise
+    if how == "hardlink":
+        os.link(keeper, tmp)
+    # Journal before the swap, so a crash in between still rolls back cleanly.
+    journal.write(json.dumps({
+        "path": path, "keeper": keeper, "how": how, "size": st.st_size,
+        "ino": st.st_ino, "mode": st.st_mode, "uid": st.st_uid, "gid": st.st_gid,
+        "atime_ns": st.st_atime_ns, "mtime_ns": st.st_mtime_ns,
+    }) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        raise
+    # A copy with other hard links of its own frees nothing.
+    return (st.st_size if st.st_nlink == 1 else 0), ""
+
+
+def _entries(paths: Sequence[Any]) -> List[Tuple[str, Optional[FileKey]]]:
+    """(path, scan-time key or None) for plain or ``with_keys`` group members."""
+    return [(p, None) if isinstance(p, str) else (p[0], tuple(p[1])) for p in paths]
+
+
+def dedupe(
+    groups: Iterable[Tuple[str, Sequence[Union[str, Tuple[str, FileKey]]]]],
+    journal_path: str,
+    mode: str = "auto",
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    min_size: int = 1,
+) -> DedupeResult:
+    """Replace all but the first path of each (digest, paths) group with links.
+
+    ``journal_path`` must not exist yet: every run gets its own journal.
+    Pass ``find_duplicates(..., with_keys=True)`` groups so files modified
+    after the scan are skipped even if their mtime is all that changed
+    before the re-hash. Hard links share the keeper's metadata (permissions, owner, mtime);
+    reflinks keep the copy's own. Paths already linked to the keeper are
+    left alone. Cancelling raises ``Cancelled`` before the next file; what
+    was linked so far stays linked and journaled.
+
+    Groups of files smaller than ``min_size`` bytes are left alone: linking
+    empty files frees nothing and would make a later write to one of them
+    show up in all the others.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    min_size = max(1, min_size)
+    groups = [(digest, _entries(paths)) for digest, paths in groups]
+    tracker = ProgressTracker(progress, cancel)
+    tracker.stage("dedupe", sum(len(paths) - 1 for _, paths in groups))
+    linked = reclaimed = 0
+    skipped: List[str] = []
+
+    with open(journal_path, "x", encoding="utf-8") as journal:
+        for digest, entries in groups:
+            (keeper, keeper_key), copies = entries[0], entries[1:]
+            try:
+                keep = os.stat(keeper)
+                if keep.st_size < min_size:
+                    tracker.advance(len(copies))
+                    continue
+                reason = _verify(keeper, keep.st_size, keep.st_dev, digest, keeper_key)[1]
+            except OSError as e:
+                reason = e.strerror or str(e)
+            if reason:
+                skipped += [f"{p}: keeper {reason}" for p, _ in copies]
+                tracker.advance(len(copies))
+                continue
+            for path, scanned in copies:
+                tracker.advance(0)  # cancellation point
+                try:
+                    freed, reason = _link(keeper, keep, digest, path, scanned, mode, journal)
+                except OSError as e:
+                    freed, reason = 0, e.strerror or str(e)
+                if reason:
+                    skipped.append(f"{path}: {reason}")
+                else:
+                    linked += 1
+                    reclaimed += freed
+                tracker.advance()
+    return DedupeResult(linked, reclaimed, skipped, journal_path)
+
+
+def rollback(
+    journal_path: str,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[str]:
+    """Undo a ``dedupe`` run: give every linked path its own copy again.
+
+    Entries are undone newest first. A path whose inode is still the
+    original one was never swapped (the run stopped in between) and is
+    left as it is, as is any path changed since. Each restored entry is
+    marked in the journal (``{"rolled_back": n}``), so running this again,
+    e.g. after an interruption, only handles what is left. Returns log lines.
+    """
+    with open(journal_path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    entries = [line for line in lines if "path" in line]
+    done = {line["rolled_back"] for line in lines if "rolled_back" in line}
+    tracker = ProgressTracker(progress, cancel)
+    tracker.stage("rollback", len(entries))
+    logs: List[str] = []
+    with open(journal_path, "a", encoding="utf-8") as journal:
+        for n in reversed(range(len(entries))):
+            tracker.advance(0)
+            entry = entries[n]
+            path = entry["path"]
+            if n in done:
+                logs.append(f"Already restored: {path}")
+                tracker.advance()
+                continue
+            try:
+                st = os.lstat(path)
+                if st.st_ino == entry["ino"]:
+                    logs.append(f"Unchanged: {path}")
+                elif st.st_size != entry["size"]:
+                    logs.append(f"Skipped: {path} (changed since dedupe)")
+                else:
+                    _restore(path, entry)
+                    journal.write(json.dumps({"rolled_back": n}) + "\n")
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                    logs.append(f"Restored: {path}")
+            except OSError as e:
+                logs.append(f"Skipped: {path} ({e.strerror or e})")
+            tracker.advance()
+    return logs
+
+
+def _restore(path: str, entry: dict) -> None:
+    """Replace ``path`` with its own copy carrying the journaled metadata."""
+    tmp = _temp_name(path)
+    shutil.copyfile(path, tmp)
+    os.chmod(tmp, entry["mode"] & 0o7777)
+    try:
+        os.chown(tmp, entry["uid"], entry["gid"])
+    except (AttributeError, PermissionError):
+        pass  # not root, or no chown on this platform
+    os.utime(tmp, ns=(entry["atime_ns"], entry["mtime_ns"]))
+    os.replace(tmp, path)
@@ -0,0 +1,140 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..database.models import Todo
+from .todo_manager import TodoManager
+
+
+class DueAlertScheduler:
+    """Fire ``on_alert(todo)`` ``lead_minutes`` before each open todo is due.
+
+    Only todos due within the next ``horizon_hours`` are loaded (an index
+    range read on ``due_epoch``) into a min-heap ordered by alert time. A
+    single thread sleeps until the earliest alert; todo edits reported via
+    TodoManager.subscribe push a fresh heap entry for just those ids, and
+    superseded entries are skipped lazily when they reach the top.
+    """
+
+    def __init__(
+        self,
+        todos: TodoManager,
+        on_alert: Callable[[Todo], None],
+        lead_minutes: int = 60,
+        horizon_hours: int = 24,
+    ):
+        self.todos = todos
+        self.on_alert = on_alert
+        self.lead = int(lead_minutes) * 60
+        self.horizon = int(horizon_hours) * 3600
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, int]] = []  # (alert_at, todo_id, due_epoch)
+        self._live: Dict[int, int] = {}  # todo_id -> due_epoch of its valid entry
+        self._alerted: Set[Tuple[int, int]] = set()
+        self._dirty: Set[int] = set()
+        self._window_end = 0
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._unsubscribe = self.todos.subscribe(self._on_change)
+        self._thread = threading.Thread(target=self._run, name="due-alerts", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def pending(self) -> List[Tuple[int, int]]:
+        """(alert_at, todo_id) of live heap entries, soonest first."""
+        with self._cond:
+            return sorted((a, t) for a, t, d in self._heap if self._live.get(t) == d)
+
+    # ----- change tracking -----
+    def _on_change(self, action: str, ids: Iterable[int]) -> None:
+        with self._cond:
+            if action == "deleted":
+                for tid in ids:
+                    self._live.pop(tid, None)
+            else:
+                self._dirty.update(ids)
+            self._cond.notify_all()
+
+    def _apply_dirty(self, now: int) -> None:
+        with self._cond:
+            ids, self._dirty = self._dirty, set()
+        for tid in ids:
+            todo = self.todos.get_todo(tid)
+            with self._cond:
+                self._live.pop(tid, None)
+                if todo is None or todo.completed or todo.due_epoch is None:
+                    continue
+                due = int(todo.due_epoch)
+                # Beyond the loaded window: the next reload will pick it up.
+                if now <= due < self._window_end:
+                    self._push(tid, due)
+
+    def _push(self, tid: int, due: int) -> None:
+        # Caller holds self._cond.
+        if (tid, due) in self._alerted:
+            return
+        self._live[tid] = due
+        heapq.heappush(self._heap, (due - self.lead, tid, due))
+
+    def _reload(self, now: int) -> None:
+        rows = self.todos.due_between(now, now + self.horizon)
+        with self._cond:
+            self._heap = []
+            self._live = {}
+            self._window_end = now + self.horizon
+            for r in rows:
+                self._push(int(r.id), int(r.due_epoch))
+            # Forget alerts whose deadlines have passed.
+            self._alerted = {(t, d) for t, d in self._alerted if d >= now}
+
+    # ----- scheduler thread -----
+    def _run(self) -> None:
+        self._reload(int(time.time()))
+        while True:
+            now = int(time.time())
+            if now >= self._window_end:
+                self._reload(now)
+            if self._dirty:
+                self._apply_dirty(now)
+            due_now: List[Tuple[int, int]] = []
+            with self._cond:
+                if self._stopped:
+                    return
+                while self._heap and self._heap[0][0] <= now:
+                    _alert_at, tid, due = heapq.heappop(self._heap)
+                    if self._live.get(tid) != due:
+                        continue  # superseded by an edit or deletion
+                    del self._live[tid]
+                    self._alerted.add((tid, due))
+                    due_now.append((tid, due))
+                if not due_now:
+                    wake = self._window_end
+                    if self._heap:
+                        wake = min(wake, self._heap[0][0])
+                    # Re-check under the lock: an edit reported since the
+                    # _dirty check above has already notified.
+                    self._cond.wait_for(lambda: self._dirty or self._stopped, timeout=max(0.0, wake - time.time()))
+                    continue
+            for tid, due in due_now:
+                todo = self.todos.get_todo(tid)
+                if todo is not None and not todo.completed and todo.due_epoch == due:
+                    try:
+                        self.on_alert(todo)
+                    except Exception:
+                        pass
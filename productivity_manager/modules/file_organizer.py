@@ -1,127 +1,975 @@
+import errno
 import hashlib
+import json
+import mmap
 import os
+import re
 import shutil
-from typing import Dict, List, Tuple, DefaultDict
-from collections import defaultdict
+import stat
+import string
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, TypeVar, DefaultDict
+from collections import defaultdict, deque
+
+try:
+    import xxhash
+except ImportError:  # optional; crc32 is the fast digest without it
+    xxhash = None
 
 from ..utils.constants import FILE_CATEGORIES
+from .file_rules import OTHER_CATEGORY, Classifier, default_classifier
+from .hash_cache import FileKey, HashCache, file_key
+
+
+# Default number of concurrent reads for find_duplicates.
+IO_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _CRC32:
+    """hashlib-style wrapper around zlib.crc32."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def update(self, data) -> None:
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f"{self.value:08x}"
+
 
+class Digest(NamedTuple):
+    new: Callable[[], Any]  # returns an object with update()/hexdigest()
+    cryptographic: bool  # False: only fit for pre-filtering
 
-def hash_file(path: str, block_size: int = 1024 * 1024) -> str:
-    """Compute SHA-256 for a file using a larger block size for speed.
 
-    Uses 1MB blocks to reduce the number of read() syscalls compared to the
-    previous 64KB default, typically improving throughput on modern disks.
+DIGESTS: Dict[str, Digest] = {
+    "sha256": Digest(hashlib.sha256, True),
+    "blake2b": Digest(hashlib.blake2b, True),
+    "crc32": Digest(_CRC32, False),
+}
+if xxhash is not None:
+    DIGESTS["xxh3_64"] = Digest(xxhash.xxh3_64, False)
+DEFAULT_DIGEST = "sha256"
+FAST_DIGEST = "xxh3_64" if xxhash is not None else "crc32"
+
+BLOCK_SIZE = 1024 * 1024
+# Files at least this big are hashed straight from an mmap.
+MMAP_MIN_SIZE = 16 * 1024 * 1024
+
+_buffers = threading.local()
+
+
+def _buffer(size: int) -> memoryview:
+    """A per-thread read buffer of at least ``size`` bytes, reused across files."""
+    buf = getattr(_buffers, "buf", None)
+    if buf is None or len(buf) < size:
+        buf = _buffers.buf = memoryview(bytearray(size))
+    return buf
+
+
+def file_digest(path: str, algorithm: str = DEFAULT_DIGEST, limit: Optional[int] = None, block_size: int = BLOCK_SIZE) -> str:
+    """Digest of a file (or its first ``limit`` bytes) as ``"algorithm:hex"``.
+
+    Large files are hashed from an mmap, the rest with ``readinto`` on a
+    reused buffer, so no bytes object is allocated per chunk. The tag keeps
+    digests of different algorithms from ever comparing equal.
     """
-    h = hashlib.sha256()
+    h = DIGESTS[algorithm].new()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        want = size if limit is None else min(size, limit)
+        mapped = None
+        if want >= MMAP_MIN_SIZE:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass  # e.g. special files; read them instead
+        if mapped is not None:
+            with mapped, memoryview(mapped) as view:
+                for pos in range(0, want, block_size):
+                    h.update(view[pos:min(pos + block_size, want)])
+        else:
+            buf = _buffer(min(block_size, limit or block_size))
+            remaining = limit
+            while remaining is None or remaining > 0:
+                chunk = buf if remaining is None or remaining >= len(buf) else buf[:remaining]
+                n = f.readinto(chunk)
+                if not n:
+                    break
+                h.update(chunk[:n])
+                if remaining is not None:
+                    remaining -= n
+    return f"{algorithm}:{h.hexdigest()}"
+
+
+def sample_digest(path: str, ranges: Sequence[Tuple[int, int]], algorithm: str = FAST_DIGEST) -> str:
+    """Tagged digest of the (offset, length) byte ranges of a file, in order."""
+    h = DIGESTS[algorithm].new()
     with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(block_size), b''):
-            h.update(chunk)
-    return h.hexdigest()
+        for offset, length in ranges:
+            f.seek(offset)
+            buf = _buffer(min(length, BLOCK_SIZE))
+            while length > 0:
+                chunk = buf if length >= len(buf) else buf[:length]
+                n = f.readinto(chunk)
+                if not n:
+                    break
+                h.update(chunk[:n])
+                length -= n
+    return f"{algorithm}:{h.hexdigest()}"
 
 
-def organize_directory(directory: str) -> List[str]:
-    """Organize files by extension into category folders (non-recursive).
+def hash_file(path: str, block_size: int = BLOCK_SIZE, algorithm: str = DEFAULT_DIGEST) -> str:
+    """Hex digest of a whole file (SHA-256 unless ``algorithm`` says otherwise).
 
-    Optimized by precomputing an extension->category map to avoid scanning all
-    categories per file.
+    Untagged, for callers that already know the algorithm; see ``file_digest``.
+    """
+    return file_digest(path, algorithm, block_size=block_size).split(":", 1)[1]
+
+
+# ----- progress and cancellation -----
+class ScanProgress(NamedTuple):
+    stage: str  # "scan", "sample", "hash", "organize", "dedupe" or "rollback"
+    files_done: int
+    files_total: int  # 0 while unknown (during "scan")
+    bytes_done: int
+    bytes_total: int
+    eta: Optional[float]  # seconds left in this stage, once there is a rate
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if self.bytes_total:
+            return min(self.bytes_done / self.bytes_total, 1.0)
+        if self.files_total:
+            return min(self.files_done / self.files_total, 1.0)
+        return None
+
+
+class Cancelled(Exception):
+    """Raised from a scan once its ``cancel`` event is set."""
+
+
+# Minimum seconds between two progress callbacks within a stage.
+PROGRESS_INTERVAL = 0.1
+
+
+class ProgressTracker:
+    """Stage-wise progress with ETA; also the cancellation checkpoint."""
+
+    def __init__(self, callback: Optional[Callable[[ScanProgress], None]], cancel: Optional[threading.Event]):
+        self.callback = callback
+        self.cancel = cancel
+        self.stage("scan")
+
+    def stage(self, name: str, files_total: int = 0, bytes_total: int = 0) -> None:
+        self.name, self.files_total, self.bytes_total = name, files_total, bytes_total
+        self.files = self.bytes = 0
+        self.started = self.last = time.monotonic()
+        self._emit()
+
+    def advance(self, files: int = 1, nbytes: int = 0) -> None:
+        if self.cancel is not None and self.cancel.is_set():
+            raise Cancelled()
+        self.files += files
+        self.bytes += nbytes
+        now = time.monotonic()
+        if now - self.last >= PROGRESS_INTERVAL or self.files == self.files_total:
+            self.last = now
+            self._emit()
+
+    def _emit(self) -> None:
+        if self.callback is None:
+            return
+        done, total = (self.bytes, self.bytes_total) if self.bytes_total else (self.files, self.files_total)
+        eta = None
+        if done and total:
+            eta = (time.monotonic() - self.started) * (total - done) / done
+        self.callback(ScanProgress(self.name, self.files, self.files_total, self.bytes, self.bytes_total, eta))
+
+
+# ----- organize: plan, then apply -----
+
+
+class Move(NamedTuple):
+    src: str
+    dest: str
+    size: int
+    cross_device: bool  # needs copy + delete instead of a rename
+
+
+class OrganizePlan(NamedTuple):
+    directory: str
+    folders: List[str]  # category folders to create, each once
+    moves: List[Move]
+    skipped: Tuple[Tuple[str, str], ...] = ()  # (subfolder, reason) that could not be listed
+
+    def skipped_lines(self) -> List[str]:
+        return [f"Skipped folder: {os.path.relpath(d, self.directory)} ({why})" for d, why in self.skipped]
+
+    def preview(self) -> List[str]:
+        """Dry-run lines, one per planned move, then any unreadable subfolders."""
+        return [
+            f"Would move: {os.path.relpath(m.src, self.directory)} -> {os.path.relpath(m.dest, self.directory)}"
+            for m in self.moves
+        ] + self.skipped_lines()
+
+
+class _NameIndex:
+    """Names taken in each target folder: existing entries plus planned moves.
+
+    Free names are found with a per-(folder, name) counter instead of a stat
+    per candidate, so many files called ``image.png`` stay linear. With
+    ``listing=False`` folders are not listed up front; each candidate is
+    checked with one ``lstat`` instead (cheaper for a handful of files).
+    A folder given to ``reserve`` is neither listed nor probed: its taken
+    names are exactly the reserved and claimed ones.
+    """
+
+    def __init__(self, listing: bool = True, suffix: str = " ({n})") -> None:
+        self.listing = listing
+        self.suffix = suffix
+        self._taken: Dict[str, set] = {}
+        self._reserved: set = set()
+        self._next: Dict[Tuple[str, str], int] = {}
+
+    def reserve(self, folder: str, names: Iterable[str]) -> None:
+        self._taken.setdefault(folder, set()).update(os.path.normcase(n) for n in names)
+        self._reserved.add(folder)
+
+    def _names(self, folder: str) -> set:
+        names = self._taken.get(folder)
+        if names is None:
+            names = set()
+            if self.listing:
+                try:
+                    names = {os.path.normcase(n) for n in os.listdir(folder)}
+                except OSError:  # not created yet
+                    pass
+            self._taken[folder] = names
+        return names
+
+    def _taken_name(self, names: set, folder: str, candidate: str) -> bool:
+        if os.path.normcase(candidate) in names:
+            return True
+        return not self.listing and folder not in self._reserved and os.path.lexists(os.path.join(folder, candidate))
+
+    def claim(self, folder: str, name: str) -> str:
+        names = self._names(folder)
+        candidate = name
+        if self._taken_name(names, folder, candidate):
+            base, ext = os.path.splitext(name)
+            counter = self._next.get((folder, os.path.normcase(name)), 1)
+            candidate = f"{base}{self.suffix.format(n=counter)}{ext}"
+            while self._taken_name(names, folder, candidate):
+                counter += 1
+                candidate = f"{base}{self.suffix.format(n=counter)}{ext}"
+            self._next[(folder, os.path.normcase(name))] = counter + 1
+        names.add(os.path.normcase(candidate))
+        return candidate
+
+
+def category_for(name: str) -> str:
+    """Category folder a file name is organized into, by its extension alone."""
+    return default_classifier().by_name(name)
+
+
+def plan_organize(
+    directory: str,
+    recursive: bool = False,
+    names: Optional[Iterable[str]] = None,
+    classifier: Optional[Classifier] = None,
+) -> OrganizePlan:
+    """Plan moving files into ``directory``'s category folders; touches nothing.
+
+    With ``recursive``, files in subfolders are gathered as well (symlinked
+    folders are not followed); the category folders themselves are skipped.
+    ``names`` limits the plan to those entries of ``directory`` without
+    scanning it (the watcher's incremental path). Files are sorted by
+    ``classifier`` (default: extensions, then content sniffing). Colliding
+    names get `` (n)`` suffixes, as before.
+    """
+    classifier = classifier or default_classifier()
+    skip = {os.path.normcase(c) for c in list(FILE_CATEGORIES) + [OTHER_CATEGORY]}
+    skip |= {os.path.normcase(r.category) for r in classifier.rules}
+    root_dev = os.stat(directory).st_dev
+    index = _NameIndex(listing=names is None)
+    folders: List[str] = []
+    moves: List[Move] = []
+    skipped: List[Tuple[str, str]] = []
+
+    def add(path: str, name: str, st: os.stat_result) -> None:
+        target_dir = os.path.join(directory, classifier.classify(path, st))
+        if target_dir not in folders:
+            folders.append(target_dir)
+        dest = os.path.join(target_dir, index.claim(target_dir, name))
+        moves.append(Move(path, dest, st.st_size, st.st_dev != root_dev))
+
+    if names is not None:
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                add(path, name, st)
+        return OrganizePlan(directory, folders, moves)
+
+    stack = [directory]
+    while stack:
+        top = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(top) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            if top == directory:
+                raise
+            # One unreadable subfolder shouldn't stop the rest.
+            skipped.append((top, e.strerror or str(e)))
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and not (top == directory and os.path.normcase(entry.name) in skip):
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            add(entry.path, entry.name, st)
+        stack.extend(reversed(subdirs))
+    return OrganizePlan(directory, folders, moves, tuple(skipped))
+
+
+def apply_plan(
+    plan: OrganizePlan,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[str]:
+    """Carry out ``plan``, yielding a log line per file.
+
+    Folders are created once up front. Moves on the same device are plain
+    ``os.rename`` calls; cross-device ones (copy, then delete) run on up to
+    ``workers`` threads. A destination that appeared since planning is
+    skipped rather than overwritten.
+    """
+    directory = plan.directory
+    for folder in plan.folders:
+        os.makedirs(folder, exist_ok=True)
+    tracker = ProgressTracker(progress, cancel)
+    tracker.stage("organize", len(plan.moves))
+
+    def line(m: Move, err: Optional[str]) -> str:
+        src = os.path.relpath(m.src, directory)
+        if err:
+            return f"Skipped: {src} ({err})"
+        return f"Moved: {src} -> {os.path.relpath(m.dest, directory)}"
+
+    def move(m: Move) -> Optional[str]:
+        if os.path.lexists(m.dest):
+            return "destination exists"
+        try:
+            if not m.cross_device:
+                try:
+                    os.rename(m.src, m.dest)
+                    return None
+                except OSError as e:
+                    if e.errno != errno.EXDEV:  # e.g. a category folder that is a mount point
+                        raise
+            shutil.move(m.src, m.dest)
+        except OSError as e:
+            return e.strerror or str(e)
+        return None
+
+    yield from plan.skipped_lines()
+    copies = []
+    for m in plan.moves:
+        if m.cross_device:
+            copies.append(m)
+            continue
+        tracker.advance(0)  # cancellation point before touching the file
+        err = move(m)
+        tracker.advance()
+        yield line(m, err)
+    for m, err in zip(copies, _bounded_map(move, copies, max(1, workers or IO_WORKERS))):
+        tracker.advance()
+        yield line(m, err)
+
+
+def organize_directory(directory: str, recursive: bool = False, classifier: Optional[Classifier] = None) -> List[str]:
+    """Organize files into category folders (by extension, then content).
+
+    Non-recursive unless ``recursive``. See ``plan_organize`` for a dry run
+    and ``iter_organize`` for the streaming variant.
+    """
+    return list(iter_organize(directory, recursive=recursive, classifier=classifier))
+
+
+def iter_organize(
+    directory: str,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    recursive: bool = False,
+    classifier: Optional[Classifier] = None,
+) -> Iterator[str]:
+    """Plan and apply an organize run, yielding each log line.
+
+    Setting ``cancel`` stops before the next file with ``Cancelled``; files
+    already moved stay moved.
     """
-    logs: List[str] = []
     if not os.path.isdir(directory):
-        return [f"Directory not found: {directory}"]
+        yield f"Directory not found: {directory}"
+        return
+    yield from apply_plan(plan_organize(directory, recursive, classifier=classifier), progress=progress, cancel=cancel)
+
 
-    # Precompute extension -> category map once
-    ext_to_cat: Dict[str, str] = {
-        ext.lower(): cat for cat, exts in FILE_CATEGORIES.items() for ext in exts
-    }
+def _scan_files(directory: str, listed: Optional[Set[str]] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yield (path, stat) for every file below ``directory``.
 
-    for entry in os.scandir(directory):
-        if not entry.is_file():
+    Same order as ``os.walk`` (top-down, entries in directory order), but the
+    stat comes from the ``DirEntry`` so no path is looked up twice.
+    Unreadable directories and files are skipped; directories read in full
+    are added to ``listed``.
+    """
+    stack = [directory]
+    while stack:
+        top = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(top) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            if not st.st_ino:
+                                # Windows DirEntry.stat() leaves st_ino/st_dev unset.
+                                st = os.stat(entry.path)
+                            yield entry.path, st
+                    except OSError:
+                        continue
+        except OSError:
             continue
-        _, ext = os.path.splitext(entry.name)
-        ext = ext.lower()
-        target_category = ext_to_cat.get(ext, "Other")
-        target_dir = os.path.join(directory, target_category)
-        os.makedirs(target_dir, exist_ok=True)
-        dest = os.path.join(target_dir, entry.name)
-        # avoid overwrite
-        base, ext2 = os.path.splitext(entry.name)
-        counter = 1
-        while os.path.exists(dest):
-            dest = os.path.join(target_dir, f"{base} ({counter}){ext2}")
-            counter += 1
-        shutil.move(entry.path, dest)
-        logs.append(f"Moved: {entry.name} -> {os.path.relpath(dest, directory)}")
-    return logs
+        if listed is not None:
+            listed.add(top)
+        stack.extend(reversed(subdirs))
+
+
+def _bounded_map(func: Callable[[T], R], items: Sequence[T], workers: int) -> Iterator[R]:
+    """``map`` over a thread pool, in order, with at most ``2 * workers`` reads in flight."""
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dup-hash") as pool:
+        pending: Deque[Future] = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(func, item))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Closed early (cancelled, or the caller stopped): drop queued reads.
+            for fut in pending:
+                fut.cancel()
+
+
+# ----- sampled pre-filter tiers -----
+# Tier specs: "head" (first HEAD_BYTES), "tail", "middle" and "stride:N"
+# (N blocks spread evenly over the file), all but head SAMPLE_BLOCK long.
+DEFAULT_TIERS = ("head", "tail", "middle", "stride:16")
+HEAD_BYTES = 256 * 1024
+SAMPLE_BLOCK = 64 * 1024
+
+Range = Tuple[int, int]  # (offset, length)
+
+
+def _parse_tier(spec: str) -> Tuple[str, int]:
+    name, _, count = spec.partition(":")
+    if name in ("head", "tail", "middle") and not count:
+        return name, 1
+    if name == "stride" and count.isdigit() and int(count) >= 2:
+        return name, int(count)
+    raise ValueError(f"Unknown sampling tier: {spec!r}")
+
+
+def _merge(ranges: Sequence[Range]) -> List[Range]:
+    merged: List[Range] = []
+    for offset, length in sorted(ranges):
+        if merged and offset <= merged[-1][0] + merged[-1][1]:
+            last_offset, last_length = merged[-1]
+            merged[-1] = (last_offset, max(last_length, offset + length - last_offset))
+        else:
+            merged.append((offset, length))
+    return merged
+
+
+def tier_ranges(spec: str, size: int) -> List[Range]:
+    """Byte ranges a tier reads from a file of ``size`` bytes (merged, in order)."""
+    name, count = _parse_tier(spec)
+    block = min(SAMPLE_BLOCK, size)
+    if name == "head":
+        ranges = [(0, min(HEAD_BYTES, size))]
+    elif name == "tail":
+        ranges = [(size - block, block)]
+    elif name == "middle":
+        ranges = [((size - block) // 2, block)]
+    else:
+        ranges = [(i * (size - block) // (count - 1), block) for i in range(count)]
+    return _merge([r for r in ranges if r[1] > 0])
+
+
+def _tier_key(spec: str) -> str:
+    # Cache key; includes the block size so changing it invalidates old digests.
+    return f"{spec}@{HEAD_BYTES if spec == 'head' else SAMPLE_BLOCK}"
+
+
+def plan_tiers(tiers: Sequence[str], size: int) -> List[Tuple[str, List[Range]]]:
+    """Tiers worth running for files of ``size`` bytes, cheapest first.
+
+    A tier is dropped when it would read the whole file (the full hash is
+    no dearer) or only bytes that earlier tiers already compared.
+    """
+    ordered = sorted(
+        ((spec, tier_ranges(spec, size)) for spec in tiers),
+        key=lambda t: sum(length for _, length in t[1]),  # stable: ties keep the given order
+    )
+    plan: List[Tuple[str, List[Range]]] = []
+    covered: List[Range] = []
+    for spec, ranges in ordered:
+        if sum(length for _, length in ranges) >= size:
+            continue
+        if all(any(o <= off and off + n <= o + ln for o, ln in covered) for off, n in ranges):
+            continue
+        plan.append((spec, ranges))
+        covered = _merge(covered + ranges)
+    return plan
+
+
+class TierStats:
+    __slots__ = ("files", "bytes_read", "eliminated", "bytes_avoided")
+
+    def __init__(self) -> None:
+        self.files = 0  # files sampled (cache misses and hits)
+        self.bytes_read = 0  # bytes actually read (cache hits read nothing)
+        self.eliminated = 0  # files this tier proved unique
+        self.bytes_avoided = 0  # full-hash bytes saved by those eliminations
+
+
+class ScanStats:
+    """Counters filled in by ``find_duplicates``; per-tier in ``tiers``."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.candidate_bytes = 0  # total size of files sharing a size
+        self.tiers: Dict[str, TierStats] = {}
+        self.full_files = 0
+        self.full_bytes_read = 0
+
+    def summary(self) -> List[str]:
+        lines = [f"files: {self.files}, same-size: {self.candidate_bytes:,} B"]
+        for spec, t in self.tiers.items():
+            lines.append(
+                f"{spec}: sampled {t.files} ({t.bytes_read:,} B read), "
+                f"ruled out {t.eliminated}, avoided {t.bytes_avoided:,} B"
+            )
+        lines.append(f"full: {self.full_files} files, {self.full_bytes_read:,} B read")
+        return lines
 
 
-def find_duplicates(directory: str) -> List[Tuple[str, List[str]]]:
+def find_duplicates(
+    directory: str,
+    cache: Optional[HashCache] = None,
+    workers: Optional[int] = None,
+    algorithm: str = DEFAULT_DIGEST,
+    prefilter: str = FAST_DIGEST,
+    tiers: Sequence[str] = DEFAULT_TIERS,
+    stats: Optional[ScanStats] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    with_keys: bool = False,
+) -> List[Tuple[str, List[Any]]]:
     """Find duplicate files by content efficiently.
 
     Strategy:
       1) Group files by size (cheap) and discard unique sizes.
-      2) Within same-size groups, group by a quick partial-hash of the first 256KB.
-      3) For groups still with >1 file, compute full SHA-256 and report duplicates.
+      2) Split same-size groups by ``prefilter`` digests of sampled byte
+         ranges, one round per tier (see ``plan_tiers``), dropping files
+         that no longer share a digest with any other.
+      3) For groups still with >1 file, compute the full ``algorithm`` digest and report duplicates.
+
+    Returned digests are tagged (``"sha256:..."``). ``algorithm`` must be
+    cryptographic; the fast digests are only good enough to rule files out.
+
+    Steps 2 and 3 read files on ``workers`` threads (default
+    ``IO_WORKERS``; 1 hashes serially); hashlib releases the GIL, so both
+    the reads and the hashing overlap. The result does not depend on it.
+
+    With a ``cache``, digests of files whose (device, inode, size, mtime)
+    are unchanged are reused instead of reread, and entries for files that
+    have disappeared from ``directory`` are evicted. Pass a ``ScanStats``
+    to see how many bytes each tier read and saved. With ``with_keys``,
+    each path comes as ``(path, (dev, ino, size, mtime_ns))`` as stat'ed
+    during the scan, so a caller acting on the result can tell files that
+    changed since.
+
+    ``iter_duplicates`` is the streaming variant; it takes the same arguments.
+    """
+    return list(iter_duplicates(
+        directory, cache, workers, algorithm, prefilter, tiers, stats, progress, cancel, with_keys
+    ))
+
+
+def iter_duplicates(
+    directory: str,
+    cache: Optional[HashCache] = None,
+    workers: Optional[int] = None,
+    algorithm: str = DEFAULT_DIGEST,
+    prefilter: str = FAST_DIGEST,
+    tiers: Sequence[str] = DEFAULT_TIERS,
+    stats: Optional[ScanStats] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    with_keys: bool = False,
+) -> Iterator[Tuple[str, List[Any]]]:
+    """Yield ``find_duplicates``' groups as soon as each is fully hashed.
+
+    ``progress`` receives a ``ScanProgress`` per stage (walk, each sampling
+    round, full hash) at most every PROGRESS_INTERVAL seconds. Setting
+    ``cancel`` raises ``Cancelled`` at the next file; digests computed so
+    far are still written to the cache.
     """
+    if not DIGESTS[algorithm].cryptographic:
+        raise ValueError(f"{algorithm} is only suitable as a prefilter")
+    DIGESTS[prefilter]  # fail early on an unknown name
+    for spec in tiers:
+        _parse_tier(spec)
+    workers = max(1, workers or IO_WORKERS)
+    stats = stats if stats is not None else ScanStats()
+    for spec in tiers:
+        stats.tiers.setdefault(spec, TierStats())
+    tracker = ProgressTracker(progress, cancel)
+    try:
+        for digest, files in _duplicate_groups(directory, cache, workers, algorithm, prefilter, tiers, stats, tracker):
+            yield digest, (files if with_keys else [path for path, _ in files])
+    finally:
+        if cache is not None:
+            cache.flush()
+
+
+def _duplicate_groups(
+    directory: str,
+    cache: Optional[HashCache],
+    workers: int,
+    algorithm: str,
+    prefilter: str,
+    tiers: Sequence[str],
+    stats: ScanStats,
+    tracker: ProgressTracker,
+) -> Iterator[Tuple[str, List[Tuple[str, FileKey]]]]:
     # Step 1: group by file size
-    size_groups: DefaultDict[int, List[str]] = defaultdict(list)
-    for root, _, files in os.walk(directory):
-        for name in files:
-            path = os.path.join(root, name)
-            try:
-                sz = os.path.getsize(path)
-            except Exception:
-                continue
-            size_groups[sz].append(path)
+    size_groups: DefaultDict[int, List[Tuple[str, FileKey]]] = defaultdict(list)
+    seen = set()
+    listed: Set[str] = set()
+    for path, st in _scan_files(directory, listed):
+        key = file_key(st)
+        seen.add(key[:2])
+        size_groups[key[2]].append((path, key))
+        stats.files += 1
+        tracker.advance(1, key[2])
+    if cache is not None:
+        cache.evict_missing(directory, seen, listed)
+
+    def cached(kind: str, path: str, key: FileKey, algo: str, compute: Callable[[str], str]) -> Tuple[str, bool]:
+        """(digest, whether the file was read)."""
+        if cache is not None:
+            digest = cache.get(key, kind, algo)
+            if digest is not None:
+                return digest, False
+        digest = compute(path)
+        if cache is not None and digest:
+            cache.put(key, os.path.abspath(path), kind, digest)
+        return digest, True
 
-    # Step 2: partial-hash groups
-    def partial_hash(path: str, nbytes: int = 256 * 1024) -> str:
-        h = hashlib.sha256()
+    # Step 2: sampled tiers, one round each
+    def sample_stage(task: Tuple[Tuple[str, FileKey], str, List[Range]]) -> Tuple[str, bool]:
+        (path, key), spec, ranges = task
         try:
-            with open(path, 'rb') as f:
-                chunk = f.read(nbytes)
-                h.update(chunk)
-            return h.hexdigest()
+            return cached(_tier_key(spec), path, key, prefilter, lambda p: sample_digest(p, ranges, prefilter))
         except Exception:
-            return ''  # unreadable files fall into their own bucket and will be ignored later
+            return '', False  # unreadable files are dropped
 
-    candidates: List[List[str]] = []
-    for sz, paths in size_groups.items():
-        if len(paths) <= 1:
-            continue
-        by_partial: DefaultDict[str, List[str]] = defaultdict(list)
-        for p in paths:
-            by_partial[partial_hash(p)].append(p)
-        for group in by_partial.values():
+    def full_stage(item: Tuple[str, FileKey]) -> Tuple[Optional[str], bool]:
+        try:
+            return cached("full", item[0], item[1], algorithm, lambda p: file_digest(p, algorithm))
+        except Exception:
+            return None, False  # Skip unreadable files
+
+    # Each active group holds same-size files and the tier plan for that size.
+    active = []
+    for size, files in size_groups.items():
+        if len(files) > 1:
+            active.append((files, plan_tiers(tiers, size)))
+            stats.candidate_bytes += size * len(files)
+    level = 0
+    while any(level < len(plan) for _, plan in active):
+        tasks = [(item, *plan[level]) for files, plan in active if level < len(plan) for item in files]
+        tracker.stage("sample", len(tasks), sum(length for _, _, ranges in tasks for _, length in ranges))
+        results = _bounded_map(sample_stage, tasks, workers)
+        next_active = []
+        for files, plan in active:
+            if level >= len(plan):
+                next_active.append((files, plan))
+                continue
+            spec, ranges = plan[level]
+            tier = stats.tiers[spec]
+            sampled = sum(length for _, length in ranges)
+            by_digest: DefaultDict[str, List[Tuple[str, FileKey]]] = defaultdict(list)
+            for item in files:
+                digest, read = next(results)
+                tracker.advance(1, sampled)
+                tier.files += 1
+                tier.bytes_read += sampled if read else 0
+                by_digest[digest].append(item)
+            for digest, group in by_digest.items():
+                if digest and len(group) > 1:
+                    next_active.append((group, plan))
+                else:
+                    tier.eliminated += len(group)
+                    tier.bytes_avoided += sum(key[2] for _, key in group)
+        active = next_active
+        level += 1
+
+    # Step 3: full hash each remaining group; files of different groups
+    # differ in size or in a sample, so a group is final once hashed.
+    flat = [item for files, _ in active for item in files]
+    tracker.stage("hash", len(flat), sum(key[2] for _, key in flat))
+    results = _bounded_map(full_stage, flat, workers)
+    for files, _ in active:
+        full_hashes: DefaultDict[str, List[Tuple[str, FileKey]]] = defaultdict(list)
+        for p, key in files:
+            h, read = next(results)
+            tracker.advance(1, key[2])
+            stats.full_files += 1
+            stats.full_bytes_read += key[2] if read else 0
+            if h is not None:
+                full_hashes[h].append((p, key))
+        for h, group in full_hashes.items():
             if len(group) > 1:
-                candidates.append(group)
+                yield h, group
+
+
+# ----- batch rename: plan in memory, apply as one transaction -----
+
+
+RENAME_SORT_KEYS = ("name", "mtime", "size")
+_RENAME_SORTS: Dict[str, Callable[[Tuple[str, Any]], Any]] = {
+    "name": lambda f: f[0],
+    "mtime": lambda f: (f[1].st_mtime_ns, f[0]),
+    "size": lambda f: (f[1].st_size, f[0]),
+}
+
+
+class Rename(NamedTuple):
+    src: str
+    dest: str
+    temp: Optional[str]  # parked here first when ``dest`` is another file's current name
+
+
+class RenamePlan(NamedTuple):
+    directory: str
+    renames: List[Rename]  # only files whose name changes, in sort order
+
+    def preview(self) -> List[str]:
+        """Dry-run lines, one per planned rename."""
+        return [f"Would rename: {os.path.basename(r.src)} -> {os.path.basename(r.dest)}" for r in self.renames]
+
+
+def plan_rename(
+    directory: str,
+    pattern: str = "file_{index}",
+    sort: str = "name",
+    reverse: bool = False,
+    start: int = 1,
+) -> RenamePlan:
+    """Plan renaming every file in ``directory`` after ``pattern``; touches nothing.
+
+    ``pattern`` is a ``str.format`` template for the new stem (the extension
+    is kept) with the fields ``index`` (``{index:03d}`` for a fixed width),
+    ``counter`` (the index zero-padded to the widest one), ``stem`` (the old
+    stem), ``date`` and ``mtime`` (the file's modification date and
+    datetime, e.g. ``{mtime:%Y%m%d-%H%M%S}``). Files are numbered from
+    ``start`` in ``sort`` order, one of RENAME_SORT_KEYS (ties by name).
 
-    # Step 3: full hash groups and collect duplicates
-    full_hashes: DefaultDict[str, List[str]] = defaultdict(list)
-    for group in candidates:
-        for p in group:
+    Names are resolved against a single listing of the folder: clashes get
+    ``_n`` suffixes without probing the filesystem, and a new name that is
+    another file's current name is reached through a temporary name, so
+    swaps and shifts (``file_2`` -> ``file_1`` -> ``file_2``) are safe.
+    """
+    if sort not in RENAME_SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(RENAME_SORT_KEYS)}")
+    try:
+        fields = {re.split(r"[.\[]", f, 1)[0] for _, f, _, _ in string.Formatter().parse(pattern) if f}
+    except ValueError as e:
+        raise ValueError(f"Bad rename pattern {pattern!r}: {e}") from None
+    dated = bool(fields & {"date", "mtime"})
+    need_stat = sort != "name" or dated
+
+    files: List[Tuple[str, Any]] = []  # (name, stat or None)
+    others: List[str] = []  # folders etc., which keep their names
+    with os.scandir(directory) as it:
+        for entry in it:
             try:
-                h = hash_file(p)
-                full_hashes[h].append(p)
-            except Exception:
-                # Skip unreadable files
-                continue
+                if entry.is_file():
+                    files.append((entry.name, entry.stat() if need_stat else None))
+                    continue
+            except OSError:
+                pass
+            others.append(entry.name)
+    files.sort(key=_RENAME_SORTS[sort], reverse=reverse)
+
+    width = len(str(start + len(files) - 1))
+    index = _NameIndex(suffix="_{n}")
+    index.reserve(directory, others)
+    new_names = []
+    for i, (name, st) in enumerate(files, start):
+        stem, ext = os.path.splitext(name)
+        mtime = datetime.fromtimestamp(st.st_mtime) if dated else None
+        try:
+            new_stem = pattern.format(
+                index=i, counter=str(i).zfill(width), stem=stem, date=mtime and mtime.date(), mtime=mtime
+            )
+        except (KeyError, IndexError, ValueError, AttributeError) as e:
+            raise ValueError(f"Bad rename pattern {pattern!r}: {e!r}") from None
+        new = new_stem + ext
+        if not new_stem or new in (".", "..") or os.sep in new or (os.altsep and os.altsep in new):
+            raise ValueError(f"Pattern {pattern!r} gives an invalid name: {new!r}")
+        new_names.append(index.claim(directory, new))
+
+    moving = [(name, new) for (name, _), new in zip(files, new_names) if new != name]
+    sources = {os.path.normcase(name) for name, _ in moving}
+    # Temporary names must not clash with current names either.
+    index.reserve(directory, (name for name, _ in files))
+    renames = []
+    for name, new in moving:
+        temp = None
+        if os.path.normcase(new) in sources:
+            temp = os.path.join(directory, index.claim(directory, f".{name}.renaming"))
+        renames.append(Rename(os.path.join(directory, name), os.path.join(directory, new), temp))
+    return RenamePlan(directory, renames)
+
+
+def _rename_steps(plan: RenamePlan) -> List[Tuple[str, str, bool]]:
+    """(src, dest, from_temp) for each ``os.rename``, in order.
+
+    Parked files move to their temporary names first; once every other
+    file has moved, all the old names are free for them.
+    """
+    parked = [r for r in plan.renames if r.temp]
+    return (
+        [(r.src, r.temp, False) for r in parked]
+        + [(r.src, r.dest, False) for r in plan.renames if not r.temp]
+        + [(r.temp, r.dest, True) for r in parked]
+    )
 
-    return [(h, paths) for h, paths in full_hashes.items() if len(paths) > 1]
 
+def apply_rename(
+    plan: RenamePlan,
+    journal_path: Optional[str] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[str]:
+    """Carry out ``plan`` as one transaction; returns a log line per file.
 
-def batch_rename(directory: str, pattern: str = "file_{index}") -> List[str]:
+    All the steps are written to the JSON-lines journal (and fsynced) before
+    the first rename, so ``rollback_rename`` can undo a finished run or one
+    a crash interrupted. If a rename fails or ``cancel`` is set, the steps
+    already done are undone before the error (or ``Cancelled``) is raised:
+    the folder is left as it was.
+    """
+    steps = _rename_steps(plan)
+    if journal_path is not None:
+        with open(journal_path, "w", encoding="utf-8") as journal:
+            for src, dest, from_temp in steps:
+                journal.write(json.dumps({"src": src, "dest": dest, "from_temp": from_temp}) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+    tracker = ProgressTracker(progress, cancel)
+    tracker.stage("rename", len(steps))
+    done = 0
+    try:
+        for src, dest, _ in steps:
+            tracker.advance(0)  # cancellation point
+            os.rename(src, dest)
+            done += 1
+            tracker.advance()
+    except (OSError, Cancelled):
+        for src, dest, _ in reversed(steps[:done]):
+            os.rename(dest, src)
+        if journal_path is not None:
+            os.remove(journal_path)  # nothing left to undo
+        raise
+    return [f"Renamed: {os.path.basename(r.src)} -> {os.path.basename(r.dest)}" for r in plan.renames]
+
+
+def rollback_rename(
+    journal_path: str,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[str]:
+    """Undo an ``apply_rename`` run from its journal; returns log lines.
+
+    Steps are undone newest first, each only if it visibly happened (its
+    destination exists and its source name is free), so a run that stopped
+    part way is undone as far as it got.
+    """
+    with open(journal_path, encoding="utf-8") as f:
+        steps = [json.loads(line) for line in f if line.strip()]
+    tracker = ProgressTracker(progress, cancel)
+    tracker.stage("rollback", len(steps))
     logs: List[str] = []
-    files = [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
-    for idx, name in enumerate(files, start=1):
-        _, ext = os.path.splitext(name)
-        new_name = f"{pattern.format(index=idx)}{ext}"
-        src = os.path.join(directory, name)
-        dst = os.path.join(directory, new_name)
-        counter = 1
-        while os.path.exists(dst):
-            dst = os.path.join(directory, f"{pattern.format(index=idx)}_{counter}{ext}")
-            counter += 1
-        os.rename(src, dst)
-        logs.append(f"Renamed: {name} -> {os.path.basename(dst)}")
+    for step in reversed(steps):
+        tracker.advance(0)
+        src, dest = step["src"], step["dest"]
+        if os.path.lexists(dest) and not os.path.lexists(src):
+            try:
+                os.rename(dest, src)
+                if not step["from_temp"]:
+                    logs.append(f"Restored: {os.path.basename(src)}")
+            except OSError as e:
+                logs.append(f"Skipped: {os.path.basename(dest)} ({e.strerror or e})")
+        tracker.advance()
     return logs
+
+
+def batch_rename(
+    directory: str,
+    pattern: str = "file_{index}",
+    sort: str = "name",
+    reverse: bool = False,
+    journal_path: Optional[str] = None,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[str]:
+    """Rename every file in ``directory`` after ``pattern``, all or nothing.
+
+    See ``plan_rename`` for the template fields and ``apply_rename`` for the
+    journal; ``plan_rename(...).preview()`` is the dry run.
+    """
+    return apply_rename(plan_rename(directory, pattern, sort, reverse), journal_path, progress, cancel)
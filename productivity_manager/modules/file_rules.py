@@ -0,0 +1,272 @@
+"""Rule-based file classification for the organizer.
+
+A rule names a category and any of: extensions, glob patterns, a size
+range, an age range (by mtime) and content signatures ("magic"). All the
+criteria a rule sets must hold; the first matching rule wins. Custom rules
+from the config come first, then one extension rule per
+``FILE_CATEGORIES`` entry. A file no rule claims is sniffed (unless
+``sniff="never"``) and filed by its signature, so extensionless or
+mislabelled files still land somewhere sensible.
+
+``Classifier`` compiles the rules once: an extension -> rules table, one
+combined regex for all globs, and a byte trie of signatures, which reads a
+single header of at most HEADER_BYTES. Sniff results are cached by
+(device, inode, mtime), so re-classifying a folder costs about a stat per
+file.
+"""
+import fnmatch
+import functools
+import os
+import re
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from ..utils.constants import FILE_CATEGORIES
+
+
+OTHER_CATEGORY = "Other"
+SNIFF_MODES = ("never", "unknown", "always")  # when to read headers for the fallback
+
+# kind: (category, signature alternatives); a signature is (offset, bytes) parts.
+SIGNATURES: Dict[str, Tuple[str, Tuple[Tuple[Tuple[int, bytes], ...], ...]]] = {
+    "png": ("Images", (((0, b"\x89PNG\r\n\x1a\n"),),)),
+    "jpeg": ("Images", (((0, b"\xff\xd8\xff"),),)),
+    "gif": ("Images", (((0, b"GIF87a"),), ((0, b"GIF89a"),))),
+    "webp": ("Images", (((0, b"RIFF"), (8, b"WEBP")),)),
+    "tiff": ("Images", (((0, b"II*\x00"),), ((0, b"MM\x00*"),))),
+    "pdf": ("Documents", (((0, b"%PDF-"),),)),
+    "rtf": ("Documents", (((0, b"{\\rtf"),),)),
+    "zip": ("Archives", (((0, b"PK\x03\x04"),),)),
+    "gzip": ("Archives", (((0, b"\x1f\x8b"),),)),
+    "7z": ("Archives", (((0, b"7z\xbc\xaf\x27\x1c"),),)),
+    "rar": ("Archives", (((0, b"Rar!\x1a\x07"),),)),
+    "tar": ("Archives", (((257, b"ustar"),),)),
+    "mp3": ("Audio", (((0, b"ID3"),),)),
+    "flac": ("Audio", (((0, b"fLaC"),),)),
+    "ogg": ("Audio", (((0, b"OggS"),),)),
+    "wav": ("Audio", (((0, b"RIFF"), (8, b"WAVE")),)),
+    "mp4": ("Video", (((4, b"ftyp"),),)),
+    "mkv": ("Video", (((0, b"\x1a\x45\xdf\xa3"),),)),
+    "avi": ("Video", (((0, b"RIFF"), (8, b"AVI ")),)),
+    "exe": ("Installers", (((0, b"MZ"),),)),
+}
+# One read covers every signature.
+HEADER_BYTES = max(off + len(part) for _, alts in SIGNATURES.values() for sig in alts for off, part in sig)
+SNIFF_CACHE_SIZE = 100_000
+
+
+class Rule(NamedTuple):
+    category: str
+    exts: FrozenSet[str] = frozenset()  # lower-case, with the dot; ".tar.gz" works
+    globs: Tuple[str, ...] = ()  # matched case-insensitively against the name
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    older_than_days: Optional[float] = None
+    newer_than_days: Optional[float] = None
+    magic: FrozenSet[str] = frozenset()  # SIGNATURES kinds
+
+
+def rule_from_dict(d: Mapping[str, Any]) -> Rule:
+    """Build a Rule from a config entry; ValueError names what is wrong."""
+    if not d.get("category"):
+        raise ValueError("rule needs a category")
+    unknown = set(d) - set(Rule._fields) - {"ext"}
+    if unknown:
+        raise ValueError(f"unknown rule keys: {', '.join(sorted(unknown))}")
+    exts = d.get("exts", d.get("ext", ()))
+    globs = d.get("globs", ())
+    magic = d.get("magic", ())
+    if isinstance(exts, str):
+        exts = [exts]
+    if isinstance(globs, str):
+        globs = [globs]
+    if isinstance(magic, str):
+        magic = [magic]
+    bad = set(magic) - set(SIGNATURES)
+    if bad:
+        raise ValueError(f"unknown magic kinds: {', '.join(sorted(bad))}")
+    return Rule(
+        category=str(d["category"]),
+        exts=frozenset(("." + e.lower().lstrip(".")) for e in exts),
+        globs=tuple(globs),
+        min_size=d.get("min_size"),
+        max_size=d.get("max_size"),
+        older_than_days=d.get("older_than_days"),
+        newer_than_days=d.get("newer_than_days"),
+        magic=frozenset(magic),
+    )
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = tuple(
+    Rule(category, frozenset(ext.lower() for ext in exts)) for category, exts in FILE_CATEGORIES.items()
+)
+
+
+class _Trie:
+    """Byte trie over the offset-0 part of each signature."""
+
+    def __init__(self) -> None:
+        self.root: Dict[int, Any] = {}
+
+    def add(self, prefix: bytes, kind: str, rest: Tuple[Tuple[int, bytes], ...]) -> None:
+        node = self.root
+        for b in prefix:
+            node = node.setdefault(b, {})
+        node.setdefault(None, []).append((kind, rest))
+
+    def match(self, header: bytes) -> Optional[str]:
+        """Kind of the longest signature ``header`` starts with."""
+        node, found = self.root, []
+        for b in header:
+            node = node.get(b)
+            if node is None:
+                break
+            found.append(node.get(None, ()))
+        for terminals in reversed(found):
+            for kind, rest in terminals:
+                if all(header[off:off + len(part)] == part for off, part in rest):
+                    return kind
+        return None
+
+
+class Classifier:
+    """Compiled rules; ``classify`` is safe to call from several threads."""
+
+    def __init__(self, rules: Iterable[Rule] = (), sniff: str = "unknown", use_defaults: bool = True):
+        if sniff not in SNIFF_MODES:
+            raise ValueError(f"sniff must be one of {', '.join(SNIFF_MODES)}")
+        self.sniff_mode = sniff
+        self.rules: List[Rule] = list(rules) + (list(DEFAULT_RULES) if use_defaults else [])
+        self._by_ext: Dict[str, List[int]] = {}
+        self._glob_only: List[int] = []  # globs, no extensions
+        self._free: List[int] = []  # neither: size/age/magic rules apply to every name
+        patterns = []
+        for i, rule in enumerate(self.rules):
+            for ext in rule.exts:
+                self._by_ext.setdefault(ext, []).append(i)
+            if rule.globs:
+                patterns += [fnmatch.translate(g) for g in rule.globs]
+                if not rule.exts:
+                    self._glob_only.append(i)
+            elif not rule.exts:
+                self._free.append(i)
+        self._globs = [re.compile("|".join(fnmatch.translate(g) for g in r.globs), re.I) if r.globs else None
+                       for r in self.rules]
+        self._any_glob = re.compile("|".join(patterns), re.I) if patterns else None
+        self._max_ext_dots = max((ext.count(".") for ext in self._by_ext), default=1)
+
+        self._trie = _Trie()
+        self._offset_sigs: List[Tuple[str, Tuple[Tuple[int, bytes], ...]]] = []
+        for kind, (_, alternatives) in SIGNATURES.items():
+            for sig in alternatives:
+                if sig[0][0] == 0:
+                    self._trie.add(sig[0][1], kind, sig[1:])
+                else:
+                    self._offset_sigs.append((kind, sig))
+        self._sniffed: Dict[Tuple[int, int], Tuple[int, Optional[str]]] = {}  # (dev, ino) -> (mtime_ns, kind)
+        self.reads = 0  # headers actually read (cache misses)
+
+    def _suffixes(self, name: str) -> List[str]:
+        lower = name.lower()
+        out, pos = [], len(lower)
+        for _ in range(self._max_ext_dots):
+            pos = lower.rfind(".", 0, pos)
+            if pos <= 0:
+                break
+            out.append(lower[pos:])
+        return out
+
+    def sniff(self, path: str, st: Optional[os.stat_result] = None) -> Optional[str]:
+        """Signature kind of a file's header, or None; cached per inode and mtime."""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_dev, st.st_ino)
+        hit = self._sniffed.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and st.st_ino:
+            return hit[1]
+        try:
+            with open(path, "rb") as f:
+                header = f.read(HEADER_BYTES)
+        except OSError:
+            return None
+        self.reads += 1
+        kind = self._trie.match(header)
+        if kind is None:
+            for k, sig in self._offset_sigs:
+                if all(header[off:off + len(part)] == part for off, part in sig):
+                    kind = k
+                    break
+        if len(self._sniffed) >= SNIFF_CACHE_SIZE:
+            self._sniffed.clear()
+        self._sniffed[key] = (st.st_mtime_ns, kind)
+        return kind
+
+    def by_name(self, name: str) -> str:
+        """Category from the name alone: the first rule with no size, age or magic criteria."""
+        for suffix in self._suffixes(name):
+            for i in self._by_ext.get(suffix, ()):
+                rule = self.rules[i]
+                glob = self._globs[i]
+                if (rule == Rule(rule.category, rule.exts, rule.globs)
+                        and (glob is None or glob.match(name))):
+                    return rule.category
+        return OTHER_CATEGORY
+
+    def classify(self, path: str, st: Optional[os.stat_result] = None, now: Optional[float] = None) -> str:
+        """Category for the file at ``path`` (``st`` saves a stat if known)."""
+        name = os.path.basename(path)
+        if self.sniff_mode == "always":
+            kind = self.sniff(path, st)
+            if kind is not None:
+                return SIGNATURES[kind][0]
+
+        candidates: List[int] = []
+        for suffix in self._suffixes(name):
+            candidates += self._by_ext.get(suffix, ())
+        if self._glob_only and self._any_glob is not None and self._any_glob.match(name):
+            candidates += self._glob_only
+        candidates += self._free
+        if len(candidates) > 1:
+            candidates = sorted(set(candidates))
+
+        for i in candidates:
+            rule = self.rules[i]
+            glob = self._globs[i]
+            if glob is not None and not glob.match(name):
+                continue
+            if (rule.min_size is not None or rule.max_size is not None
+                    or rule.older_than_days is not None or rule.newer_than_days is not None):
+                try:
+                    st = st or os.stat(path)
+                except OSError:
+                    continue
+                if rule.min_size is not None and st.st_size < rule.min_size:
+                    continue
+                if rule.max_size is not None and st.st_size > rule.max_size:
+                    continue
+                age_days = ((now if now is not None else time.time()) - st.st_mtime) / 86400
+                if rule.older_than_days is not None and age_days < rule.older_than_days:
+                    continue
+                if rule.newer_than_days is not None and age_days > rule.newer_than_days:
+                    continue
+            if rule.magic and self.sniff(path, st) not in rule.magic:
+                continue
+            return rule.category
+
+        if self.sniff_mode == "unknown":
+            kind = self.sniff(path, st)
+            if kind is not None:
+                return SIGNATURES[kind][0]
+        return OTHER_CATEGORY
+
+
+def classifier_from_config(section: Mapping[str, Any]) -> Classifier:
+    """Classifier for a config's ``file_organizer`` section (``rules``, ``sniff``)."""
+    return Classifier([rule_from_dict(d) for d in section.get("rules") or ()], section.get("sniff", "unknown"))
+
+
+@functools.lru_cache(maxsize=1)
+def default_classifier() -> Classifier:
+    return Classifier()
@@ -0,0 +1,218 @@
+"""Watch a folder (e.g. Downloads) and organize new files as they settle.
+
+Changes come from Linux inotify (through ctypes, no extra dependency) or,
+elsewhere, from polling the folder's (size, mtime) snapshot. Only changed
+names are looked at: each one waits until its size and mtime have stayed
+put for ``settle_seconds`` and it is not an in-progress download
+(``.part``, ``.crdownload``, ...), then the settled batch is planned with
+``plan_organize(names=...)`` and applied. The folder is never rescanned
+as a whole except by the polling backend, or after an inotify overflow.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .file_organizer import apply_plan, plan_organize
+from .file_rules import Classifier
+
+
+# Names browsers and download tools use while a file is still being written.
+PARTIAL_SUFFIXES = (".part", ".partial", ".crdownload", ".download", ".opdownload", ".tmp", ".!qb")
+
+Signature = Tuple[int, int]  # (size, mtime_ns)
+
+
+def is_partial(name: str) -> bool:
+    """True for in-progress downloads and hidden/temporary files."""
+    return name.startswith(".") or name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+def _snapshot(directory: str) -> Dict[str, Signature]:
+    snap: Dict[str, Signature] = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        snap[entry.name] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return snap
+
+
+class PollingBackend:
+    """Diff the folder's (size, mtime) snapshot every ``interval`` seconds."""
+
+    name = "polling"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._snap = _snapshot(directory)
+
+    def changes(self, timeout: float, stop: threading.Event) -> Set[str]:
+        if stop.wait(timeout):
+            return set()
+        snap = _snapshot(self.directory)
+        changed = {name for name, sig in snap.items() if self._snap.get(name) != sig}
+        self._snap = snap
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyBackend:
+    """Linux inotify on the folder itself (not its subfolders)."""
+
+    name = "inotify"
+    # linux/inotify.h
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    _EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+    def __init__(self, directory: str):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.directory = directory
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, os.strerror(err), directory)
+        self._started_ns = time.time_ns()
+
+    def changes(self, timeout: float, stop: threading.Event) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(data):
+                _, mask, _, length = self._EVENT.unpack_from(data, pos)
+                pos += self._EVENT.size
+                name = data[pos:pos + length].rstrip(b"\0")
+                pos += length
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were lost: fall back to anything touched since we started.
+                    changed |= {n for n, sig in _snapshot(self.directory).items() if sig[1] >= self._started_ns}
+                elif name and not mask & self.IN_ISDIR:
+                    changed.add(os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def make_backend(directory: str, backend: str = "auto"):
+    """``"inotify"``, ``"polling"`` or ``"auto"`` (inotify where it works)."""
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyBackend(directory)
+        except (OSError, AttributeError):  # AttributeError: libc without inotify
+            if backend == "inotify":
+                raise
+    elif backend != "polling":
+        raise ValueError(f"Unknown watch backend: {backend}")
+    return PollingBackend(directory)
+
+
+class FolderWatcher:
+    """Organize files arriving in ``directory`` (top level only).
+
+    ``start()`` runs the loop on a daemon thread; ``on_log`` then gets each
+    batch's log lines on that thread. ``step()`` runs one iteration
+    synchronously and returns them.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        on_log: Optional[Callable[[List[str]], None]] = None,
+        settle_seconds: float = 2.0,
+        interval: float = 1.0,
+        backend: str = "auto",
+        classifier: Optional[Classifier] = None,
+    ):
+        self.directory = directory
+        self.classifier = classifier
+        self.on_log = on_log
+        self.settle_seconds = settle_seconds
+        self.interval = interval
+        self._backend = make_backend(directory, backend)
+        self._pending: Dict[str, Optional[Tuple[Signature, float]]] = {}  # name -> (signature, since)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backend(self) -> str:
+        return self._backend.name
+
+    def step(self, timeout: float = 0.0) -> List[str]:
+        """Collect changes for up to ``timeout`` seconds and organize what has settled."""
+        wait = timeout if not self._pending else min(timeout, self.settle_seconds)
+        for name in self._backend.changes(wait, self._stop):
+            self._pending[name] = None
+        now = time.monotonic()
+        ready = []
+        for name, seen in list(self._pending.items()):
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                del self._pending[name]  # gone (e.g. a .part renamed to its final name)
+                continue
+            if is_partial(name) or not stat.S_ISREG(st.st_mode):
+                del self._pending[name]  # the rename to the final name is its own change
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            if seen is None or seen[0] != sig:
+                self._pending[name] = (sig, now)  # still being written
+            elif now - seen[1] >= self.settle_seconds:
+                ready.append(name)
+                del self._pending[name]
+        if not ready:
+            return []
+        return list(apply_plan(plan_organize(self.directory, names=sorted(ready), classifier=self.classifier)))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                logs = self.step(self.interval)
+            except OSError as e:  # e.g. the folder went away; keep watching
+                logs = [f"Watch error: {e}"]
+                self._stop.wait(self.interval)
+            if logs and self.on_log is not None:
+                self.on_log(logs)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._backend.close()
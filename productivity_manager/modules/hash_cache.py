@@ -0,0 +1,177 @@
+"""On-disk cache of file digests for find_duplicates.
+
+Entries are keyed by (st_dev, st_ino) and trusted only while st_size and
+st_mtime_ns still match, so a modified or replaced file is rehashed and
+its old entry overwritten. Digests are stored tagged with their algorithm
+(``"sha256:..."``); a lookup for another algorithm is a miss. Besides the
+full digest, each entry keeps the sampled pre-filter digests by tier name,
+packed into the ``partial`` column as ``"tier=digest tier=digest"``.
+
+The cache lives in its own SQLite file (next to productivity.db in the
+app) so long scans never contend with the app's database.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS file_hashes (
+        dev INTEGER NOT NULL,
+        ino INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        path TEXT NOT NULL,
+        partial TEXT,
+        full TEXT,
+        seen_at INTEGER NOT NULL,
+        PRIMARY KEY (dev, ino)
+    ) WITHOUT ROWID
+"""
+
+FileKey = Tuple[int, int, int, int]  # (dev, ino, size, mtime_ns)
+
+
+def file_key(st: os.stat_result) -> FileKey:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _samples(packed: Optional[str]) -> Dict[str, str]:
+    # Entries without "=" predate sampling tiers and are ignored.
+    return dict(item.split("=", 1) for item in (packed or "").split() if "=" in item)
+
+
+class HashCache:
+    """Digest cache; writes are buffered and committed by ``flush``.
+
+    Safe to share between threads (one connection behind a lock).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_file_hashes_path ON file_hashes(path)")
+        self._pending: Dict[Tuple[int, int], tuple] = {}  # (dev, ino) -> row to write
+        self._touched: Set[Tuple[int, int]] = set()  # hits whose seen_at to refresh
+        self.hits = 0
+        self.misses = 0
+
+    def _row(self, dev: int, ino: int) -> Optional[tuple]:
+        # Caller holds self._lock.
+        row = self._pending.get((dev, ino))
+        if row is None:
+            row = self._conn.execute(
+                "SELECT dev, ino, size, mtime_ns, path, partial, full FROM file_hashes WHERE dev = ? AND ino = ?",
+                (dev, ino),
+            ).fetchone()
+        return row
+
+    def get(self, key: FileKey, kind: str, algorithm: Optional[str] = None) -> Optional[str]:
+        """Cached ``"full"`` digest, or the digest of sampling tier ``kind``, for an unchanged file.
+
+        With ``algorithm``, only a digest tagged with it counts as a hit.
+        """
+        dev, ino, size, mtime_ns = key
+        with self._lock:
+            row = self._row(dev, ino)
+            digest = None
+            if row is not None and row[2] == size and row[3] == mtime_ns:
+                digest = row[6] if kind == "full" else _samples(row[5]).get(kind)
+                if digest and algorithm and not digest.startswith(algorithm + ":"):
+                    digest = None
+            if digest is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._touched.add((dev, ino))
+            return digest
+
+    def put(self, key: FileKey, path: str, kind: str, digest: str) -> None:
+        """Record one digest (``"full"`` or a tier name) for ``key``; others already known are kept."""
+        dev, ino, size, mtime_ns = key
+        samples: Dict[str, str] = {}
+        full = None
+        with self._lock:
+            old = self._row(dev, ino)
+            if old is not None and (old[2], old[3]) == (size, mtime_ns):
+                samples, full = _samples(old[5]), old[6]
+            if kind == "full":
+                full = digest
+            else:
+                samples[kind] = digest
+            partial = " ".join(f"{k}={v}" for k, v in samples.items()) or None
+            self._pending[(dev, ino)] = (dev, ino, size, mtime_ns, path, partial, full)
+
+    def flush(self) -> None:
+        """Commit buffered entries (and last-seen times of hits) in one transaction."""
+        with self._lock:
+            if not self._pending and not self._touched:
+                return
+            now = int(time.time())
+            rows = [r + (now,) for r in self._pending.values()]
+            touched = [(now, dev, ino) for dev, ino in self._touched if (dev, ino) not in self._pending]
+            self._pending.clear()
+            self._touched.clear()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO file_hashes (dev, ino, size, mtime_ns, path, partial, full, seen_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.executemany("UPDATE file_hashes SET seen_at = ? WHERE dev = ? AND ino = ?", touched)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def evict_missing(
+        self, root: str, seen: Set[Tuple[int, int]], listed: Optional[Set[str]] = None
+    ) -> int:
+        """Drop entries under ``root`` whose (dev, ino) a full scan did not see.
+
+        With ``listed``, only entries directly inside those directories are
+        dropped, so a subtree the scan could not read keeps its entries.
+        """
+        prefix = os.path.join(os.path.abspath(root), "")
+        # Range scan on the path index instead of LIKE (no escaping needed).
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        dirs = None if listed is None else {os.path.abspath(d) for d in listed}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dev, ino, path FROM file_hashes WHERE path >= ? AND path < ?", (prefix, upper)
+            ).fetchall()
+            gone = [
+                (dev, ino) for dev, ino, path in rows
+                if (dev, ino) not in seen and (dirs is None or os.path.dirname(path) in dirs)
+            ]
+            for dev, ino in gone:
+                self._pending.pop((dev, ino), None)
+                self._touched.discard((dev, ino))
+            if gone:
+                self._conn.executemany("DELETE FROM file_hashes WHERE dev = ? AND ino = ?", gone)
+            return len(gone)
+
+    def evict_older_than(self, days: float) -> int:
+        """Drop entries not refreshed for ``days`` (roots no longer scanned)."""
+        cutoff = int(time.time() - days * 86400)
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM file_hashes WHERE seen_at < ?", (cutoff,))
+            return max(cur.rowcount, 0)
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,38 @@
+"""Scheduled archival and database upkeep.
+
+Settings come from the config's ``"maintenance"`` section; a day count of
+0 turns that archival step off.
+"""
+from typing import Any, Dict, Mapping, Optional
+
+from ..database import maintenance
+from . import time_stats
+from .todo_manager import TodoManager
+
+
+DEFAULTS: Dict[str, Any] = {
+    "interval_hours": 24,
+    "archive_completed_after_days": 30,
+    "archive_time_entries_after_days": 365,
+    "vacuum_pages": 1000,
+}
+
+
+def settings_from(cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    """DEFAULTS overlaid with the config's maintenance section."""
+    return {**DEFAULTS, **(cfg.get("maintenance") or {})}
+
+
+def run_maintenance(todos: TodoManager, settings: Optional[Mapping[str, Any]] = None) -> Dict[str, int]:
+    """Archive cold rows, then ANALYZE/optimize and reclaim free pages.
+
+    Blocking; run it off the Tk thread. Returns counts for the status bar.
+    """
+    s = {**DEFAULTS, **(settings or {})}
+    result = {"todos_archived": 0, "time_entries_archived": 0}
+    if int(s["archive_completed_after_days"]) > 0:
+        result["todos_archived"] = todos.archive_completed(int(s["archive_completed_after_days"]))
+    if int(s["archive_time_entries_after_days"]) > 0:
+        result["time_entries_archived"] = time_stats.archive_entries(todos.db, int(s["archive_time_entries_after_days"]))
+    result.update(maintenance.optimize(todos.db, int(s["vacuum_pages"])))
+    return result
@@ -0,0 +1,131 @@
+"""Daily/weekly/monthly time statistics read from ``time_rollups``.
+
+Every query touches one row per (bucket, task), never the raw entries.
+Run ``python -m productivity_manager.modules.time_stats rebuild`` to
+recompute the rollups after editing ``time_entries`` by hand.
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from ..database import maintenance, rollups
+from ..database.db_manager import DBManager
+from ..database.models import TimeEntry, time_entry_row
+
+
+def bucket_for(period: str, when: Optional[datetime] = None) -> str:
+    """Bucket label of ``period`` containing ``when`` (default: now)."""
+    if period not in rollups.PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    keys = rollups.bucket_keys(when or datetime.now())
+    return keys[rollups.PERIODS.index(period)]
+
+
+def totals(
+    db: DBManager,
+    period: str = "day",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    task_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Seconds and sessions per bucket in [start, end], oldest first.
+
+    ``task_id`` limits the result to one task (0 means entries without one);
+    otherwise all tasks are summed.
+    """
+    if period not in rollups.PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    clauses = ["period = ?"]
+    params: List[Any] = [period]
+    if start is not None:
+        clauses.append("bucket >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("bucket <= ?")
+        params.append(end)
+    if task_id is not None:
+        clauses.append("task_id = ?")
+        params.append(task_id)
+    rows = db.query(
+        f"""
+        SELECT bucket, SUM(seconds) AS seconds, SUM(sessions) AS sessions
+        FROM time_rollups WHERE {' AND '.join(clauses)}
+        GROUP BY bucket ORDER BY bucket
+        """,
+        params,
+    )
+    return [dict(r) for r in rows]
+
+
+def by_task(db: DBManager, period: str, bucket: str) -> List[Dict[str, Any]]:
+    """Per-task breakdown of one bucket, largest first."""
+    rows = db.query(
+        """
+        SELECT r.task_id, t.title, r.seconds, r.sessions
+        FROM time_rollups r LEFT JOIN todos t ON t.id = r.task_id
+        WHERE r.period = ? AND r.bucket = ?
+        ORDER BY r.seconds DESC
+        """,
+        (period, bucket),
+    )
+    return [dict(r) for r in rows]
+
+
+def recent_entries(db: DBManager, limit: int = 50, task_id: Optional[int] = None) -> List[TimeEntry]:
+    """Latest raw sessions, newest first."""
+    if task_id is None:
+        return db.query("SELECT * FROM time_entries ORDER BY id DESC LIMIT ?", (limit,), time_entry_row)
+    return db.query(
+        "SELECT * FROM time_entries WHERE task_id = ? ORDER BY id DESC LIMIT ?", (task_id, limit), time_entry_row
+    )
+
+
+def archive_entries(db: DBManager, older_than_days: int = 365, batch_size: int = maintenance.ARCHIVE_BATCH) -> int:
+    """Move sessions that ended more than ``older_than_days`` ago to the archive.
+
+    Rollups already include them and are left unchanged.
+    """
+    cutoff = (datetime.now() - timedelta(days=int(older_than_days))).isoformat(timespec="seconds")
+    return len(maintenance.archive_rows(db, "time_entries", "end_time < ?", (cutoff,), batch_size))
+
+
+def rebuild_rollups(db: DBManager) -> int:
+    """Recompute every rollup from time_entries; returns entries processed."""
+    with db.transaction() as conn:
+        return rollups.rebuild(conn)
+
+
+def _format_seconds(seconds: int) -> str:
+    h, rem = divmod(int(seconds), 3600)
+    return f"{h}:{rem // 60:02d}:{rem % 60:02d}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    default_db = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "productivity.db")
+    parser = argparse.ArgumentParser(description="Time-tracking rollups")
+    parser.add_argument("--db", default=default_db, help="path to productivity.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="recompute rollups from time_entries")
+    show = sub.add_parser("show", help="print totals per bucket")
+    show.add_argument("--period", choices=rollups.PERIODS, default="day")
+    show.add_argument("--start")
+    show.add_argument("--end")
+    show.add_argument("--task", type=int)
+    args = parser.parse_args(argv)
+
+    db = DBManager(args.db)
+    db.initialize()
+    try:
+        if args.command == "rebuild":
+            print(f"Rebuilt rollups from {rebuild_rollups(db)} entries")
+        else:
+            for row in totals(db, args.period, args.start, args.end, args.task):
+                print(f"{row['bucket']}\t{_format_seconds(row['seconds'])}\t{row['sessions']}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
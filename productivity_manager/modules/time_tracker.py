@@ -1,24 +1,56 @@
 import time
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Optional
+from typing import Callable, List, Optional
 
+from ..database import rollups
 from ..database.db_manager import DBManager
+from ..database.write_queue import WriteQueue
+
+
+_INSERT_SQL = """
+    INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds, notes)
+    VALUES (?, ?, ?, ?, ?)
+"""
 
 
 class Timer:
-    def __init__(self, db: DBManager, task_id: Optional[int] = None):
+    def __init__(self, db: DBManager, task_id: Optional[int] = None, writer: Optional[WriteQueue] = None):
         self.db = db
         self.task_id = task_id
+        self.writer = writer
         self._start_ts: Optional[float] = None
         self._elapsed: float = 0.0
+        self._listeners: List[Callable[[int], None]] = []
+
+    def subscribe(self, listener: Callable[[int], None]) -> Callable[[], None]:
+        """Call ``listener(entry_id)`` once each stopped session is committed."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _emit(self, fut: Future) -> None:
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        for listener in list(self._listeners):
+            listener(int(fut.result()))
 
     def start(self):
         if self._start_ts is None:
             self._start_ts = time.time()
 
     def stop(self, notes: str = "") -> int:
+        return int(self.stop_async(notes).result())
+
+    def stop_async(self, notes: str = "") -> Future:
+        """Stop and persist the session; the future resolves to the entry id.
+
+        With a writer the insert is queued and the caller does not wait on
+        the disk; otherwise the returned future is already resolved.
+        """
+        done: Future = Future()
         if self._start_ts is None:
-            return 0
+            done.set_result(0)
+            return done
         now = time.time()
         self._elapsed += now - self._start_ts
         self._start_ts = None
@@ -26,15 +58,22 @@ class Timer:
         # persist entry
         start_iso = datetime.fromtimestamp(now - self._elapsed).isoformat(timespec='seconds')
         end_iso = datetime.fromtimestamp(now).isoformat(timespec='seconds')
-        cur = self.db.execute(
-            """
-            INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds, notes)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (self.task_id, start_iso, end_iso, seconds, notes),
-        )
+        params = (self.task_id, start_iso, end_iso, seconds, notes)
         self._elapsed = 0.0
-        return int(cur.lastrowid)
+
+        def persist(conn) -> int:
+            # The entry and its rollup increments commit or fail together.
+            entry_id = int(conn.execute(_INSERT_SQL, params).lastrowid)
+            rollups.apply_entry(conn, params[0], start_iso, end_iso, seconds)
+            return entry_id
+
+        if self.writer is not None:
+            done = self.writer.submit_call(persist)
+        else:
+            with self.db.transaction() as conn:
+                done.set_result(persist(conn))
+        done.add_done_callback(self._emit)
+        return done
 
     def reset(self):
         self._start_ts = None
@@ -44,3 +83,4 @@ class Timer:
         if self._start_ts is None:
             return int(self._elapsed)
         return int(self._elapsed + (time.time() - self._start_ts))
+
@@ -1,57 +1,554 @@
-from typing import List, Optional, Dict, Any
+import functools
+import re
+import threading
+from concurrent.futures import Future
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator, Mapping, Sequence, Tuple
 
+from ..database import maintenance
 from ..database.db_manager import DBManager
+from ..database.models import Todo, todo_row
+from ..database.write_queue import WriteQueue
+
+
+# Must match idx_todos_order / idx_todos_category_order (see migrations) so the
+# list is read in index order without a temp B-tree sort.
+ORDER_BY = "completed ASC, priority_rank ASC, due_date IS NULL, due_date ASC, created_at DESC, id DESC"
+
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+
+class _Desc:
+    """Wraps a sort-key term so it orders descending (ORDER_BY's DESC terms)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Desc) and self.value == other.value
+
+    def __lt__(self, other: "_Desc") -> bool:
+        return other.value < self.value
+
+
+def sort_key(todo: Todo) -> Tuple[Any, ...]:
+    """ORDER_BY computed in Python (needs priority, due_date, created_at and id).
+
+    Keys of distinct rows never tie, so a row's position among loaded rows
+    and against a page cursor (``cursor_sort_key``) matches the query's.
+    """
+    due = todo.get("due_date")
+    return (
+        int(bool(todo.get("completed"))),
+        PRIORITY_RANK.get(todo.get("priority"), 1),
+        due is None,
+        due or "",
+        _Desc(todo.get("created_at") or ""),
+        -int(todo.get("id") or 0),
+    )
+
+
+def cursor_sort_key(key: "PageKey") -> Tuple[Any, ...]:
+    """``sort_key`` of the row a ``list_todos_page`` cursor points at."""
+    completed, rank, due, created, tid = key
+    return (int(bool(completed)), rank, due is None, due or "", _Desc(created or ""), -int(tid))
+
+
+# (expression, "comes after" operator) for each ORDER_BY term, used to build
+# keyset predicates that resume after a given row.
+_SORT_SPEC = (
+    ("completed", ">"),
+    ("priority_rank", ">"),
+    ("(due_date IS NULL)", ">"),
+    ("due_date", ">"),
+    ("created_at", "<"),
+    ("id", "<"),
+)
+# Cursor returned by list_todos_page: the row's values for these columns.
+PAGE_KEY_COLUMNS = ("completed", "priority_rank", "due_date", "created_at", "id")
+TODO_COLUMNS = Todo.__slots__
+
+PageKey = Tuple[Any, ...]
+ChangeListener = Callable[[str, List[int]], None]
+
+_INSERT_SQL = """
+    INSERT INTO todos (title, description, priority, category, due_date, completed)
+    VALUES (?, ?, ?, ?, ?, 0)
+"""
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Distinct list/search results kept per data version (typing a search makes
+# many); the whole map is dropped when it fills up or any write happens.
+READ_CACHE_SIZE = 64
+_MISS = object()
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable stand-in for a read argument (lists, dicts) in cache keys."""
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _cached_read(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Serve repeated calls with equal arguments from TodoManager's cache."""
+    @functools.wraps(method)
+    def wrapper(self: "TodoManager", *args: Any, **kwargs: Any) -> Any:
+        key = (method.__name__, _freeze(args), _freeze(kwargs))
+        return self._cached(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
+def _keyset_clause(key: PageKey) -> Tuple[str, List[Any]]:
+    """WHERE fragment selecting rows strictly after ``key`` in ORDER_BY order."""
+    completed, rank, due, created, tid = key
+    values = (completed, rank, 1 if due is None else 0, due, created, tid)
+    clause = ""
+    params: List[Any] = []
+    for (expr, op), value in reversed(list(zip(_SORT_SPEC, values))):
+        if not clause:
+            clause, params = f"{expr} {op} ?", [value]
+        else:
+            # IS instead of = so NULL due dates compare equal to each other.
+            clause = f"({expr} {op} ? OR ({expr} IS ? AND {clause}))"
+            params = [value, value] + params
+    # Redundant bound on the leading index columns so SQLite seeks straight
+    # to the cursor instead of walking the skipped prefix.
+    return f"(completed, priority_rank) >= (?, ?) AND {clause}", [completed, rank] + params
 
 
 class TodoManager:
-    def __init__(self, db: DBManager):
+    def __init__(self, db: DBManager, writer: Optional[WriteQueue] = None):
         self.db = db
+        # With a writer, edits are queued to its thread and group-committed;
+        # reads flush the queue first so they always see earlier writes.
+        self.writer = writer
+        self._write_error: Optional[BaseException] = None
+        self._fts: Optional[bool] = None
+        self._listeners: List[ChangeListener] = []
+        # Reads are served from memory until a write through this manager
+        # bumps ``version``: get_todo rows are dropped per changed id, list and
+        # search results all at once. Cached rows are shared; don't mutate them.
+        self.version = 0
+        self._cache_lock = threading.Lock()
+        self._rows: Dict[int, Optional[Todo]] = {}
+        self._reads: Dict[Tuple[Any, ...], Any] = {}
+
+    def subscribe(self, listener: ChangeListener) -> Callable[[], None]:
+        """Call ``listener(action, ids)`` after every write; returns an unsubscribe.
+
+        ``action`` is ``"added"``, ``"updated"`` or ``"deleted"``. Listeners run
+        on the writing thread and should be quick.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _forget(self, ids: Iterable[int]) -> None:
+        with self._cache_lock:
+            self.version += 1
+            self._reads.clear()
+            for tid in ids:
+                self._rows.pop(tid, None)
+
+    def _emit(self, action: str, ids: List[int]) -> None:
+        self._forget(ids)
+        for listener in list(self._listeners):
+            listener(action, ids)
+
+    def invalidate(self) -> None:
+        """Forget cached reads, e.g. after writing to the table directly."""
+        with self._cache_lock:
+            self.version += 1
+            self._reads.clear()
+            self._rows.clear()
+
+    def _cached(self, key: Tuple[Any, ...], load: Callable[[], Any]) -> Any:
+        with self._cache_lock:
+            version = self.version
+            value = self._reads.get(key, _MISS)
+        if value is not _MISS:
+            return value
+        value = load()
+        with self._cache_lock:
+            # A write that landed while loading makes the result stale.
+            if self.version == version:
+                if len(self._reads) >= READ_CACHE_SIZE:
+                    self._reads.clear()
+                self._reads[key] = value
+        return value
+
+    def _sync(self) -> None:
+        if self.writer is None:
+            return
+        self.writer.flush()
+        err, self._write_error = self._write_error, None
+        if err is not None:
+            raise err
+
+    def _detach(self, fut: Future) -> None:
+        # Fire-and-forget write: keep its failure for the next read to raise.
+        def _done(f: Future) -> None:
+            if f.exception() is not None and self._write_error is None:
+                self._write_error = f.exception()
+        fut.add_done_callback(_done)
+
+    def _submit(
+        self, run: Callable[[Any], Any], action: str, ids: Callable[[Any], List[int]], touched: Sequence[int] = ()
+    ) -> Future:
+        """Run ``run(conn)`` as one write and return a Future of its result.
+
+        With a writer the statement runs on its thread (the caller never
+        waits); without one it runs here and the Future is already done.
+        Listeners are notified before the Future resolves. ``touched`` are
+        ids known up front, dropped from the cache as soon as the write is
+        queued.
+        """
+        out: Future = Future()
+
+        def finish(f: Future) -> None:
+            err = f.exception()
+            if err is not None:
+                out.set_exception(err)
+                return
+            value = f.result()
+            self._emit(action, ids(value))
+            out.set_result(value)
+
+        if self.writer is not None:
+            # Reads between now and the commit must miss the cache, so they
+            # flush the queue and see this write.
+            self._forget(touched)
+            self.writer.submit_call(run).add_done_callback(finish)
+            return out
+        done: Future = Future()
+        try:
+            with self.db.transaction() as conn:
+                done.set_result(run(conn))
+        except Exception as e:
+            done.set_exception(e)
+        finish(done)
+        return out
+
+    def add_todo_async(self, title: str, description: str = "", priority: str = "Medium", category: str = "General", due_date: Optional[str] = None) -> Future:
+        """Queue an insert; the Future resolves to the new id once committed."""
+        params = (title, description, priority, category, due_date)
+        return self._submit(lambda conn: int(conn.execute(_INSERT_SQL, params).lastrowid), "added", lambda tid: [tid])
 
     def add_todo(self, title: str, description: str = "", priority: str = "Medium", category: str = "General", due_date: Optional[str] = None) -> int:
-        cur = self.db.execute(
-            """
-            INSERT INTO todos (title, description, priority, category, due_date, completed)
-            VALUES (?, ?, ?, ?, ?, 0)
-            """,
-            (title, description, priority, category, due_date)
-        )
-        return int(cur.lastrowid)
+        return self.add_todo_async(title, description, priority, category, due_date).result()
+
+    def add_todos_async(self, items: Iterable[Mapping[str, Any]]) -> Future:
+        """Queue inserting many todos in one transaction; the Future resolves to their ids."""
+        rows = [
+            (
+                item["title"],
+                item.get("description", ""),
+                item.get("priority", "Medium"),
+                item.get("category", "General"),
+                item.get("due_date"),
+            )
+            for item in items
+        ]
+
+        def run(conn) -> List[int]:
+            return [int(conn.execute(_INSERT_SQL, row).lastrowid) for row in rows]
+
+        return self._submit(run, "added", lambda ids: ids)
+
+    def add_todos(self, items: Iterable[Mapping[str, Any]]) -> List[int]:
+        """Insert many todos in one transaction and return their ids in order.
+
+        Each item accepts the same keys as ``add_todo``'s arguments.
+        """
+        return self.add_todos_async(items).result()
+
+    @staticmethod
+    def _update_sql(fields: Mapping[str, Any]) -> str:
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        return f"UPDATE todos SET {cols}, updated_at = datetime('now') WHERE id = ?"
 
     def update_todo(self, todo_id: int, **fields) -> None:
         if not fields:
             return
-        cols = []
-        vals = []
-        for k, v in fields.items():
-            cols.append(f"{k} = ?")
-            vals.append(v)
-        vals.append(todo_id)
-        sql = f"UPDATE todos SET {', '.join(cols)}, updated_at = datetime('now') WHERE id = ?"
-        self.db.execute(sql, vals)
+        if self.writer is not None:
+            # Coalesced with any still-queued edit of the same row.
+            def build(merged: Dict[str, Any]):
+                return self._update_sql(merged), list(merged.values()) + [todo_id]
+            self._detach(self.writer.submit_update(("todos", todo_id), fields, build))
+        else:
+            vals = list(fields.values())
+            vals.append(todo_id)
+            self.db.execute(self._update_sql(fields), vals)
+        self._emit("updated", [todo_id])
+
+    def update_todos_async(self, todo_ids: Iterable[int], **fields) -> Future:
+        """Queue the same field changes for many todos; the Future resolves to the row count."""
+        ids = list(todo_ids)
+        vals = list(fields.values())
+        sql = self._update_sql(fields)
+
+        def run(conn) -> int:
+            if not fields or not ids:
+                return 0
+            return max(conn.executemany(sql, [vals + [tid] for tid in ids]).rowcount, 0)
+
+        return self._submit(run, "updated", lambda _: ids, ids)
+
+    def update_todos(self, todo_ids: Iterable[int], **fields) -> int:
+        """Apply the same field changes to many todos with a single commit.
+
+        Returns the number of rows updated.
+        """
+        if not fields:
+            return 0
+        return self.update_todos_async(todo_ids, **fields).result()
 
     def delete_todo(self, todo_id: int) -> None:
-        self.db.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        if self.writer is not None:
+            self._detach(self.writer.submit("DELETE FROM todos WHERE id = ?", (todo_id,)))
+        else:
+            self.db.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        self._emit("deleted", [todo_id])
+
+    def delete_todos_async(self, todo_ids: Iterable[int]) -> Future:
+        """Queue deleting many todos in one commit; the Future resolves to the row count."""
+        ids = list(todo_ids)
+
+        def run(conn) -> int:
+            if not ids:
+                return 0
+            return max(conn.executemany("DELETE FROM todos WHERE id = ?", [(tid,) for tid in ids]).rowcount, 0)
+
+        return self._submit(run, "deleted", lambda _: ids, ids)
+
+    def delete_todos(self, todo_ids: Iterable[int]) -> int:
+        """Delete many todos with a single commit; returns rows deleted."""
+        return self.delete_todos_async(todo_ids).result()
 
     def set_completed(self, todo_id: int, completed: bool) -> None:
+        if self.writer is not None:
+            self.update_todo(todo_id, completed=1 if completed else 0)
+            return
         self.db.execute("UPDATE todos SET completed = ?, updated_at = datetime('now') WHERE id = ?", (1 if completed else 0, todo_id))
+        self._emit("updated", [todo_id])
 
-    def get_todo(self, todo_id: int) -> Optional[Dict[str, Any]]:
-        rows = self.db.query("SELECT * FROM todos WHERE id = ?", (todo_id,))
-        if not rows:
-            return None
-        return dict(rows[0])
+    def archive_completed(self, older_than_days: int = 30, batch_size: int = maintenance.ARCHIVE_BATCH) -> int:
+        """Move todos completed more than ``older_than_days`` ago to todos_archive.
 
-    def list_todos(self, include_completed: bool = True, category: Optional[str] = None) -> List[Dict[str, Any]]:
-        sql = "SELECT * FROM todos"
+        Listeners see the moved ids as ``"deleted"``. Returns the count.
+        """
+        self._sync()
+        ids = maintenance.archive_rows(
+            self.db, "todos", "completed = 1 AND updated_at < datetime('now', ?)",
+            (f"-{int(older_than_days)} days",), batch_size,
+        )
+        if ids:
+            self._emit("deleted", ids)
+        return len(ids)
+
+    def archived_todos(self, limit: int = 100, category: Optional[str] = None) -> List[Todo]:
+        """Most recently archived todos, for reports."""
+        sql = f"SELECT {', '.join(TODO_COLUMNS)} FROM todos_archive"
+        params: List[Any] = []
+        if category:
+            sql += " WHERE category = ?"
+            params.append(category)
+        sql += " ORDER BY archived_at DESC, id DESC LIMIT ?"
+        return self.db.query(sql, params + [limit], todo_row)
+
+    def get_todo(self, todo_id: int) -> Optional[Todo]:
+        with self._cache_lock:
+            version = self.version
+            if todo_id in self._rows:
+                return self._rows[todo_id]
+        self._sync()
+        rows = self.db.query("SELECT * FROM todos WHERE id = ?", (todo_id,), todo_row)
+        todo = rows[0] if rows else None
+        with self._cache_lock:
+            if self.version == version:
+                self._rows[todo_id] = todo
+        return todo
+
+    def due_between(self, start_epoch: int, end_epoch: int) -> List[Todo]:
+        """Open todos whose deadline falls in ``[start_epoch, end_epoch)``.
+
+        Served by the partial ``idx_todos_due_epoch`` index.
+        """
+        self._sync()
+        return self.db.query(
+            "SELECT id, title, due_date, due_epoch FROM todos"
+            " WHERE completed = 0 AND due_epoch IS NOT NULL AND due_epoch >= ? AND due_epoch < ?"
+            " ORDER BY due_epoch",
+            (start_epoch, end_epoch),
+            todo_row,
+        )
+
+    @staticmethod
+    def _filter_clauses(include_completed: bool, category: Optional[str], priority: Optional[str], alias: str = ""):
+        clauses: List[str] = []
         params: List[Any] = []
-        clauses = []
         if not include_completed:
-            clauses.append("completed = 0")
+            clauses.append(f"{alias}completed = 0")
         if category:
-            clauses.append("category = ?")
+            clauses.append(f"{alias}category = ?")
             params.append(category)
+        if priority:
+            clauses.append(f"{alias}priority = ?")
+            params.append(priority)
+        return clauses, params
+
+    @_cached_read
+    def list_todos(self, include_completed: bool = True, category: Optional[str] = None, priority: Optional[str] = None) -> List[Todo]:
+        self._sync()
+        sql = "SELECT * FROM todos"
+        clauses, params = self._filter_clauses(include_completed, category, priority)
         if clauses:
             sql += " WHERE " + " AND ".join(clauses)
-        sql += " ORDER BY completed ASC, priority DESC, due_date IS NULL, due_date ASC, created_at DESC"
-        rows = self.db.query(sql, params)
-        return [dict(r) for r in rows]
+        sql += " ORDER BY " + ORDER_BY
+        return self.db.query(sql, params, todo_row)
+
+    @_cached_read
+    def list_todos_page(
+        self,
+        limit: int = 100,
+        after: Optional[PageKey] = None,
+        include_completed: bool = True,
+        category: Optional[str] = None,
+        priority: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        as_tuples: bool = False,
+    ) -> Tuple[List[Any], Optional[PageKey]]:
+        """Return one page of todos in list order plus the cursor for the next.
+
+        Pagination is keyset-based: pass the returned cursor as ``after`` to
+        continue from the last row, so deep pages cost the same as the first.
+        ``columns`` limits the fields fetched; the cursor is ``None`` once the
+        last page has been returned. Rows are Todo objects, or plain tuples in
+        ``columns`` order with ``as_tuples``.
+        """
+        return self._todos_page(limit, after, include_completed, category, priority, columns, as_tuples)
+
+    def _todos_page(
+        self,
+        limit: int,
+        after: Optional[PageKey],
+        include_completed: bool,
+        category: Optional[str],
+        priority: Optional[str],
+        columns: Optional[Sequence[str]],
+        as_tuples: bool = False,
+    ) -> Tuple[List[Any], Optional[PageKey]]:
+        # Uncached list_todos_page, for callers that walk many pages once.
+        self._sync()
+        cols = list(columns) if columns else list(TODO_COLUMNS)
+        unknown = [c for c in cols if c not in TODO_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown todo columns: {', '.join(unknown)}")
+        select = cols + [c for c in PAGE_KEY_COLUMNS if c not in cols]
+        clauses, params = self._filter_clauses(include_completed, category, priority)
+        if after is not None:
+            key_clause, key_params = _keyset_clause(tuple(after))
+            clauses.append(key_clause)
+            params += key_params
+        sql = f"SELECT {', '.join(select)} FROM todos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {ORDER_BY} LIMIT ?"
+        rows = self.db.query(sql, params + [limit], None)
+        if not rows:
+            return [], None
+        next_key = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_key = tuple(last[select.index(c)] for c in PAGE_KEY_COLUMNS)
+        if not as_tuples:
+            # Cursor-only columns trail the requested ones and are dropped.
+            build = Todo.builder(cols)
+            return [build(r) for r in rows], next_key
+        if len(select) > len(cols):
+            n = len(cols)
+            rows = [r[:n] for r in rows]
+        return rows, next_key
+
+    def iter_todos(
+        self,
+        include_completed: bool = True,
+        category: Optional[str] = None,
+        priority: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        page_size: int = 500,
+    ) -> Iterator[Todo]:
+        """Stream todos in list order, fetching ``page_size`` rows at a time.
+
+        Only the first page goes through the read cache, so a full pass
+        doesn't evict the results the GUI keeps reusing.
+        """
+        rows, after = self.list_todos_page(page_size, None, include_completed, category, priority, columns)
+        while True:
+            yield from rows
+            if after is None:
+                return
+            rows, after = self._todos_page(page_size, after, include_completed, category, priority, columns)
+
+    @_cached_read
+    def categories(self) -> List[str]:
+        """Distinct categories, read from the category index."""
+        self._sync()
+        rows = self.db.query("SELECT DISTINCT category FROM todos WHERE category IS NOT NULL ORDER BY category")
+        return [r[0] for r in rows]
+
+    @_cached_read
+    def search(self, query: str, filters: Optional[Mapping[str, Any]] = None, limit: int = 200) -> List[Todo]:
+        """Full-text search over title and description, best matches first.
+
+        Every word in ``query`` is matched as a prefix ("rep" finds "report").
+        ``filters`` accepts ``include_completed``, ``category`` and ``priority``
+        with the same meaning as in ``list_todos``. An empty query returns the
+        filtered list in the usual order.
+        """
+        self._sync()
+        filters = filters or {}
+        clauses, params = self._filter_clauses(
+            filters.get("include_completed", True),
+            filters.get("category"),
+            filters.get("priority"),
+            alias="t.",
+        )
+        terms = _WORD_RE.findall(query or "")
+        if not terms:
+            sql = "SELECT t.* FROM todos t"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY " + ORDER_BY
+            rows = self.db.query(sql + " LIMIT ?", params + [limit], todo_row)
+        elif self._has_fts():
+            match = " ".join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+            sql = (
+                "SELECT t.* FROM todos_fts JOIN todos t ON t.id = todos_fts.rowid"
+                " WHERE todos_fts MATCH ?"
+            )
+            for c in clauses:
+                sql += " AND " + c
+            # Title hits outrank description hits.
+            sql += " ORDER BY bm25(todos_fts, 10.0, 1.0) LIMIT ?"
+            rows = self.db.query(sql, [match] + params + [limit], todo_row)
+        else:
+            like_clauses = []
+            like_params: List[Any] = []
+            for t in terms:
+                like_clauses.append("(t.title LIKE ? OR t.description LIKE ?)")
+                like_params += [f"%{t}%", f"%{t}%"]
+            sql = "SELECT t.* FROM todos t WHERE " + " AND ".join(like_clauses + clauses)
+            sql += " ORDER BY " + ORDER_BY
+            rows = self.db.query(sql + " LIMIT ?", like_params + params + [limit], todo_row)
+        return rows
+
+    def _has_fts(self) -> bool:
+        if self._fts is None:
+            rows = self.db.query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'todos_fts'")
+            self._fts = bool(rows)
+        return self._fts
@@ -0,0 +1,66 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from productivity_manager.database.db_manager import DBManager
+from productivity_manager.modules.time_tracker import Timer
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+class TestTimeAnalytics(unittest.TestCase):
+    def setUp(self):
+        from productivity_manager.modules.analytics import TimeAnalytics
+        self.td = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self.td.name, 'test.db'))
+        self.db.initialize()
+        self.db.executemany(
+            "INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds) VALUES (?, ?, ?, ?)",
+            [
+                (1, "2024-01-01T09:30:00", "2024-01-01T10:30:00", 3600),  # Monday
+                (1, "2024-01-01T23:30:00", "2024-01-02T00:30:00", 3600),  # crosses midnight
+                (None, "2024-01-03T14:00:00", "2024-01-03T14:20:00", 1200),
+                (2, "2024-01-05T08:00:00", "2024-01-05T10:00:00", 7200),
+            ],
+        )
+        self.analytics = TimeAnalytics(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.td.cleanup()
+
+    def test_totals_heatmap_daily(self):
+        self.assertEqual(self.analytics.task_totals(), {0: (1200, 1), 1: (7200, 2), 2: (7200, 1)})
+        heat = self.analytics.heatmap()
+        self.assertEqual(heat.shape, (7, 24))
+        self.assertEqual(heat.sum(), 15600)
+        self.assertEqual(heat[0, 9], 1800)
+        self.assertEqual(heat[0, 10], 1800)
+        self.assertEqual(heat[1, 0], 1800)
+        first, daily = self.analytics.daily_totals()
+        self.assertEqual(first, date(2024, 1, 1))
+        self.assertEqual(daily.tolist(), [5400, 1800, 1200, 0, 7200])
+        _, avg = self.analytics.rolling_average(window=2)
+        self.assertEqual(avg.tolist(), [5400, 3600, 1500, 600, 3600])
+
+    def test_streaks(self):
+        s = self.analytics.streaks(min_seconds=1000, today=date(2024, 1, 3))
+        self.assertEqual(s, {"longest": 3, "current": 3})
+        s = self.analytics.streaks(min_seconds=1000, today=date(2024, 1, 7))
+        self.assertEqual(s, {"longest": 3, "current": 0})
+
+    def test_timer_sessions_are_appended(self):
+        self.assertEqual(len(self.analytics.task_totals()), 3)
+        timer = Timer(self.db, task_id=9)
+        self.analytics.attach(timer)
+        timer.start()
+        timer._start_ts -= 5
+        timer.stop()
+        self.assertIn(9, self.analytics.task_totals())
+
+
+if __name__ == '__main__':
+    unittest.main()
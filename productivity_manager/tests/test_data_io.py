@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+from productivity_manager.database.db_manager import DBManager
+from productivity_manager.modules import data_io, time_stats
+
+
+class TestDataIO(unittest.TestCase):
+    def setUp(self):
+        self.td = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self.td.name, 'src.db'))
+        self.db.initialize()
+
+    def tearDown(self):
+        self.db.close()
+        self.td.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.td.name, name)
+
+    def test_round_trip_csv_and_jsonl(self):
+        self.db.executemany(
+            "INSERT INTO todos (title, description, priority, category, due_date, completed) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"t{i}", "line1\nline2, \"quoted\"", "High", "Work", None, i % 2) for i in range(25)],
+        )
+        self.db.execute(
+            "INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds, notes) VALUES (?, ?, ?, ?, ?)",
+            (3, "2024-05-01T23:00:00", "2024-05-02T01:00:00", 7200, "late"),
+        )
+        seen = []
+        for fmt in data_io.FORMATS:
+            n = data_io.export_table(self.db, "todos", self.path(f"todos.{fmt}"), batch_size=10,
+                                     progress=lambda done, frac: seen.append(done))
+            self.assertEqual(n, 25)
+        self.assertEqual(seen[:3], [10, 20, 25])
+        data_io.export_table(self.db, "time_entries", self.path("time.jsonl"))
+
+        for fmt in data_io.FORMATS:
+            dst = DBManager(self.path(f"dst_{fmt}.db"))
+            dst.initialize()
+            result = data_io.import_file(dst, "todos", self.path(f"todos.{fmt}"), chunk_size=7, keep_ids=True)
+            self.assertEqual((result.inserted, result.skipped), (25, 0))
+            cols = "id, title, description, priority, category, due_date, completed, created_at"
+            self.assertEqual(
+                [tuple(r) for r in dst.query(f"SELECT {cols} FROM todos ORDER BY id")],
+                [tuple(r) for r in self.db.query(f"SELECT {cols} FROM todos ORDER BY id")],
+            )
+            data_io.import_file(dst, "time_entries", self.path("time.jsonl"), keep_ids=True)
+            days = time_stats.totals(dst, "day", task_id=3)
+            self.assertEqual([(d["bucket"], d["seconds"]) for d in days], [("2024-05-01", 3600), ("2024-05-02", 3600)])
+            self.assertEqual(dst.query("SELECT count(*) FROM import_checkpoints")[0][0], 0)
+            dst.close()
+
+    def test_validation_and_resume(self):
+        src = self.path("todos.jsonl")
+        with open(src, "w", encoding="utf-8") as f:
+            for i in range(10):
+                f.write(json.dumps({"title": f"t{i}", "completed": "yes"}) + "\n")
+            f.write(json.dumps({"title": "", "priority": "Urgent"}) + "\n")
+            f.write("not json\n")
+        with self.assertRaisesRegex(ValueError, "line 11: title is required"):
+            data_io.import_file(self.db, "todos", src, chunk_size=4)
+        # The first two chunks were committed before the bad line.
+        self.assertEqual(self.db.query("SELECT count(*) FROM todos")[0][0], 8)
+
+        result = data_io.import_file(self.db, "todos", src, chunk_size=4, skip_invalid=True)
+        self.assertEqual(result.resumed_from, 8)
+        self.assertEqual((result.inserted, result.skipped), (10, 2))
+        self.assertEqual(result.errors[1], "line 12: invalid JSON (Expecting value)")
+        self.assertEqual(self.db.query("SELECT count(*) FROM todos WHERE completed = 1")[0][0], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
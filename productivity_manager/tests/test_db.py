@@ -0,0 +1,218 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from productivity_manager.database.async_db import AsyncDBManager
+from productivity_manager.database.db_manager import DBManager
+from productivity_manager.database.migrations import MIGRATIONS
+from productivity_manager.database.write_queue import WriteQueue
+from productivity_manager.modules import time_stats
+from productivity_manager.modules.async_todo import AsyncTodoManager
+from productivity_manager.modules.housekeeping import run_maintenance
+from productivity_manager.modules.todo_manager import ORDER_BY, TodoManager
+
+
+class TestDBManager(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self._td.name, 'test.db'))
+        self.db.initialize()
+
+    def tearDown(self):
+        self.db.close()
+        self._td.cleanup()
+
+    def test_connection_per_thread_and_wal(self):
+        main_conn = self.db.connection()
+        self.assertIs(main_conn, self.db.connection())
+        mode = self.db.query("PRAGMA journal_mode")[0][0]
+        self.assertEqual(mode.lower(), "wal")
+
+        seen = []
+
+        def worker():
+            conn = self.db.connection()
+            self.db.execute("INSERT INTO todos (title) VALUES (?)", ("from worker",))
+            seen.append(conn)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        self.assertIsNot(seen[0], main_conn)
+        rows = self.db.query("SELECT title FROM todos")
+        self.assertEqual([r["title"] for r in rows], ["from worker"])
+
+    def test_close_reopens_lazily(self):
+        conn = self.db.connection()
+        self.db.close()
+        self.assertIsNot(conn, self.db.connection())
+        self.assertEqual(self.db.query("SELECT count(*) FROM todos")[0][0], 0)
+
+    def test_transaction_rollback_and_savepoint(self):
+        with self.db.transaction():
+            self.db.execute("INSERT INTO todos (title) VALUES ('kept')")
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    self.db.execute("INSERT INTO todos (title) VALUES ('inner')")
+                    raise RuntimeError("boom")
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.execute("INSERT INTO todos (title) VALUES ('outer')")
+                raise RuntimeError("boom")
+        rows = self.db.query("SELECT title FROM todos")
+        self.assertEqual([r["title"] for r in rows], ["kept"])
+
+    def test_executemany(self):
+        cur = self.db.executemany("INSERT INTO todos (title) VALUES (?)", ((f"t{i}",) for i in range(100)))
+        self.assertEqual(cur.rowcount, 100)
+        self.assertEqual(self.db.query("SELECT count(*) FROM todos")[0][0], 100)
+
+    def test_migrations_are_recorded_and_idempotent(self):
+        latest = MIGRATIONS[-1].version
+        self.assertEqual(self.db.schema_version(), latest)
+        self.assertEqual(self.db.migrate(), latest)
+        rows = self.db.query("SELECT version FROM schema_version ORDER BY version")
+        self.assertEqual([r[0] for r in rows], [m.version for m in MIGRATIONS])
+
+    def test_priority_rank_ordering_uses_index(self):
+        tm = TodoManager(self.db)
+        for p in ("Low", "High", "Medium"):
+            tm.add_todo(p, priority=p)
+        tm.update_todo(tm.list_todos()[-1]['id'], priority="High", title="Low->High")
+        self.assertEqual([t['title'] for t in tm.list_todos()], ["High", "Low->High", "Medium"])
+
+        for where, params in (("", ()), ("WHERE category = ?", ("Work",))):
+            plan = " ".join(r[3] for r in self.db.query(
+                f"EXPLAIN QUERY PLAN SELECT * FROM todos {where} ORDER BY {ORDER_BY}", params))
+            self.assertIn("USING INDEX", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_instrumentation(self):
+        self.assertIsNone(self.db.stats)
+        stats = self.db.enable_instrumentation(slow_ms=0.0)
+        for i in range(3):
+            self.db.execute("INSERT INTO todos (title) VALUES (?)", (f"t{i}",))
+        self.db.query("SELECT * FROM todos WHERE title = 'x' AND description LIKE '%y%'")
+
+        snap = stats.snapshot()
+        insert = snap["INSERT INTO todos (title) VALUES (?)"]
+        self.assertEqual(insert["count"], 3)
+        self.assertEqual(sum(insert["buckets"]), 3)
+        self.assertIn("SELECT * FROM todos WHERE title = ? AND description LIKE ?", snap)
+        self.assertTrue(any("SCAN todos" in " ".join(p) for p in stats.full_scans().values()))
+        self.assertTrue(stats.slow_queries())
+        self.assertIn("Full table scans", stats.report())
+
+        self.db.disable_instrumentation()
+        self.db.query("SELECT 1")
+        self.assertNotIn("SELECT ?", stats.snapshot())
+
+    def test_write_queue_coalesces_and_reads_see_writes(self):
+        writer = WriteQueue(self.db)
+        tm = TodoManager(self.db, writer)
+        tid = tm.add_todo("queued")
+        self.assertTrue(tid > 0)
+
+        # Park the writer so the toggles below pile up in the queue.
+        gate = threading.Event()
+        writer.submit_call(lambda conn: gate.wait(5))
+        build = lambda f: (tm._update_sql(f), list(f.values()) + [tid])
+        futs = [writer.submit_update(("todos", tid), {"completed": i % 2}, build) for i in range(6)]
+        futs.append(writer.submit_update(("todos", tid), {"title": "renamed"}, build))
+        gate.set()
+
+        self.assertEqual(len({id(f.result(timeout=5)) for f in futs}), 1)  # one UPDATE ran
+        todo = tm.get_todo(tid)
+        self.assertEqual((todo['completed'], todo['title']), (1, "renamed"))
+
+        tm.set_completed(tid, False)
+        self.assertEqual(tm.get_todo(tid)['completed'], 0)
+        tm.delete_todo(tid)
+        self.assertIsNone(tm.get_todo(tid))
+
+        # Async writes return at once; listeners run before the future resolves.
+        events = []
+        tm.subscribe(lambda action, ids: events.append((action, list(ids))))
+        gate = threading.Event()
+        writer.submit_call(lambda conn: gate.wait(5))
+        fut = tm.add_todo_async("later")
+        bulk = tm.add_todos_async([{"title": "x"}, {"title": "y"}])
+        self.assertFalse(fut.done())
+        gate.set()
+        new_id = fut.result(timeout=5)
+        ids = bulk.result(timeout=5)
+        self.assertEqual(events[:2], [("added", [new_id]), ("added", ids)])
+        self.assertEqual(tm.update_todos_async(ids, completed=1).result(timeout=5), 2)
+        self.assertEqual(tm.delete_todos(ids + [new_id]), 3)
+        self.assertEqual(events[-1], ("deleted", ids + [new_id]))
+
+        # Reads straight after a queued write see it, not the cached result.
+        def parked(write):
+            gate = threading.Event()
+            writer.submit_call(lambda conn: gate.wait(5))
+            fut = write()
+            threading.Timer(0.05, gate.set).start()
+            return fut
+
+        self.assertEqual(tm.list_todos(), [])
+        fut = parked(lambda: tm.add_todo_async("fresh"))
+        self.assertEqual([t.title for t in tm.list_todos()], ["fresh"])
+        fresh = fut.result(timeout=5)
+        self.assertEqual(tm.get_todo(fresh).title, "fresh")
+        fut = parked(lambda: tm.delete_todos_async([fresh]))
+        self.assertEqual((tm.list_todos(), tm.get_todo(fresh)), ([], None))
+        self.assertEqual(fut.result(timeout=5), 1)
+        writer.close()
+
+    def test_async_facade_and_cancellation(self):
+        adb = AsyncDBManager(self.db, max_workers=1)
+        atm = AsyncTodoManager(TodoManager(self.db), adb)
+
+        async def scenario():
+            await asyncio.gather(atm.add_todo("a"), atm.add_todo("b"))
+            titles = sorted(t['title'] for t in await atm.list_todos())
+            endless = asyncio.ensure_future(adb.query(
+                "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"))
+            await asyncio.sleep(0.1)
+            endless.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await endless
+            # The only pool thread was freed by interrupting the statement.
+            rows = await asyncio.wait_for(adb.query("SELECT count(*) FROM todos"), 5)
+            return titles, rows[0][0]
+
+        try:
+            self.assertEqual(asyncio.run(scenario()), (["a", "b"], 2))
+        finally:
+            adb.close(wait=False)
+
+    def test_archival_and_maintenance(self):
+        tm = TodoManager(self.db)
+        ids = tm.add_todos({"title": f"t{i}"} for i in range(7))
+        tm.update_todos(ids[:5], completed=1)
+        self.db.execute("UPDATE todos SET updated_at = datetime('now', '-40 days') WHERE id <= ?", (ids[3],))
+        self.db.executemany(
+            "INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds) VALUES (?, ?, ?, ?)",
+            [(ids[0], "2020-01-01T10:00:00", "2020-01-01T11:00:00", 3600)] * 3,
+        )
+        time_stats.rebuild_rollups(self.db)
+        deleted = []
+        tm.subscribe(lambda action, got: deleted.extend(got) if action == "deleted" else None)
+
+        result = run_maintenance(tm, {"archive_completed_after_days": 30, "archive_time_entries_after_days": 365})
+        self.assertEqual((result["todos_archived"], result["time_entries_archived"]), (4, 3))
+        self.assertEqual(sorted(deleted), ids[:4])
+        self.assertEqual(len(tm.list_todos()), 3)
+        self.assertEqual(sorted(t.id for t in tm.archived_todos()), ids[:4])
+        self.assertEqual(self.db.query("SELECT count(*) FROM todos_all")[0][0], 7)
+        self.assertEqual(self.db.query("SELECT count(*) FROM time_entries")[0][0], 0)
+        # Reports still see archived sessions.
+        self.assertEqual(time_stats.rebuild_rollups(self.db), 3)
+        self.assertEqual(time_stats.totals(self.db, "month", "2020-01", "2020-01")[0]["seconds"], 10800)
+        self.assertEqual(self.db.connection().execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import errno
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from productivity_manager.modules import dedupe as dedupe_module
+from productivity_manager.modules.dedupe import dedupe, rollback
+from productivity_manager.modules.file_organizer import find_duplicates
+
+
+class TestDedupe(unittest.TestCase):
+    def test_hardlink_and_rollback(self):
+        with tempfile.TemporaryDirectory() as td:
+            tree = os.path.join(td, "tree")
+            os.makedirs(tree)
+            body = os.urandom(300 * 1024)
+            paths = [os.path.join(tree, n) for n in ("a", "b", "c", "d", "e")]
+            for p in paths:
+                with open(p, "wb") as f:
+                    f.write(body)
+                os.utime(p, ns=(1_000_000_000, 1_000_000_000))
+            os.chmod(paths[1], 0o600)
+            os.utime(paths[1], ns=(1_000_000_000, 2_000_000_000))
+            groups = find_duplicates(tree, with_keys=True)
+            members = [p for p, _ in groups[0][1]]
+            self.assertEqual(len(members), 5)
+            keeper, touched, edited = members[0], members[3], members[4]
+            os.utime(touched, ns=(1_000_000_000, 3_000_000_000))  # only its mtime changed
+            st = os.stat(edited)
+            with open(edited, "r+b") as f:  # same size and mtime, new content
+                f.write(b"!")
+            os.utime(edited, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+            journal = os.path.join(td, "dedupe.jsonl")
+            result = dedupe(groups, journal, mode="hardlink")
+            self.assertEqual((result.linked, result.bytes_reclaimed), (2, 2 * len(body)))
+            self.assertEqual(result.skipped, [f"{touched}: modified since scan", f"{edited}: content changed"])
+            for p in members[1:3]:
+                self.assertTrue(os.path.samefile(p, keeper))
+            self.assertFalse(os.path.samefile(touched, keeper))
+            with self.assertRaises(FileExistsError):  # one journal per run
+                dedupe(groups, journal, mode="hardlink")
+
+            # A fresh scan only links the touched (but identical) copy.
+            again_journal = os.path.join(td, "again.jsonl")
+            again = dedupe(find_duplicates(tree), again_journal, mode="hardlink")
+            self.assertEqual(again.linked, 1)
+            self.assertEqual(again.skipped, [f"{p}: already linked" for p in members[1:3]])
+
+            self.assertEqual(rollback(again_journal), [f"Restored: {touched}"])
+            logs = rollback(journal)
+            self.assertEqual(sum(l.startswith("Restored: ") for l in logs), 2)
+            for p in paths:
+                self.assertEqual(os.stat(p).st_nlink, 1)
+            st = os.stat(paths[1])
+            self.assertEqual((stat.S_IMODE(st.st_mode), st.st_mtime_ns), (0o600, 2_000_000_000))
+            with open(paths[1], "rb") as f:
+                self.assertEqual(f.read(), body)
+
+            # Rolling back again leaves the restored copies (and their metadata) alone.
+            os.utime(paths[1], ns=(1_000_000_000, 5_000_000_000))
+            logs = rollback(journal)
+            self.assertEqual(sum(l.startswith("Already restored: ") for l in logs), 2)
+            self.assertEqual(os.stat(paths[1]).st_mtime_ns, 5_000_000_000)
+
+    def _pair(self, td):
+        for n in ("a", "b"):
+            with open(os.path.join(td, n), "wb") as f:
+                f.write(b"z" * 5000)
+        return find_duplicates(td, with_keys=True)
+
+    def test_reflink_unsupported_is_skipped(self):
+        with tempfile.TemporaryDirectory() as td:
+            groups = self._pair(td)
+            unsupported = OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+            with mock.patch.object(dedupe_module, "reflink", side_effect=unsupported):
+                result = dedupe(groups, os.path.join(td, "j.jsonl"), mode="reflink")
+            copy = groups[0][1][1][0]
+            self.assertEqual(result.linked, 0)
+            self.assertEqual(result.skipped, [f"{copy}: {os.strerror(errno.EOPNOTSUPP)}"])
+            self.assertFalse(os.path.samefile(groups[0][1][0][0], copy))
+            self.assertEqual(sorted(os.listdir(td)), ["a", "b", "j.jsonl"])  # no temp file left
+            with self.assertRaises(ValueError):
+                dedupe(groups, os.path.join(td, "j2.jsonl"), mode="symlink")
+
+    def test_auto_falls_back_to_hardlink(self):
+        with tempfile.TemporaryDirectory() as td:
+            groups = self._pair(td)
+            unsupported = OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+            journal = os.path.join(td, "j.jsonl")
+            with mock.patch.object(dedupe_module, "reflink", side_effect=unsupported) as clone:
+                result = dedupe(groups, journal, mode="auto")
+            self.assertEqual(clone.call_count, 1)
+            self.assertEqual((result.linked, result.skipped), (1, []))
+            self.assertTrue(os.path.samefile(groups[0][1][0][0], groups[0][1][1][0]))
+            with open(journal) as f:
+                self.assertIn('"how": "hardlink"', f.read())
+
+    def test_small_files_are_left_alone(self):
+        with tempfile.TemporaryDirectory() as td:
+            tree = os.path.join(td, "tree")
+            os.makedirs(tree)
+            for n, body in (("e1", b""), ("e2", b""), ("s1", b"tiny"), ("s2", b"tiny")):
+                with open(os.path.join(tree, n), "wb") as f:
+                    f.write(body)
+            groups = find_duplicates(tree)
+            self.assertEqual(len(groups), 2)  # the empty files are found as duplicates
+
+            result = dedupe(groups, os.path.join(td, "j.jsonl"), mode="hardlink", min_size=0)
+            self.assertEqual((result.linked, result.skipped), (1, []))
+            self.assertFalse(os.path.samefile(os.path.join(tree, "e1"), os.path.join(tree, "e2")))
+            self.assertTrue(os.path.samefile(os.path.join(tree, "s1"), os.path.join(tree, "s2")))
+
+            rollback(os.path.join(td, "j.jsonl"))
+            result = dedupe(find_duplicates(tree), os.path.join(td, "j2.jsonl"), mode="hardlink", min_size=5)
+            self.assertEqual(result.linked, 0)
+            self.assertEqual(os.stat(os.path.join(tree, "s2")).st_nlink, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from productivity_manager.database.db_manager import DBManager
+from productivity_manager.modules.due_alerts import DueAlertScheduler
+from productivity_manager.modules.todo_manager import TodoManager
+
+
+def _local(delta: timedelta) -> str:
+    return (datetime.now() + delta).isoformat(timespec='seconds')
+
+
+class TestDueAlerts(unittest.TestCase):
+    def test_due_epoch_and_alerts(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+
+            soon = tm.add_todo("soon", due_date=_local(timedelta(minutes=30)))
+            later = tm.add_todo("later", due_date=_local(timedelta(hours=5)))
+            tm.add_todo("no date")
+            tm.add_todo("garbage", due_date="next tuesday")
+            day = tm.add_todo("date only", due_date="2030-01-02")
+            self.assertEqual(tm.get_todo(day)['due_epoch'], int(datetime(2030, 1, 2, 23, 59, 59).timestamp()))
+            self.assertIsNone(tm.list_todos_page(10, columns=("title", "due_epoch"))[0][-1]['due_epoch'])
+
+            fired = []
+            got = threading.Event()
+
+            def on_alert(todo):
+                fired.append(todo['id'])
+                got.set()
+
+            sched = DueAlertScheduler(tm, on_alert, lead_minutes=60)
+            sched.start()
+            try:
+                self.assertTrue(got.wait(5))
+                self.assertEqual(fired, [soon])
+                self.assertEqual([t for _, t in sched.pending()], [later])
+
+                # Edits are applied incrementally: pull "later" into the lead window.
+                got.clear()
+                tm.update_todo(later, due_date=_local(timedelta(minutes=10)))
+                self.assertTrue(got.wait(5))
+                self.assertEqual(fired, [soon, later])
+
+                # Completing a todo drops its pending alert.
+                other = tm.add_todo("other", due_date=_local(timedelta(hours=3)))
+                tm.set_completed(other, True)
+                tm.delete_todo(soon)
+                threading.Event().wait(0.2)
+                self.assertEqual(sched.pending(), [])
+            finally:
+                sched.stop()
+                db.close()
+
+    def test_edit_during_apply_is_not_lost(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+            a = tm.add_todo("a", due_date=_local(timedelta(hours=5)))
+            b = tm.add_todo("b", due_date=_local(timedelta(hours=6)))
+            got = threading.Event()
+            sched = DueAlertScheduler(tm, lambda todo: got.set(), lead_minutes=60)
+            sched.start()
+            try:
+                for _ in range(50):
+                    if len(sched.pending()) == 2:
+                        break
+                    threading.Event().wait(0.02)
+
+                # "b" is edited while the scheduler thread is applying "a",
+                # i.e. after it checked for pending edits but before it sleeps.
+                get_todo = tm.get_todo
+
+                def edit_b_once(tid):
+                    if tid == a and tm.get_todo is edit_b_once:
+                        tm.get_todo = get_todo
+                        tm.update_todo(b, due_date=_local(timedelta(minutes=10)))
+                    return get_todo(tid)
+
+                tm.get_todo = edit_b_once
+                tm.update_todo(a, title="a2")
+                self.assertTrue(got.wait(5))
+            finally:
+                sched.stop()
+                db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
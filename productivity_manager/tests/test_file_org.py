@@ -1,8 +1,27 @@
 import os
 import tempfile
+import threading
 import unittest
+from unittest import mock
 
-from productivity_manager.modules.file_organizer import organize_directory, find_duplicates
+from productivity_manager.modules.file_organizer import (
+    Cancelled,
+    Move,
+    OrganizePlan,
+    ScanStats,
+    apply_plan,
+    apply_rename,
+    batch_rename,
+    find_duplicates,
+    iter_duplicates,
+    iter_organize,
+    organize_directory,
+    plan_organize,
+    plan_rename,
+    plan_tiers,
+    rollback_rename,
+)
+from productivity_manager.modules.hash_cache import HashCache
 
 
 class TestFileOrganizer(unittest.TestCase):
@@ -25,6 +44,249 @@ class TestFileOrganizer(unittest.TestCase):
             has_dup = any(len(paths) >= 2 for _, paths in dups)
             self.assertTrue(has_dup)
 
+    def test_parallel_matches_serial(self):
+        with tempfile.TemporaryDirectory() as td:
+            for i in range(40):
+                sub = os.path.join(td, f"d{i % 3}", f"e{i % 2}")
+                os.makedirs(sub, exist_ok=True)
+                with open(os.path.join(sub, f"f{i}.bin"), "wb") as f:
+                    f.write(bytes([i % 7]) * (300 * 1024 + i % 2))
+            serial = find_duplicates(td, workers=1)
+            self.assertEqual(len(serial), 14)
+            self.assertEqual(find_duplicates(td, workers=4), serial)
+
+    def test_organize_plan(self):
+        with tempfile.TemporaryDirectory() as td:
+            for rel in ["image.png", "a/image.png", "a/b/image.png", "a/notes.txt", "Images/image.png",
+                        "Images/image (2).png", "x.unknown"]:
+                path = os.path.join(td, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(rel)
+
+            flat = plan_organize(td)
+            self.assertEqual(len(flat.moves), 2)
+            plan = plan_organize(td, recursive=True)
+            self.assertEqual(sorted(os.path.basename(f) for f in plan.folders), ["Documents", "Images", "Other"])
+            self.assertEqual(
+                [os.path.relpath(m.dest, td) for m in plan.moves],
+                [os.path.join("Images", "image (1).png"), os.path.join("Other", "x.unknown"),
+                 os.path.join("Images", "image (3).png"), os.path.join("Documents", "notes.txt"),
+                 os.path.join("Images", "image (4).png")],
+            )
+            self.assertTrue(plan.preview()[0].startswith("Would move: image.png -> "))
+            self.assertTrue(os.path.exists(os.path.join(td, "a", "b", "image.png")))  # planning moved nothing
+
+            logs = list(apply_plan(plan))
+            self.assertEqual(len(logs), 5)
+            self.assertTrue(all(l.startswith("Moved: ") for l in logs))
+            with open(os.path.join(td, "Images", "image (4).png")) as f:
+                self.assertEqual(f.read(), "a/b/image.png")
+            self.assertEqual(len(os.listdir(os.path.join(td, "Images"))), 5)
+
+            # Copy path, and a destination that appeared after planning.
+            src = os.path.join(td, "Other", "x.unknown")
+            copy = Move(src, os.path.join(td, "copied"), 9, True)
+            clash = Move(os.path.join(td, "Documents", "notes.txt"), src, 11, False)
+            logs = list(apply_plan(OrganizePlan(td, [], [clash, copy]), workers=2))
+            self.assertEqual(logs[0], f"Skipped: {os.path.join('Documents', 'notes.txt')} (destination exists)")
+            self.assertEqual(logs[1], f"Moved: {os.path.join('Other', 'x.unknown')} -> copied")
+
+    def test_organize_skips_unreadable_folder(self):
+        with tempfile.TemporaryDirectory() as td:
+            for rel in ["top.txt", "open/a.png", "locked/b.png"]:
+                path = os.path.join(td, rel)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(rel)
+            scandir = os.scandir
+
+            def no_locked(path):
+                if os.path.basename(path) == "locked":
+                    raise PermissionError(13, "Permission denied", path)
+                return scandir(path)
+
+            with mock.patch("os.scandir", side_effect=no_locked):
+                plan = plan_organize(td, recursive=True)
+            self.assertEqual(sorted(os.path.basename(m.src) for m in plan.moves), ["a.png", "top.txt"])
+            self.assertEqual(plan.preview()[-1], "Skipped folder: locked (Permission denied)")
+            logs = list(apply_plan(plan))
+            self.assertEqual(logs[0], "Skipped folder: locked (Permission denied)")
+            self.assertEqual(len(logs), 3)
+            self.assertTrue(os.path.exists(os.path.join(td, "locked", "b.png")))
+
+    def test_sampling_tiers(self):
+        size = 4 * 1024 * 1024
+        self.assertEqual([spec for spec, _ in plan_tiers(("head", "tail", "middle", "stride:16"), size)],
+                         ["tail", "middle", "head", "stride:16"])
+        # Small files skip tiers that would read all of them.
+        self.assertEqual([spec for spec, _ in plan_tiers(("head", "stride:16"), 200 * 1024)], [])
+
+        def write(path, patches):
+            body = bytearray(size)
+            for offset, value in patches:
+                body[offset] = value
+            with open(path, "wb") as f:
+                f.write(body)
+
+        with tempfile.TemporaryDirectory() as td:
+            write(os.path.join(td, "a"), [])
+            write(os.path.join(td, "a2"), [])
+            write(os.path.join(td, "tail"), [(size - 1, 1)])
+            write(os.path.join(td, "mid"), [(size // 2, 1)])
+            write(os.path.join(td, "stride"), [(size // 15, 1)])  # second stride block
+            write(os.path.join(td, "deep"), [(size // 3 + 100 * 1024, 1)])  # between samples
+            stats = ScanStats()
+            dups = find_duplicates(td, stats=stats)
+            self.assertEqual([sorted(os.path.basename(p) for p in paths) for _, paths in dups], [["a", "a2"]])
+            self.assertEqual({spec: t.eliminated for spec, t in stats.tiers.items()},
+                             {"head": 0, "tail": 1, "middle": 1, "stride:16": 1})
+            self.assertEqual(stats.tiers["tail"].bytes_avoided, size)
+            self.assertEqual(stats.tiers["tail"].bytes_read, 6 * 64 * 1024)
+            self.assertEqual((stats.full_files, stats.full_bytes_read), (3, 3 * size))
+
+    def test_streaming_progress_and_cancel(self):
+        with tempfile.TemporaryDirectory() as td:
+            for i in range(12):
+                with open(os.path.join(td, f"f{i}.bin"), "wb") as f:
+                    f.write(bytes([i % 3]) * 2048)
+            events = []
+            groups = iter_duplicates(td, progress=events.append)
+            self.assertEqual(len(next(groups)[1]), 4)
+            self.assertEqual(len(list(groups)), 2)
+            last = events[-1]
+            self.assertEqual((last.stage, last.files_done, last.files_total), ("hash", 12, 12))
+            self.assertEqual((last.bytes_total, last.fraction), (12 * 2048, 1.0))
+            self.assertIn("scan", [e.stage for e in events])
+
+            cancel = threading.Event()
+
+            def stop_after_scan(p):
+                if p.stage == "hash":
+                    cancel.set()
+
+            with self.assertRaises(Cancelled):
+                find_duplicates(td, workers=2, progress=stop_after_scan, cancel=cancel)
+
+            cancel = threading.Event()
+            moved = iter_organize(td, cancel=cancel)
+            self.assertTrue(next(moved).startswith("Moved: "))
+            cancel.set()
+            with self.assertRaises(Cancelled):
+                next(moved)
+            self.assertEqual(len([n for n in os.listdir(td) if n.endswith(".bin")]), 11)
+
+    def test_hash_cache(self):
+        with tempfile.TemporaryDirectory() as td:
+            tree = os.path.join(td, "tree")
+            os.makedirs(os.path.join(tree, "sub"))
+            files = {"a.bin": b"x" * 1000, "sub/b.bin": b"x" * 1000, "c.bin": b"y" * 1000}
+            for name, content in files.items():
+                with open(os.path.join(tree, name), "wb") as f:
+                    f.write(content)
+
+            with HashCache(os.path.join(td, "cache.db")) as cache:
+                first = find_duplicates(tree, cache)
+                self.assertEqual((cache.hits, cache.misses), (0, 3))
+
+            # Unchanged tree: every digest comes from the cache.
+            with HashCache(os.path.join(td, "cache.db")) as cache:
+                self.assertEqual(find_duplicates(tree, cache), first)
+                self.assertEqual((cache.hits, cache.misses), (3, 0))
+
+                # An unreadable subtree keeps its entries.
+                scandir = os.scandir
+
+                def no_sub(path):
+                    if os.path.basename(path) == "sub":
+                        raise PermissionError(13, "denied", path)
+                    return scandir(path)
+
+                with mock.patch("os.scandir", side_effect=no_sub):
+                    find_duplicates(tree, cache)
+                count = cache._conn.execute("SELECT count(*) FROM file_hashes").fetchone()[0]
+                self.assertEqual(count, 3)
+
+                # A rewritten file is rehashed; a deleted one is evicted.
+                with open(os.path.join(tree, "c.bin"), "wb") as f:
+                    f.write(b"x" * 1000)
+                os.utime(os.path.join(tree, "c.bin"), ns=(1, 1))
+                os.remove(os.path.join(tree, "sub", "b.bin"))
+                cache.hits = cache.misses = 0
+                dups = find_duplicates(tree, cache)
+                self.assertEqual(len(dups), 1)
+                self.assertTrue(dups[0][0].startswith("sha256:"))
+                self.assertEqual(sorted(os.path.basename(p) for p in dups[0][1]), ["a.bin", "c.bin"])
+                self.assertEqual((cache.hits, cache.misses), (1, 1))
+                # Another algorithm never reuses the sha256 digests.
+                cache.hits = cache.misses = 0
+                blake = find_duplicates(tree, cache, algorithm="blake2b")
+                self.assertTrue(blake[0][0].startswith("blake2b:"))
+                self.assertEqual(blake[0][1], dups[0][1])
+                self.assertEqual((cache.hits, cache.misses), (0, 2))
+                with self.assertRaises(ValueError):
+                    find_duplicates(tree, cache, algorithm="crc32")
+                count = cache._conn.execute("SELECT count(*) FROM file_hashes").fetchone()[0]
+                self.assertEqual(count, 2)
+
+    def test_batch_rename(self):
+        with tempfile.TemporaryDirectory() as td:
+            folder = os.path.join(td, "f")
+            os.makedirs(os.path.join(folder, "file_3.jpg"))  # a folder keeps its name
+            for i, name in enumerate(["file_2.txt", "file_1.txt", "x.jpg", "y.png"]):
+                path = os.path.join(folder, name)
+                with open(path, "w") as f:
+                    f.write(name)
+                os.utime(path, (1000 + i, 1000 + i))
+
+            self.assertEqual(
+                plan_rename(folder, "{date:%Y}-{counter}-{stem}", start=9).preview()[0],
+                "Would rename: file_1.txt -> 1970-09-file_1.txt",
+            )
+            # Oldest first swaps file_1 and file_2: both go through temporary names.
+            plan = plan_rename(folder, sort="mtime")
+            self.assertEqual(
+                [(os.path.basename(r.src), os.path.basename(r.dest), r.temp is not None) for r in plan.renames],
+                [("file_2.txt", "file_1.txt", True), ("file_1.txt", "file_2.txt", True),
+                 ("x.jpg", "file_3_1.jpg", False), ("y.png", "file_4.png", False)],
+            )
+            journal = os.path.join(td, "rename.jsonl")
+            self.assertEqual(len(apply_rename(plan, journal)), 4)
+            with open(os.path.join(folder, "file_1.txt")) as f:
+                self.assertEqual(f.read(), "file_2.txt")
+            self.assertEqual(sorted(os.listdir(folder)), ["file_1.txt", "file_2.txt", "file_3.jpg", "file_3_1.jpg",
+                                                          "file_4.png"])
+            self.assertEqual(plan_rename(folder, sort="mtime").renames, [])
+
+            self.assertEqual(len(rollback_rename(journal)), 4)
+            names = ["file_1.txt", "file_2.txt", "file_3.jpg", "x.jpg", "y.png"]
+            self.assertEqual(sorted(os.listdir(folder)), names)
+            with open(os.path.join(folder, "file_2.txt")) as f:
+                self.assertEqual(f.read(), "file_2.txt")
+
+            # A failure part way (a source gone since planning) undoes the steps already done.
+            plan = plan_rename(folder, "n{index}", sort="size", reverse=True)
+            os.rename(os.path.join(folder, "y.png"), os.path.join(td, "y.png"))
+            with self.assertRaises(FileNotFoundError):
+                apply_rename(plan, journal)
+            self.assertEqual(sorted(os.listdir(folder)), names[:-1])
+            self.assertFalse(os.path.exists(journal))
+
+            class CancelMidway(threading.Event):
+                checks = 0
+
+                def is_set(self):  # set from the third step on
+                    self.checks += 1
+                    return self.checks > 4
+
+            with self.assertRaises(Cancelled):
+                batch_rename(folder, "n{index}", cancel=CancelMidway())
+            self.assertEqual(sorted(os.listdir(folder)), names[:-1])
+            with self.assertRaisesRegex(ValueError, "Bad rename pattern"):
+                plan_rename(folder, "{nope}")
+            with self.assertRaises(ValueError):
+                plan_rename(folder, "a/{index}")
+
 
 if __name__ == '__main__':
     unittest.main()
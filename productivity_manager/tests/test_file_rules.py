@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+
+from productivity_manager.modules.file_organizer import plan_organize
+from productivity_manager.modules.file_rules import Classifier, classifier_from_config, rule_from_dict
+
+
+class TestFileRules(unittest.TestCase):
+    def setUp(self):
+        self.td = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.td.cleanup()
+
+    def make(self, name, data=b"", age_days=0):
+        path = os.path.join(self.td.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        if age_days:
+            t = time.time() - age_days * 86400
+            os.utime(path, (t, t))
+        return path
+
+    def test_rules_and_sniffing(self):
+        c = classifier_from_config({
+            "rules": [
+                {"category": "Backups", "exts": ["tar.gz"]},
+                {"category": "Installers", "globs": ["*setup*"], "min_size": 10},
+                {"category": "Old", "older_than_days": 30, "exts": [".txt"]},
+                {"category": "Scans", "magic": ["pdf"], "globs": ["scan_*"]},
+            ]
+        })
+        self.assertEqual(c.classify(self.make("site.TAR.GZ")), "Backups")
+        self.assertEqual(c.classify(self.make("x.gz")), "Archives")
+        self.assertEqual(c.classify(self.make("tool-setup.zip", b"x" * 20)), "Installers")
+        self.assertEqual(c.classify(self.make("tiny-setup.zip", b"x")), "Archives")  # too small
+        self.assertEqual(c.classify(self.make("notes.txt", age_days=40)), "Old")
+        self.assertEqual(c.classify(self.make("new.txt")), "Documents")
+        self.assertEqual(c.classify(self.make("scan_01", b"%PDF-1.7")), "Scans")
+        self.assertEqual(c.classify(self.make("scan_02", b"hello")), "Other")
+
+        # Extensionless files are sniffed: trie prefixes and offset signatures.
+        self.assertEqual(c.classify(self.make("photo", b"\x89PNG\r\n\x1a\n...")), "Images")
+        self.assertEqual(c.classify(self.make("clip", b"\x00\x00\x00\x18ftypmp42")), "Video")
+        self.assertEqual(c.classify(self.make("sound", b"RIFF\x00\x00\x00\x00WAVEfmt ")), "Audio")
+        self.assertEqual(c.classify(self.make("bundle", b"\x00" * 257 + b"ustar\x00")), "Archives")
+
+        # Mislabelled: only "always" trusts the content over the extension.
+        fake = self.make("really-a-png.txt", b"\x89PNG\r\n\x1a\n")
+        self.assertEqual(c.classify(fake), "Documents")
+        self.assertEqual(Classifier(sniff="always").classify(fake), "Images")
+        self.assertEqual(Classifier(sniff="never").classify(self.make("blob", b"%PDF-")), "Other")
+
+    def test_sniff_cache(self):
+        c = Classifier()
+        path = self.make("blob", b"%PDF-1.4")
+        for _ in range(3):
+            self.assertEqual(c.classify(path), "Documents")
+        self.assertEqual(c.reads, 1)
+        with open(path, "wb") as f:
+            f.write(b"GIF89a")
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(c.classify(path), "Images")
+        self.assertEqual(c.reads, 2)
+
+    def test_plan_uses_classifier(self):
+        self.make("readme", b"{\\rtf1 hi}")
+        os.makedirs(os.path.join(self.td.name, "Big"))
+        self.make("movie.bin", b"x" * 100)
+        c = Classifier([rule_from_dict({"category": "Big", "min_size": 50})])
+        plan = plan_organize(self.td.name, recursive=True, classifier=c)
+        self.assertEqual(sorted(os.path.relpath(m.dest, self.td.name) for m in plan.moves),
+                         [os.path.join("Big", "movie.bin"), os.path.join("Documents", "readme")])
+
+    def test_bad_rules(self):
+        with self.assertRaisesRegex(ValueError, "unknown magic kinds: bmp"):
+            rule_from_dict({"category": "X", "magic": ["bmp"]})
+        with self.assertRaisesRegex(ValueError, "unknown rule keys: size"):
+            rule_from_dict({"category": "X", "size": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
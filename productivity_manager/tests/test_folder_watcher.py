@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from productivity_manager.modules.folder_watcher import FolderWatcher, is_partial
+
+
+class TestFolderWatcher(unittest.TestCase):
+    def write(self, path, data, mode="wb"):
+        with open(path, mode) as f:
+            f.write(data)
+
+    def check_backend(self, backend):
+        with tempfile.TemporaryDirectory() as td:
+            self.write(os.path.join(td, "old.png"), b"x")  # there before the watch: left alone
+            w = FolderWatcher(td, settle_seconds=0, backend=backend)
+            try:
+                self.assertEqual(w.backend, backend)
+                self.write(os.path.join(td, "a.png"), b"img")
+                self.write(os.path.join(td, "b.pdf.crdownload"), b"partial")
+                self.assertEqual(w.step(0.2), [])  # first sighting
+                self.write(os.path.join(td, "a.png"), b"more", "ab")  # still growing
+                self.assertEqual(w.step(0.2), [])
+                self.assertEqual(w.step(), [f"Moved: a.png -> {os.path.join('Images', 'a.png')}"])
+
+                os.rename(os.path.join(td, "b.pdf.crdownload"), os.path.join(td, "b.pdf"))
+                self.assertEqual(w.step(0.2), [])
+                self.assertEqual(w.step(), [f"Moved: b.pdf -> {os.path.join('Documents', 'b.pdf')}"])
+                self.assertEqual(w.step(), [])
+                self.assertTrue(os.path.exists(os.path.join(td, "old.png")))
+            finally:
+                w.stop()
+
+    def test_polling(self):
+        self.check_backend("polling")
+
+    def test_inotify(self):
+        try:
+            FolderWatcher(tempfile.gettempdir(), backend="inotify").stop()
+        except OSError:
+            self.skipTest("inotify not available")
+        self.check_backend("inotify")
+
+    def test_is_partial(self):
+        self.assertTrue(is_partial("movie.mkv.part"))
+        self.assertTrue(is_partial("x.CRDOWNLOAD"))
+        self.assertTrue(is_partial(".hidden"))
+        self.assertFalse(is_partial("report.pdf"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,15 @@
 import os
+import sqlite3
 import time
 import tempfile
 import unittest
+from datetime import datetime
 
+from productivity_manager.database import rollups
 from productivity_manager.database.db_manager import DBManager
+from productivity_manager.database.migrations import MIGRATIONS
+from productivity_manager.database.write_queue import WriteQueue
+from productivity_manager.modules import time_stats
 from productivity_manager.modules.time_tracker import Timer
 
 
@@ -20,6 +26,78 @@ class TestTimer(unittest.TestCase):
             rows = db.query("SELECT * FROM time_entries")
             self.assertEqual(len(rows), 1)
             self.assertTrue(rows[0]["duration_seconds"] >= 0)
+            db.close()
+
+    def test_timer_with_writer(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            writer = WriteQueue(db)
+            t = Timer(db, writer=writer)
+            t.start()
+            entry_id = t.stop_async("queued").result(timeout=5)
+            self.assertTrue(entry_id > 0)
+            rows = db.query("SELECT notes FROM time_entries WHERE id = ?", (entry_id,))
+            self.assertEqual(rows[0]["notes"], "queued")
+            writer.close()
+            db.close()
+
+    def test_split_across_midnight(self):
+        parts = rollups.split_by_day(datetime(2024, 3, 31, 23, 0), datetime(2024, 4, 1, 1, 0), 7200)
+        self.assertEqual([(d.day, s) for d, s in parts], [(31, 3600), (1, 3600)])
+        deltas = rollups.entry_deltas(None, "2024-03-31T23:00:00", "2024-04-01T01:00:00", 7200)
+        self.assertEqual(deltas[("month", "2024-03", 0)], [3600, 1])
+        self.assertEqual(deltas[("month", "2024-04", 0)], [3600, 1])
+        self.assertEqual(deltas[("week", "2024-W13", 0)], [3600, 1])
+        self.assertEqual(deltas[("week", "2024-W14", 0)], [3600, 1])
+
+    def test_rollups_track_stop_and_rebuild(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            writer = WriteQueue(db)
+            for w in (None, writer):
+                t = Timer(db, task_id=7, writer=w)
+                t.start()
+                t._start_ts -= 5
+                t.stop_async().result(timeout=5)
+            today = time_stats.bucket_for("day")
+            row = time_stats.totals(db, "day", today, today, task_id=7)[0]
+            self.assertEqual(row["sessions"], 2)
+            self.assertGreaterEqual(row["seconds"], 10)
+
+            db.execute(
+                "INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds) VALUES (?, ?, ?, ?)",
+                (None, "2024-01-01T23:30:00", "2024-01-02T00:30:00", 3600),
+            )
+            before = time_stats.totals(db, "month")
+            self.assertEqual(time_stats.rebuild_rollups(db), 3)
+            after = time_stats.totals(db, "month")
+            self.assertEqual(after[0], {"bucket": "2024-01", "seconds": 3600, "sessions": 1})
+            self.assertEqual(after[1:], before)
+            days = time_stats.totals(db, "day", "2024-01-01", "2024-01-02", task_id=0)
+            self.assertEqual([d["seconds"] for d in days], [1800, 1800])
+            writer.close()
+            db.close()
+
+    def test_migration_backfill_matches_rebuild(self):
+        conn = sqlite3.connect(":memory:")
+        for m in MIGRATIONS[:5]:
+            m.apply(conn)
+        conn.executemany(
+            "INSERT INTO time_entries (task_id, start_time, end_time, duration_seconds) VALUES (?, ?, ?, ?)",
+            [(1, "2024-03-31T23:00:00", "2024-04-01T01:00:00", 7200),
+             (None, "2024-12-30T22:15:00", "2025-01-02T03:45:10", 192610),
+             (2, "2024-06-05T09:00:00", "2024-06-05T09:25:00", 1500),
+             (2, "not a time", "2024-06-05T10:00:00", 60)],
+        )
+        MIGRATIONS[5].apply(conn)
+        dump = lambda: conn.execute("SELECT * FROM time_rollups ORDER BY period, bucket, task_id").fetchall()
+        backfilled = dump()
+        self.assertEqual(rollups.rebuild(conn), 4)
+        self.assertEqual(backfilled, dump())
+        self.assertIn(("week", "2025-W01", 0, 192610, 1), backfilled)  # ISO year differs from calendar year
+        conn.close()
 
 
 if __name__ == '__main__':
@@ -3,7 +3,8 @@ import tempfile
 import unittest
 
 from productivity_manager.database.db_manager import DBManager
-from productivity_manager.modules.todo_manager import TodoManager
+from productivity_manager.database.models import Todo
+from productivity_manager.modules.todo_manager import TodoManager, cursor_sort_key, sort_key
 
 
 class TestTodoCRUD(unittest.TestCase):
@@ -29,6 +30,129 @@ class TestTodoCRUD(unittest.TestCase):
 
             tm.delete_todo(tid)
             self.assertIsNone(tm.get_todo(tid))
+            db.close()
+
+    def test_bulk_operations(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+
+            ids = tm.add_todos({"title": f"T{i}", "category": "Bulk"} for i in range(50))
+            self.assertEqual(len(ids), 50)
+            self.assertEqual(len(tm.list_todos(category="Bulk")), 50)
+
+            self.assertEqual(tm.update_todos(ids[:10], completed=1, priority="High"), 10)
+            done = [t for t in tm.list_todos(category="Bulk") if t['completed']]
+            self.assertEqual(len(done), 10)
+            self.assertTrue(all(t['priority'] == 'High' for t in done))
+
+            self.assertEqual(tm.delete_todos(ids[10:]), 40)
+            self.assertEqual(len(tm.list_todos()), 10)
+            db.close()
+
+    def test_search(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+            tm.add_todo("Write report", "quarterly numbers", category="Work")
+            tid = tm.add_todo("Buy milk", "report to mom", category="Home")
+            tm.add_todo("Gym", "legs")
+
+            self.assertEqual([t['title'] for t in tm.search("rep")], ["Write report", "Buy milk"])
+            self.assertEqual([t['title'] for t in tm.search("rep", {"category": "Home"})], ["Buy milk"])
+
+            tm.update_todo(tid, title="Buy oat milk", description="")
+            self.assertEqual([t['title'] for t in tm.search("oat")], ["Buy oat milk"])
+            self.assertEqual([t['title'] for t in tm.search("report")], ["Write report"])
+            tm.set_completed(tid, True)
+            self.assertEqual(tm.search("milk", {"include_completed": False}), [])
+            db.close()
+
+    def test_keyset_pagination(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+            ids = tm.add_todos(
+                {"title": f"T{i}", "priority": ("High", "Medium", "Low")[i % 3],
+                 "due_date": None if i % 4 == 0 else f"2026-01-{i % 28 + 1:02d}"}
+                for i in range(120)
+            )
+            tm.update_todos(ids[::5], completed=1)
+            expected = [t['id'] for t in tm.list_todos()]
+
+            rows, after = tm.list_todos_page(50, columns=("id", "title"))
+            self.assertEqual(set(rows[0]), {"id", "title"})
+            self.assertIsNotNone(after)
+            self.assertEqual([t['id'] for t in tm.iter_todos(page_size=7, columns=("id",))], expected)
+            self.assertEqual(sum(k[0] == "list_todos_page" for k in tm._reads), 2)  # streaming caches no deep pages
+            with self.assertRaises(ValueError):
+                tm.list_todos_page(10, columns=("id; DROP TABLE todos",))
+            tuples, after_t = tm.list_todos_page(50, columns=("id", "title"), as_tuples=True)
+            self.assertEqual(tuples, [(r.id, r.title) for r in rows])
+            self.assertEqual(after_t, after)
+
+            # sort_key reproduces ORDER_BY, tie-breakers included (rows added
+            # in one second share created_at), and lines up with the cursor.
+            self.assertEqual([t.id for t in sorted(tm.list_todos(), key=sort_key)], expected)
+            last = tm.get_todo(rows[-1].id)
+            self.assertEqual(cursor_sort_key(after), sort_key(last))
+            self.assertTrue(sort_key(tm.get_todo(expected[50])) > cursor_sort_key(after))
+            db.close()
+
+    def test_slotted_rows(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+            tid = tm.add_todo("Slots", category="Work")
+            todo = tm.get_todo(tid)
+            self.assertIsInstance(todo, Todo)
+            self.assertFalse(hasattr(todo, "__dict__"))
+            self.assertEqual((todo.title, todo["category"], todo.get("missing", 1)), ("Slots", "Work", 1))
+            self.assertEqual(dict(todo)["id"], tid)
+            page, _ = tm.list_todos_page(10, columns=("title",))
+            self.assertEqual(page[0].to_dict(), {"title": "Slots"})
+            self.assertIsNone(page[0].get("id"))
+            with self.assertRaises(KeyError):
+                page[0]["id"]
+            db.close()
+
+    def test_read_cache_and_events(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = DBManager(os.path.join(td, 'test.db'))
+            db.initialize()
+            tm = TodoManager(db)
+            events = []
+            tm.subscribe(lambda action, ids: events.append((action, list(ids), tm.version)))
+            a = tm.add_todo("A")
+            b = tm.add_todo("B", priority="High")
+            first = tm.list_todos()
+            self.assertIs(tm.list_todos(), first)
+            self.assertIs(tm.get_todo(a), tm.get_todo(a))
+
+            # Writes behind the manager's back are invisible until invalidate().
+            db.execute("UPDATE todos SET title = 'A2' WHERE id = ?", (a,))
+            self.assertEqual(tm.get_todo(a).title, "A")
+            tm.invalidate()
+            self.assertEqual(tm.get_todo(a).title, "A2")
+
+            cached_b = tm.get_todo(b)
+            tm.update_todo(a, title="A3")
+            self.assertIs(tm.get_todo(b), cached_b)
+            self.assertEqual(tm.get_todo(a).title, "A3")
+            self.assertEqual([t.title for t in tm.list_todos()], ["B", "A3"])
+            tm.delete_todo(b)
+            self.assertIsNone(tm.get_todo(b))
+            self.assertEqual(
+                [(action, ids) for action, ids, _ in events],
+                [("added", [a]), ("added", [b]), ("updated", [a]), ("deleted", [b])],
+            )
+            versions = [v for _, _, v in events]
+            self.assertEqual(versions, sorted(set(versions)))
+            db.close()
 
 
 if __name__ == '__main__':
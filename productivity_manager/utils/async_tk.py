@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+
+class TkAsyncBridge:
+    """Run an asyncio loop beside the Tk mainloop.
+
+    The loop lives on a daemon thread. ``submit`` schedules a coroutine on it
+    and hands the outcome back to Tk through ``after(0, ...)``, so callbacks
+    always run on the Tk thread. Blocking helpers (scrapers, file scans) go
+    through ``run_blocking`` on a shared, bounded pool and can be awaited
+    together with database calls.
+    """
+
+    def __init__(self, root: Any, max_workers: int = 4):
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tk-async")
+        self._thread = threading.Thread(target=self._run_loop, name="asyncio-tk", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(
+        self,
+        coro: Awaitable[Any],
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> Future:
+        """Schedule ``coro``; ``future.cancel()`` cancels the task."""
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)  # type: ignore[arg-type]
+        if on_done is not None or on_error is not None:
+            fut.add_done_callback(lambda f: self.root.after(0, self._deliver, f, on_done, on_error))
+        return fut
+
+    @staticmethod
+    def _deliver(fut: Future, on_done, on_error) -> None:
+        if fut.cancelled():
+            return
+        err = fut.exception()
+        if err is not None:
+            if on_error is not None:
+                on_error(err)
+        elif on_done is not None:
+            on_done(fut.result())
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Await a blocking call on the bridge's thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2)
+        self._executor.shutdown(wait=False)
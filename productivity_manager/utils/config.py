@@ -45,10 +45,27 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "file_organizer": {
         "downloads_path": os.path.join(os.path.expanduser("~"), "Downloads"),
         "create_category_folders": True,
+        "io_workers": 0,  # concurrent reads when hashing; 0 picks a default
+        "duplicate_tiers": ["head", "tail", "middle", "stride:16"],  # sampled pre-filter rounds
+        "watch_settle_seconds": 2,  # auto-organize: how long a new file must stay unchanged
+        # Checked before the built-in extension table, first match wins, e.g.
+        # {"category": "Installers", "globs": ["*setup*"], "min_size": 1048576}
+        "rules": [],
+        "sniff": "unknown",  # read file headers: "never", "unknown" (no rule matched) or "always"
     },
     "notifications": {
         "todo_due_alert_minutes": 60
-    }
+    },
+    "database": {
+        "query_stats": False,  # time statements and keep a slow-query log
+        "slow_query_ms": 100,
+    },
+    "maintenance": {
+        "interval_hours": 24,
+        "archive_completed_after_days": 30,  # 0 keeps completed todos in place
+        "archive_time_entries_after_days": 365,
+        "vacuum_pages": 1000,
+    },
 }
 
 
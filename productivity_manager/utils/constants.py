@@ -1,5 +1,6 @@
 APP_NAME = "Personal Productivity Manager"
 DB_NAME = "productivity.db"
+HASH_CACHE_NAME = "hash_cache.db"  # find_duplicates digest cache, beside DB_NAME
 CONFIG_FILE = "config.json"
 
 # Basic file organization mapping by extension